@@ -0,0 +1,103 @@
+import argparse
+import os
+import time
+
+import numpy as np
+
+from chroma_index import document_text
+from dataset_store import ensure_dataset, iter_dataset_records
+from onnx_embedder import CONFIG_FILE, OnnxEmbedder, export_onnx, model_dir
+
+QUERIES = ['cours sur Python pour débutants', 'certificat en cybersécurité', 'préparation à la certification AZ-104',
+           'apprendre le machine learning', 'créer des images avec l’intelligence artificielle', 'Excel et Power BI',
+           'développement web avec React', 'AWS Solutions Architect Associate', 'Docker et Kubernetes en production',
+           'AI-900 Azure AI Fundamentals']
+SUBJECTS = ['Python', 'Azure', 'AWS', 'React', 'Excel', 'Docker', 'machine learning', 'cybersécurité', 'SQL', 'Power BI']
+
+
+def synthetic_documents(count, seed=0):
+    rng = np.random.default_rng(seed)
+    return [f"Cours complet de {SUBJECTS[rng.integers(len(SUBJECTS))]} : {rng.integers(5, 60)} heures de vidéo, "
+            f"projets pratiques sur {SUBJECTS[rng.integers(len(SUBJECTS))]} et {SUBJECTS[rng.integers(len(SUBJECTS))]}, "
+            f"niveau {['débutant', 'intermédiaire', 'expert'][rng.integers(3)]}." for _ in range(count)]
+
+
+def dataset_documents(path, count):
+    documents = []
+    for record in iter_dataset_records(ensure_dataset(path)):
+        documents.append(document_text(record))
+        if len(documents) >= count:
+            break
+    return documents
+
+
+def measure(encoder, documents, queries, batch_size):
+    """Débit sur les documents (lots), latence d'une requête seule et embeddings des deux."""
+    encoder.encode(documents[:batch_size], batch_size=batch_size)   # préchauffage
+    t0 = time.perf_counter()
+    doc_embeddings = np.asarray(encoder.encode(documents, batch_size=batch_size), dtype=np.float32)
+    throughput = len(documents) / (time.perf_counter() - t0)
+    latencies, query_embeddings = [], []
+    for query in queries:
+        t0 = time.perf_counter()
+        query_embeddings.append(encoder.encode(query))
+        latencies.append((time.perf_counter() - t0) * 1000)
+    return throughput, np.array(latencies), doc_embeddings, np.asarray(query_embeddings, dtype=np.float32)
+
+
+def top_k(doc_embeddings, query_embeddings, k):
+    docs = doc_embeddings / np.linalg.norm(doc_embeddings, axis=1, keepdims=True)
+    queries = query_embeddings / np.linalg.norm(query_embeddings, axis=1, keepdims=True)
+    return np.argsort(-(queries @ docs.T), axis=1)[:, :k]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark des backends d'embeddings : PyTorch (float32) contre ONNX Runtime (float32 / int8) sur CPU.")
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--dataset", help="Jeu de données dont les cours servent de documents (sinon textes synthétiques).")
+    parser.add_argument("--docs", type=int, default=2000, help="Nombre de documents encodés (défaut : 2000).")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--threads", type=int, default=None, help="Threads d'ONNX Runtime (défaut : tous les cœurs).")
+    parser.add_argument("--k", type=int, default=10, help="Taille du top comparé pour le recouvrement (défaut : 10).")
+    args = parser.parse_args()
+
+    # Import local : PyTorch n'est chargé que pour la référence du benchmark
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    documents = dataset_documents(args.dataset, args.docs) if args.dataset else synthetic_documents(args.docs)
+    queries = QUERIES * 5
+    directory = model_dir(args.model)
+    if not os.path.exists(os.path.join(directory, CONFIG_FILE)):
+        print(f"Export ONNX de {args.model}...")
+        export_onnx(args.model, directory)
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    encoders = {
+        'pytorch float32': SentenceTransformer(args.model, device='cpu'),
+        'onnx float32': OnnxEmbedder(directory, quantized=False, threads=args.threads),
+        'onnx int8': OnnxEmbedder(directory, quantized=True, threads=args.threads),
+    }
+    print(f"{len(documents)} documents, {len(queries)} requêtes, lots de {args.batch_size}, modèle {args.model}.")
+    reference = None
+    for name, encoder in encoders.items():
+        throughput, latencies, doc_embeddings, query_embeddings = measure(encoder, documents, queries, args.batch_size)
+        line = (f"  {name:16s}: {throughput:7.0f} docs/s, requête p50 {np.percentile(latencies, 50):6.1f} ms, "
+                f"p99 {np.percentile(latencies, 99):6.1f} ms")
+        ranking = top_k(doc_embeddings, query_embeddings, args.k)
+        if reference is None:
+            reference = doc_embeddings, ranking
+            baseline = throughput
+        else:
+            ref_embeddings, ref_ranking = reference
+            cosine = np.sum(ref_embeddings * doc_embeddings, axis=1) / (
+                np.linalg.norm(ref_embeddings, axis=1) * np.linalg.norm(doc_embeddings, axis=1))
+            overlap = np.mean([len(set(a) & set(b)) / args.k for a, b in zip(ref_ranking, ranking)])
+            line += (f", x{throughput / baseline:.1f}, cosinus moyen {cosine.mean():.4f} (min {cosine.min():.4f}), "
+                     f"recouvrement top-{args.k} {overlap:.0%}")
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import argparse
+import os
+import time
+import tracemalloc
+
+from http_fetcher import has_detail_markers
+from udemy_extractors import (
+    parse_course_details, parse_course_details_reference, parse_listing, parse_listing_reference
+)
+
+IMPLEMENTATIONS = {
+    'reference (bs4 html.parser)': (parse_listing_reference, parse_course_details_reference),
+    'rapide (lxml, un seul parcours)': (parse_listing, parse_course_details),
+}
+
+
+def load_corpus(root):
+    """
+    Charge les pages .html sauvegardées sous `root` (même arborescence que replay_server)
+    et les classe en pages de résultats / pages de détails.
+    """
+    listing_pages, detail_pages = [], []
+    for dirpath, _, filenames in os.walk(root):
+        for name in sorted(filenames):
+            if not name.endswith('.html'):
+                continue
+            with open(os.path.join(dirpath, name), 'r', encoding='utf-8') as f:
+                html = f.read()
+            if has_detail_markers(html):
+                detail_pages.append(html)
+            elif "data-purpose=\"container\"" in html or "data-purpose='container'" in html:
+                listing_pages.append(html)
+    return listing_pages, detail_pages
+
+
+def run(parse_fn, pages, repeat):
+    """Renvoie (pages/s, pic mémoire moyen par page en Ko, pic mémoire max en Ko, résultats)."""
+    results = [parse_fn(html) for html in pages]  # échauffement
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        for html in pages:
+            parse_fn(html)
+    elapsed = time.perf_counter() - t0
+    pages_per_sec = len(pages) * repeat / elapsed if elapsed > 0 else float('inf')
+
+    # Allocations Python mesurées sur un passage séparé (tracemalloc ralentit fortement l'exécution ;
+    # la mémoire allouée en C par libxml2 n'est pas comptée)
+    peaks = []
+    for html in pages:
+        tracemalloc.start()
+        parse_fn(html)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        peaks.append(peak / 1024)
+    return pages_per_sec, sum(peaks) / len(peaks), max(peaks), results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark des extracteurs HTML sur un corpus de pages sauvegardées.")
+    parser.add_argument("corpus", help="Dossier des pages sauvegardées (.html).")
+    parser.add_argument("--repeat", type=int, default=5, help="Nombre de passages sur le corpus (défaut : 5).")
+    args = parser.parse_args()
+
+    listing_pages, detail_pages = load_corpus(args.corpus)
+    print(f"Corpus : {len(listing_pages)} pages de résultats, {len(detail_pages)} pages de détails.")
+
+    for kind, pages, index in (('résultats', listing_pages, 0), ('détails', detail_pages, 1)):
+        if not pages:
+            continue
+        print(f"\n--- Pages de {kind} ---")
+        baseline, reference_results = None, None
+        for name, fns in IMPLEMENTATIONS.items():
+            pages_per_sec, mean_peak_kb, max_peak_kb, results = run(fns[index], pages, args.repeat)
+            speedup = f" (x{pages_per_sec / baseline:.1f})" if baseline else ""
+            print(f"  {name}: {pages_per_sec:.1f} pages/s{speedup}, allocations : pic moyen "
+                  f"{mean_peak_kb:.0f} Ko/page, pic max {max_peak_kb:.0f} Ko")
+            if reference_results is None:
+                baseline, reference_results = pages_per_sec, results
+            else:
+                mismatches = sum(1 for a, b in zip(reference_results, results) if a != b)
+                print(f"    -> {mismatches} page(s) dont l'extraction diffère de la référence")
+
+
+if __name__ == "__main__":
+    main()
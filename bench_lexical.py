@@ -0,0 +1,102 @@
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from lexical_index import LexicalIndex
+
+TOPICS = [['python', 'programmation', 'scripts', 'pandas', 'automatisation'],
+          ['azure', 'cloud', 'microsoft', 'administrateur', 'certification', 'AZ-104', 'AZ-900', 'AZ-102'],
+          ['aws', 'cloud', 'architecte', 'solutions', 'examen', 'SAA-C03', 'CLF-C02'],
+          ['machine', 'learning', 'intelligence', 'artificielle', 'modèles', 'AI-900', 'AI-102', 'python'],
+          ['javascript', 'react', 'node.js', 'web', 'frontend', 'api'],
+          ['docker', 'kubernetes', 'devops', 'conteneurs', 'déploiement'],
+          ['sql', 'excel', 'power', 'bi', 'data', 'tableaux', 'PL-300', 'DP-900'],
+          ['c++', 'c#', 'programmation', 'objets', 'projet', 'avancé'],
+          ['sécurité', 'réseau', 'cybersécurité', 'SC-900', 'pentest']]
+COMMON = ['de', 'la', 'le', 'les', 'et', 'pour', 'des', 'en', 'un', 'une', 'du', 'avec', 'vous', 'à', 'dans',
+          'sur', 'par', 'cours', 'apprendre', 'débutants', 'pratique', 'complet', 'guide', 'projet', 'niveau']
+QUERIES = ['AZ-102', 'AI-900', 'certification azure administrateur', 'python machine learning pour débutants',
+           'node.js react web', 'préparation examen AWS SAA-C03', 'c++ projet avancé', 'power bi excel data']
+
+
+def synthetic_courses(rows, seed=0):
+    """
+    Cours synthétiques thématiques : chacun mêle les mots d'un thème (variantes numérotées comprises)
+    à des mots courants et à un vocabulaire rare (loi de Zipf), avec des longueurs variables.
+    """
+    rng = np.random.default_rng(seed)
+    topics = [[word for base in words for word in (base, f"{base}{k}")] for words in TOPICS
+              for k in range(1, 40)]
+    rare = np.array([f"mot{i}" for i in range(50000)], dtype=object)
+    zipf = 1.0 / np.arange(1, len(rare) + 1)
+    draws = iter(rare[rng.choice(len(rare), (rows, 40), p=zipf / zipf.sum())])
+
+    def text(topic, length):
+        choices = rng.random(length)
+        words = [topic[rng.integers(len(topic))] if c < 0.35 else
+                 COMMON[rng.integers(len(COMMON))] if c < 0.7 else next(rare_words) for c in choices]
+        return " ".join(words)
+
+    for i in range(rows):
+        topic = topics[rng.integers(len(topics))]
+        rare_words = iter(next(draws).tolist() * 3)
+        yield {
+            'url': f"https://www.udemy.com/course/c{i}/",
+            'title': text(topic, int(rng.integers(4, 12))),
+            'what_you_will_learn': [text(topic, int(rng.integers(5, 15))) for _ in range(rng.integers(2, 8))],
+            'requirements': [text(topic, int(rng.integers(3, 10))) for _ in range(rng.integers(1, 4))],
+            'category': 'courses' if rng.random() < 0.8 else 'certificats',
+            'level': ['Débutant', 'Intermédiaire', 'Expert', 'Tous les niveaux'][rng.integers(4)],
+            'price': float(rng.choice([0.0, 19.99, 49.99, 84.99, 129.99])),
+        }
+
+
+def latencies(index, queries, repeat, **filters):
+    seconds = []
+    for _ in range(repeat):
+        for query in queries:
+            t0 = time.perf_counter()
+            index.search(query, 30, **filters)
+            seconds.append(time.perf_counter() - t0)
+    return np.array(seconds) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de l'index lexical BM25 : construction, chargement, latence des requêtes.")
+    parser.add_argument("--rows", type=int, default=100_000, help="Nombre de cours synthétiques (défaut : 100 000).")
+    parser.add_argument("--repeat", type=int, default=200, help="Répétitions de chaque requête (défaut : 200).")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    index = LexicalIndex.build(synthetic_courses(args.rows, args.seed))
+    print(f"Construction : {args.rows} cours, {len(index.vocabulary)} termes, {len(index.postings)} entrées "
+          f"en {time.perf_counter() - t0:.1f}s.")
+
+    with tempfile.TemporaryDirectory() as directory:
+        t0 = time.perf_counter()
+        index.save(directory)
+        size = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory)) / 1e6
+        print(f"Sauvegarde : {time.perf_counter() - t0:.2f}s ({size:.1f} Mo).")
+        t0 = time.perf_counter()
+        index = LexicalIndex.load(directory)
+        print(f"Chargement : {(time.perf_counter() - t0) * 1000:.0f} ms.")
+
+        for label, filters in (("sans filtre", {}),
+                               ("filtrées  ", {'category': 'courses', 'level': 'Débutant', 'max_price': 50})):
+            ms = latencies(index, QUERIES, args.repeat, **filters)
+            print(f"Requêtes {label} : p50 {np.percentile(ms, 50):.3f} ms, p99 {np.percentile(ms, 99):.3f} ms, "
+                  f"max {ms.max():.3f} ms")
+
+        for query in ('AZ-102', 'AI-900'):
+            hits = index.search(query, 5)
+            print(f"  {query!r} : {len(hits)} résultats, meilleur score {hits[0][1]:.2f}" if hits else f"  {query!r} : aucun résultat")
+        # Les tableaux mappés doivent être libérés avant la suppression du dossier temporaire
+        del index
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from normalization import normalize_frame, normalize_frame_reference
+
+PRICES = ['19.99', '19,99 €', 'Free', 'gratuit', '1,299.99', '€84.99', None, '', 'null', 12.99, 0]
+RATINGS = ['4.6', '4,5', 4.2, None, 'Rating: 4.7 out of 5', '']
+STUDENTS = [12345, '12,345 students', '873', None, 0]
+CATEGORIES = ['courses', 'certificats', 'Certification AWS', None, 'Développement', '']
+TITLES = ['Python pour débutants', 'AWS Certified Solutions Architect', 'Préparation au certificat Azure',
+          'Microsoft Certified: Azure AI Engineer (AI-102)', 'Professional Certificate in Data Science',
+          'Machine Learning A-Z', None]
+# Type attendu selon la règle des chargeurs d'origine : (catégorie, titre, type)
+TYPE_CASES = [
+    ('courses', 'Microsoft Certified: Azure AI Engineer (AI-102)', 'Cours'),
+    ('courses', 'AWS Certified Solutions Architect', 'Certificat'),
+    ('courses', 'Préparation à la certification AZ-104', 'Certificat'),
+    ('courses', 'Professional Certificate in Data Science', 'Certificat'),
+    ('Certification AWS', 'Python pour débutants', 'Certificat'),
+    (None, None, 'Cours'),
+]
+
+
+def synthetic_courses(rows, seed=0):
+    """DataFrame de cours bruts aux formats variés (prix texte / numérique, gratuit, valeurs absentes...)."""
+    rng = np.random.default_rng(seed)
+
+    def column(values):
+        return pd.Series(np.array(values, dtype=object)[rng.integers(0, len(values), rows)])
+
+    return pd.DataFrame({
+        'url': [f"https://www.udemy.com/course/c{i}/" for i in range(rows)],
+        'title': column(TITLES),
+        'category': column(CATEGORIES),
+        'current_price': column(PRICES),
+        'rating': column(RATINGS),
+        'students_enrolled': column(STUDENTS),
+    })
+
+
+def mismatches(reference, result):
+    """Nombre de lignes différentes par colonne commune (NaN == NaN)."""
+    counts = {}
+    for column in reference.columns:
+        a, b = reference[column].astype(object), result[column].astype(object)
+        same = (a.isna() & b.isna()) | (a == b).fillna(False).astype(bool)
+        counts[column] = int((~same).sum())
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la normalisation : ligne par ligne (.apply) contre vectorisée.")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Nombre de lignes synthétiques (défaut : 1 000 000).")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    cases = pd.DataFrame(TYPE_CASES, columns=['category', 'title', 'type'])
+    wrong = cases[normalize_frame(cases[['category', 'title']])['type'].astype(object).to_numpy() != cases['type'].to_numpy()]
+    if len(wrong):
+        print(f"⚠️ Type Cours / Certificat différent de la règle d'origine pour : {wrong['title'].tolist()}")
+
+    df = synthetic_courses(args.rows, args.seed)
+    print(f"Jeu synthétique : {len(df)} lignes.")
+
+    t0 = time.perf_counter()
+    reference = normalize_frame_reference(df)
+    reference_seconds = time.perf_counter() - t0
+    print(f"  ligne par ligne (.apply) : {reference_seconds:.2f}s ({len(df) / reference_seconds:,.0f} lignes/s)")
+
+    t0 = time.perf_counter()
+    result = normalize_frame(df)
+    vectorized_seconds = time.perf_counter() - t0
+    print(f"  vectorisée               : {vectorized_seconds:.2f}s ({len(df) / vectorized_seconds:,.0f} lignes/s), "
+          f"x{reference_seconds / vectorized_seconds:.1f}")
+
+    diff = {column: n for column, n in mismatches(reference, result).items() if n}
+    print("  Résultats identiques." if not diff else f"  ⚠️ Différences : {diff}")
+
+
+if __name__ == "__main__":
+    main()
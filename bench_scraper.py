@@ -0,0 +1,325 @@
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+import psutil
+
+from html_archive import HtmlArchive
+from http_fetcher import HttpPageFetcher, has_detail_markers, rewrite_origin
+from page_readiness import PageReadinessWaiter, _percentile
+from pagination import page_url
+from record_stream import JsonlSink
+from replay_server import saved_pages, start_replay_server
+from retry_policy import HttpStatusError
+from scraper_loader import load_scraper
+from telemetry import Telemetry
+
+STAGES = ('fetch', 'wait', 'parse', 'write')
+# Étapes mesurées par la télémétrie du crawl -> étapes du rapport
+STAGE_NAMES = {'navigation': 'fetch', 'http_fetch': 'fetch', 'ready': 'wait', 'parse': 'parse', 'write': 'write'}
+
+
+def corpus_urls(root, archive=False):
+    """
+    URLs des pages enregistrées, classées en (pages de résultats, pages de détails) :
+    index d'une archive html_archive.py, ou arborescence de pages .html (replay_server).
+    """
+    if archive:
+        store = HtmlArchive(root)
+        entries = store.entries()
+        store.close()
+        return ([url for url, _, page_type in entries if page_type == 'listing'],
+                [url for url, _, page_type in entries if page_type == 'detail'])
+    listing_urls, detail_urls = [], []
+    for url, path in saved_pages(root):
+        with open(path, 'r', encoding='utf-8') as f:
+            html = f.read()
+        if has_detail_markers(html):
+            detail_urls.append(url)
+        elif "data-purpose=\"container\"" in html or "data-purpose='container'" in html:
+            listing_urls.append(url)
+    return sorted(listing_urls), sorted(detail_urls)
+
+
+def _tree_usage(process):
+    """Temps CPU (user + system) et RSS d'un processus et de ses descendants (ex : Chrome)."""
+    cpu, rss = 0.0, 0
+    for p in [process] + process.children(recursive=True):
+        try:
+            times = p.cpu_times()
+            cpu += times.user + times.system
+            rss += p.memory_info().rss
+        except psutil.Error:
+            pass
+    return cpu, rss
+
+
+class StageRecorder(Telemetry):
+    """Télémétrie du crawl qui garde aussi les durées de chaque page, rangées par étape du benchmark."""
+
+    def __init__(self):
+        super().__init__()
+        self.page = {}
+
+    def record_stage(self, stage, seconds, page_type=None, error=None, **fields):
+        super().record_stage(stage, seconds, page_type, error, **fields)
+        if stage in STAGE_NAMES:
+            self.page[STAGE_NAMES[stage]] = self.page.get(STAGE_NAMES[stage], 0.0) + seconds
+
+
+_startup_lock = None
+
+
+def _init_worker(startup_lock):
+    global _startup_lock
+    _startup_lock = startup_lock
+
+
+def _bench_worker(args):
+    """
+    Un worker du benchmark (processus séparé) : traite chaque page de détails de sa part avec
+    les fonctions du crawl (visit_course en mode navigateur, extract_details après le client
+    HTTP) et écrit les cours comme lui. Renvoie ses durées par étape, son CPU et son RSS max.
+    """
+    worker_id, urls, origin, mode, chromedriver_path, output_dir = args
+    scraper = load_scraper()
+    telemetry = StageRecorder()
+    process = psutil.Process()
+    t_start = time.perf_counter()
+    if mode == 'browser':
+        # Un lancement à la fois : undetected_chromedriver patche le binaire au démarrage
+        with _startup_lock:
+            driver = scraper.create_driver(chromedriver_path, telemetry)
+        waiter = PageReadinessWaiter()
+    else:
+        fetcher = HttpPageFetcher(concurrency=1, origin=origin)
+    startup_seconds = time.perf_counter() - t_start
+    cpu_start, peak_rss = _tree_usage(process)
+
+    samples, errors = [], 0
+    sink = JsonlSink(os.path.join(output_dir, f"worker-{worker_id}.jsonl"))
+
+    def on_result(course_info, error=None):
+        nonlocal errors
+        if error is not None:
+            errors += 1
+            return
+        with telemetry.stage('write', 'detail'):
+            sink.write(course_info)
+        telemetry.page['total'] = time.perf_counter() - t0
+        samples.append(telemetry.page)
+
+    try:
+        # Les fonctions du crawl affichent chaque cours : sortie coupée pendant la mesure
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            for position, url in enumerate(urls, start=1):
+                telemetry.page = {'wait': 0.0}
+                t0 = time.perf_counter()
+                course_info = {'title': url, 'url': url, 'topics': []}
+                if mode == 'browser':
+                    course_info['url'] = rewrite_origin(url, origin)
+                    scraper.visit_course(driver, course_info, position, len(urls), waiter, on_result, telemetry=telemetry)
+                else:
+                    result = fetcher.fetch(url)
+                    telemetry.record_stage('http_fetch', result.elapsed, 'detail',
+                                           error=result.error or (None if result.ok else result.status))
+                    if result.ok and has_detail_markers(result.html):
+                        course_info.update(scraper.extract_details(result.html, url, telemetry))
+                        on_result(course_info)
+                    else:
+                        on_result(course_info, HttpStatusError(result.status))
+                _, rss = _tree_usage(process)
+                peak_rss = max(peak_rss, rss)
+        cpu_end, _ = _tree_usage(process)
+    finally:
+        sink.close()
+        if mode == 'browser':
+            driver.quit()
+        else:
+            fetcher.close()
+    return {
+        'worker': worker_id,
+        'pages': len(samples),
+        'errors': errors,
+        'samples': samples,
+        'startup_seconds': startup_seconds,
+        'busy_seconds': time.perf_counter() - t_start - startup_seconds,
+        'cpu_seconds': cpu_end - cpu_start,
+        'peak_rss_mb': peak_rss / 1e6,
+    }
+
+
+def _listing_phase(listing_urls, origin, mode, chromedriver_path, max_pages):
+    """
+    Pages de résultats par le chemin du crawl : collect_topic_courses() pour chaque recherche du
+    corpus (page 1 dans Chrome, puis pages planifiées récupérées en HTTP en mode 'http', dans Chrome
+    sinon). Renvoie les cartes trouvées et les durées par étape des pages de résultats.
+    """
+    scraper = load_scraper()
+    telemetry = StageRecorder()
+    searches = sorted({page_url(url, 1) for url in listing_urls})
+    t0 = time.perf_counter()
+    try:
+        driver = scraper.create_driver(chromedriver_path, telemetry)
+    except Exception as e:
+        raise RuntimeError(f"Chrome n'a pas pu être lancé pour les pages de résultats ({e}) ; "
+                           f"--skip-listing ne rejoue que les pages de détails.") from e
+    startup_seconds = time.perf_counter() - t0
+    fetcher = HttpPageFetcher(origin=origin) if mode == 'http' else None
+    cards = []
+    t0 = time.perf_counter()
+    try:
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            for search_url in searches:
+                cards += scraper.collect_topic_courses(driver, rewrite_origin(search_url, origin), max_pages,
+                                                       PageReadinessWaiter(), fetcher, telemetry=telemetry)
+    finally:
+        driver.quit()
+        if fetcher is not None:
+            fetcher.close()
+    stages = {stage: values for (stage, page_type), values in telemetry.summary()['stages'].items()
+              if page_type == 'listing'}
+    return {
+        'searches': len(searches),
+        'pages': sum(stages[stage]['count'] for stage in ('navigation', 'http_fetch') if stage in stages),
+        'cards': len(cards),
+        'seconds': time.perf_counter() - t0,
+        'startup_seconds': startup_seconds,
+        'stages': {stage: {'p50': values['p50'], 'p95': values['p95']} for stage, values in stages.items()},
+    }
+
+
+def run_benchmark(listing_urls, detail_urls, origin, workers=2, mode='http', chromedriver_path='./chromedriver',
+                  output_dir=None, max_pages=5, skip_listing=False):
+    """
+    Rejoue le chemin complet du crawl contre `origin` : recherches des pages de résultats (dans ce
+    processus, sauf `skip_listing`), puis pages de détails réparties entre `workers` processus.
+    Renvoie le rapport (dict).
+    """
+    if workers < 1:
+        raise ValueError(f"Nombre de workers invalide : {workers} (au moins 1).")
+    output_dir = output_dir or tempfile.mkdtemp(prefix='bench-scraper-')
+    listing = None
+    if listing_urls and not skip_listing:
+        listing = _listing_phase(listing_urls, origin, mode, chromedriver_path, max_pages)
+
+    shares = [detail_urls[i::workers] for i in range(workers)]
+    jobs = [(i + 1, share, origin, mode, chromedriver_path, output_dir) for i, share in enumerate(shares) if share]
+    t0 = time.perf_counter()
+    with multiprocessing.Pool(len(jobs), initializer=_init_worker, initargs=(multiprocessing.Lock(),)) as pool:
+        worker_results = pool.map(_bench_worker, jobs)
+    elapsed = time.perf_counter() - t0
+
+    pages = sum(w['pages'] for w in worker_results)
+    report = {
+        'mode': mode,
+        'workers': len(jobs),
+        'courses': pages,
+        'errors': sum(w['errors'] for w in worker_results),
+        'elapsed_seconds': elapsed,
+        'courses_per_min': pages / elapsed * 60 if elapsed > 0 else 0.0,
+        'listing': listing,
+        'detail': {},
+        'per_worker': [{k: v for k, v in w.items() if k != 'samples'} for w in worker_results],
+    }
+    for stage in STAGES + ('total',):
+        values = sorted(s.get(stage, 0.0) for w in worker_results for s in w['samples'])
+        report['detail'][stage] = {'p50': _percentile(values, 50), 'p95': _percentile(values, 95)}
+    return report
+
+
+def print_report(report):
+    def ms(value):
+        return f"{value * 1000:.1f}ms" if value is not None else "n/a"
+
+    print(f"\n--- Benchmark du crawl rejoué ({report['mode']}, {report['workers']} workers) ---")
+    print(f"  {report['courses']} cours en {report['elapsed_seconds']:.1f}s : {report['courses_per_min']:.0f} cours/min, "
+          f"{report['errors']} erreurs")
+    listing = report['listing']
+    if listing is not None:
+        print(f"  Pages de résultats : {listing['searches']} recherches, {listing['pages']} pages, {listing['cards']} cartes "
+              f"en {listing['seconds']:.1f}s (démarrage de Chrome {listing['startup_seconds']:.1f}s)")
+        for stage, values in listing['stages'].items():
+            print(f"  Résultats {stage:10s} : p50={ms(values['p50'])} p95={ms(values['p95'])}")
+    for stage, values in report['detail'].items():
+        print(f"  Détails {stage:5s} : p50={ms(values['p50'])} p95={ms(values['p95'])}")
+    for w in report['per_worker']:
+        print(f"  worker {w['worker']}: {w['pages']} cours, {w['errors']} erreurs, démarrage {w['startup_seconds']:.1f}s, "
+              f"CPU {w['cpu_seconds']:.1f}s pour {w['busy_seconds']:.1f}s de travail, RSS max {w['peak_rss_mb']:.0f} Mo")
+
+
+def _positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"doit être au moins 1 (reçu : {value})")
+    return number
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark hors ligne du crawl contre le serveur local de pages enregistrées.")
+    parser.add_argument("corpus", help="Dossier des pages enregistrées (arborescence .html, ou archive avec --archive).")
+    parser.add_argument("--archive", action="store_true", help="Le corpus est une archive html_archive.py.")
+    parser.add_argument("--mode", choices=["http", "browser"], default="http",
+                        help="'browser' : pages chargées dans Chrome (nécessite ./chromedriver), comme le crawl par défaut.")
+    parser.add_argument("--chromedriver", default="./chromedriver")
+    parser.add_argument("--workers", type=_positive_int, default=2, help="Nombre de processus workers (défaut : 2).")
+    parser.add_argument("--max-pages", type=_positive_int, default=5,
+                        help="Pages de résultats parcourues par recherche, comme le crawl (défaut : 5).")
+    parser.add_argument("--skip-listing", action="store_true",
+                        help="Ne pas rejouer les pages de résultats (elles passent par Chrome, comme dans le crawl).")
+    parser.add_argument("--repeat", type=int, default=1, help="Nombre de passages sur les pages de détails (défaut : 1).")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Latence injectée par le serveur (défaut : 50 ms).")
+    parser.add_argument("--jitter-ms", type=float, default=20.0, help="Variation de la latence, ± (défaut : 20 ms).")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction des requêtes en erreur 503 (défaut : 0).")
+    parser.add_argument("--seed", type=int, default=0, help="Graine du tirage latence/erreurs (défaut : 0).")
+    parser.add_argument("--json", default=None, help="Écrire le rapport JSON dans ce fichier.")
+    parser.add_argument("--baseline", default=None, help="Rapport JSON de référence à comparer.")
+    parser.add_argument("--max-regression", type=float, default=0.10,
+                        help="Baisse de cours/min tolérée par rapport à --baseline avant échec (défaut : 0.10).")
+    args = parser.parse_args()
+
+    listing_urls, detail_urls = corpus_urls(args.corpus, args.archive)
+    if not detail_urls:
+        print(f"Aucune page de détails dans '{args.corpus}'.")
+        sys.exit(1)
+    print(f"Corpus : {len(listing_urls)} pages de résultats, {len(detail_urls)} pages de détails (x{args.repeat}).")
+
+    server = start_replay_server(
+        None if args.archive else args.corpus,
+        latency=args.latency_ms / 1000, jitter=args.jitter_ms / 1000, error_rate=args.error_rate,
+        archive=HtmlArchive(args.corpus) if args.archive else None, seed=args.seed,
+    )
+    origin = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        report = run_benchmark(listing_urls, detail_urls * args.repeat, origin, workers=args.workers,
+                               mode=args.mode, chromedriver_path=args.chromedriver, max_pages=args.max_pages,
+                               skip_listing=args.skip_listing)
+    except RuntimeError as e:
+        print(e)
+        sys.exit(1)
+    finally:
+        server.shutdown()
+    report['server'] = {'latency_ms': args.latency_ms, 'jitter_ms': args.jitter_ms, 'error_rate': args.error_rate,
+                        'injected_errors': server.injected_errors}
+    print_report(report)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        change = report['courses_per_min'] / baseline['courses_per_min'] - 1 if baseline['courses_per_min'] else 0.0
+        print(f"\nDébit par rapport à la référence : {change:+.1%} ({baseline['courses_per_min']:.0f} cours/min).")
+        if change < -args.max_regression:
+            print(f"RÉGRESSION : baisse supérieure à {args.max_regression:.0%}.")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+import queue
+import threading
+import time
+
+
+class WorkerStats:
+    """
+    Statistiques d'un worker du pool : pages traitées, erreurs et temps passé,
+    pour dimensionner le nombre de navigateurs à la machine.
+    """
+
+    def __init__(self, worker_id):
+        self.worker_id = worker_id
+        self.pages = 0
+        self.errors = 0
+        self.startup_seconds = 0.0
+        self.busy_seconds = 0.0
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def wall_seconds(self):
+        if self.started_at is None:
+            return 0.0
+        end = self.finished_at if self.finished_at is not None else time.perf_counter()
+        return end - self.started_at
+
+    @property
+    def pages_per_minute(self):
+        if self.busy_seconds <= 0:
+            return 0.0
+        return self.pages * 60.0 / self.busy_seconds
+
+    def as_dict(self):
+        return {
+            'worker_id': self.worker_id,
+            'pages': self.pages,
+            'errors': self.errors,
+            'startup_seconds': round(self.startup_seconds, 2),
+            'busy_seconds': round(self.busy_seconds, 2),
+            'wall_seconds': round(self.wall_seconds, 2),
+            'pages_per_minute': round(self.pages_per_minute, 2),
+        }
+
+
+class BrowserWorkerPool:
+    """
+    Pool de N navigateurs qui consomment une file d'URLs partagée.
+
+    Chaque worker (thread) lance son propre driver via `driver_factory`, puis
+    appelle `scrape_fn(driver, item)` pour chaque élément de la file. Les résultats
+    sont replacés dans l'ordre d'entrée, quel que soit le worker qui les a traités.
+    """
+
+    def __init__(self, driver_factory, num_workers=2):
+        if num_workers < 1:
+            raise ValueError("num_workers doit être >= 1")
+        self.driver_factory = driver_factory
+        self.num_workers = num_workers
+        self.stats = [WorkerStats(i + 1) for i in range(num_workers)]
+        # undetected_chromedriver patche le binaire chromedriver au lancement :
+        # on sérialise les démarrages pour éviter que deux workers le modifient en même temps.
+        self._startup_lock = threading.Lock()
+
+    def _worker(self, stats, tasks, results):
+        stats.started_at = time.perf_counter()
+        driver = None
+        try:
+            t0 = time.perf_counter()
+            with self._startup_lock:
+                driver = self.driver_factory()
+            stats.startup_seconds = time.perf_counter() - t0
+            print(f"[worker {stats.worker_id}] Navigateur lancé en {stats.startup_seconds:.1f}s.")
+        except Exception as e:
+            print(f"[worker {stats.worker_id}] Impossible de lancer le navigateur : {e}")
+            stats.finished_at = time.perf_counter()
+            return
+
+        try:
+            while True:
+                try:
+                    index, item = tasks.get_nowait()
+                except queue.Empty:
+                    break
+                t0 = time.perf_counter()
+                try:
+                    results[index] = self._scrape_fn(driver, item)
+                except Exception as e:
+                    stats.errors += 1
+                    print(f"[worker {stats.worker_id}] Erreur inattendue sur l'élément {index} : {e}")
+                finally:
+                    stats.busy_seconds += time.perf_counter() - t0
+                    stats.pages += 1
+                    tasks.task_done()
+        finally:
+            stats.finished_at = time.perf_counter()
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+    def map(self, scrape_fn, items):
+        """
+        Applique `scrape_fn` à tous les éléments avec les N workers et renvoie la liste
+        des résultats dans l'ordre d'entrée. Un élément non traité (worker mort,
+        erreur inattendue) vaut None.
+        """
+        items = list(items)
+        self._scrape_fn = scrape_fn
+        tasks = queue.Queue()
+        for index, item in enumerate(items):
+            tasks.put((index, item))
+        results = [None] * len(items)
+
+        threads = []
+        for stats in self.stats[:max(1, min(self.num_workers, len(items)))]:
+            thread = threading.Thread(
+                target=self._worker, args=(stats, tasks, results),
+                name=f"browser-worker-{stats.worker_id}", daemon=True
+            )
+            thread.start()
+            threads.append(thread)
+        for thread in threads:
+            thread.join()
+        return results
+
+    def report(self):
+        """Affiche le débit par worker et le débit global du pool."""
+        print("\n--- Débit des workers ---")
+        total_pages = 0
+        for stats in self.stats:
+            if stats.started_at is None:
+                continue
+            total_pages += stats.pages
+            print(
+                f"  worker {stats.worker_id}: {stats.pages} pages, {stats.errors} erreurs, "
+                f"démarrage {stats.startup_seconds:.1f}s, occupé {stats.busy_seconds:.1f}s, "
+                f"{stats.pages_per_minute:.1f} pages/min"
+            )
+        wall = max((s.wall_seconds for s in self.stats), default=0.0)
+        if wall > 0:
+            print(f"  Total : {total_pages} pages en {wall:.1f}s ({total_pages * 60.0 / wall:.1f} pages/min)")
+        return [s.as_dict() for s in self.stats if s.started_at is not None]
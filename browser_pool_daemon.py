@@ -0,0 +1,459 @@
+import argparse
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import psutil
+from selenium.webdriver import ChromeOptions
+from selenium.webdriver.chromium.remote_connection import ChromiumRemoteConnection
+from selenium.webdriver.remote.webdriver import WebDriver as RemoteWebDriver
+
+from lean_fetch import set_request_blocking
+from page_readiness import _percentile
+from scraper_loader import load_scraper
+
+DAEMON_PORT = 9600
+
+
+def driver_rss(driver):
+    """RSS (octets) de chromedriver et de tous les processus Chrome qu'il a lancés."""
+    try:
+        process = psutil.Process(driver.service.process.pid)
+        return sum(p.memory_info().rss for p in [process] + process.children(recursive=True))
+    except (AttributeError, psutil.Error):
+        return 0
+
+
+def executor_url(driver):
+    """URL du chromedriver d'une session, à laquelle un autre processus peut s'attacher."""
+    return getattr(driver.service, 'service_url', None) or driver.command_executor._url
+
+
+class WarmSession:
+    """Une session Chrome démarrée d'avance, avec son usage cumulé depuis son lancement."""
+
+    def __init__(self, driver, startup_seconds):
+        self.id = uuid.uuid4().hex[:8]
+        self.driver = driver
+        self.startup_seconds = startup_seconds
+        self.created_at = time.time()
+        self.pages = 0
+        self.leases = 0
+        self.baseline_rss = driver_rss(driver)
+        self.lease_id = None
+        self.leased_at = None
+        # Dernier signe de vie du client (location ou battement /renew)
+        self.renewed_at = None
+        self.job = None
+        # Contrôles en cours (retour de bail, santé) : la session n'est pas louable pendant ce temps
+        self.checking = False
+        self.last_check = time.monotonic()
+
+
+class WarmBrowserPool:
+    """
+    Pool de sessions Chrome gardées chaudes entre les crawls : un crawl loue une session
+    (lease) au lieu de lancer Chrome, puis la rend. Une session est recyclée (quittée et
+    remplacée en arrière-plan) après `max_pages` pages, quand son RSS a grossi de plus de
+    `max_rss_growth_mb`, quand un contrôle de santé échoue, ou quand son client ne renouvelle plus
+    son bail depuis `lease_ttl` secondes (client disparu ; un crawl actif envoie des battements). Les temps d'attente et de détention des baux sont mesurés.
+    """
+
+    def __init__(self, driver_factory, size=2, max_pages=200, max_rss_growth_mb=500.0, lease_ttl=1800.0,
+                 health_interval=30.0):
+        self.driver_factory = driver_factory
+        self.size = size
+        self.max_pages = max_pages
+        self.max_rss_growth = max_rss_growth_mb * 1e6
+        self.lease_ttl = lease_ttl
+        self.health_interval = health_interval
+        self._sessions = {}
+        self._leases = {}
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._thread = None
+        self.lease_waits = []
+        self.lease_durations = []
+        self.recycled = {}
+        self.failed_startups = 0
+
+    def start(self):
+        self._thread = threading.Thread(target=self._maintain, name="warm-pool-maintenance", daemon=True)
+        self._thread.start()
+        return self
+
+    # --- Baux ---
+
+    def lease(self, job=None, timeout=60.0):
+        """Loue une session saine ; renvoie (session, attente en s) ou (None, attente) après `timeout`."""
+        t0 = time.monotonic()
+        with self._cond:
+            while True:
+                idle = [s for s in self._sessions.values() if s.lease_id is None and not s.checking]
+                if idle:
+                    session = min(idle, key=lambda s: s.pages)
+                    break
+                remaining = timeout - (time.monotonic() - t0)
+                if remaining <= 0 or self._stopping:
+                    return None, time.monotonic() - t0
+                self._cond.wait(remaining)
+            session.lease_id = uuid.uuid4().hex
+            session.leased_at = session.renewed_at = time.monotonic()
+            session.job = job
+            session.leases += 1
+            self._leases[session.lease_id] = session
+            wait = time.monotonic() - t0
+            self.lease_waits.append(wait)
+        return session, wait
+
+    def renew(self, lease_id):
+        """Battement du client : repousse l'expiration du bail ; False si le bail n'existe plus."""
+        with self._cond:
+            session = self._leases.get(lease_id)
+            if session is None:
+                return False
+            session.renewed_at = time.monotonic()
+            return True
+
+    def release(self, lease_id, pages=0, healthy=True):
+        """
+        Rend une session ; elle est recyclée si elle a trop servi, trop grossi ou n'est plus saine.
+        Elle reste réservée pendant les contrôles (page vide, mémoire, santé) : aucun autre client
+        ne peut la louer avant qu'ils soient terminés.
+        """
+        with self._cond:
+            session = self._leases.pop(lease_id, None)
+            if session is None:
+                return False
+            self.lease_durations.append(time.monotonic() - session.leased_at)
+            session.pages += pages
+            session.lease_id = session.leased_at = session.renewed_at = session.job = None
+            reason = None if healthy else 'client'
+            if reason is None and session.pages >= self.max_pages:
+                reason = 'pages'
+            if reason is not None:
+                self._retire(session, reason)
+            else:
+                session.checking = True
+        if reason is None:
+            if driver_rss(session.driver) - session.baseline_rss > self.max_rss_growth:
+                reason = 'memory'
+            elif not self._healthy(session, reset=True):
+                reason = 'health'
+            with self._cond:
+                if reason is not None:
+                    self._retire(session, reason)
+                session.checking = False
+                self._cond.notify_all()
+        if reason is not None:
+            self._quit(session, reason)
+        return True
+
+    # --- Entretien ---
+
+    def _healthy(self, session, reset=False):
+        try:
+            if reset:
+                # Règles de blocage du client précédent retirées : elles ne passent pas au bail suivant
+                set_request_blocking(session.driver, [])
+                session.driver.execute_cdp_cmd('Network.disable', {})
+                # Page vide : libère la mémoire de la dernière page et évite de la recharger au bail suivant
+                session.driver.get('about:blank')
+            session.driver.execute_script('return 1')
+            session.last_check = time.monotonic()
+            return True
+        except Exception:
+            return False
+
+    def _retire(self, session, reason):
+        """Retire la session du pool (verrou tenu) : plus aucun client ne peut la louer."""
+        self._sessions.pop(session.id, None)
+        self.recycled[reason] = self.recycled.get(reason, 0) + 1
+        self._cond.notify_all()
+
+    def _quit(self, session, reason):
+        """Ferme une session déjà retirée du pool (hors verrou : quit() peut prendre du temps)."""
+        print(f"Session {session.id} recyclée ({reason}) après {session.pages} pages et {session.leases} baux.")
+        try:
+            session.driver.quit()
+        except Exception:
+            pass
+
+    def _maintain(self):
+        while not self._stopping:
+            now = time.monotonic()
+            with self._cond:
+                expired = [s for s in self._leases.values() if now - s.renewed_at > self.lease_ttl]
+                for session in expired:
+                    # Retirée avant d'être libérée : elle ne redevient jamais louable
+                    del self._leases[session.lease_id]
+                    session.lease_id = session.leased_at = session.renewed_at = session.job = None
+                    self._retire(session, 'lease_ttl')
+                idle = [s for s in self._sessions.values()
+                        if s.lease_id is None and not s.checking and now - s.last_check > self.health_interval]
+                for session in idle:
+                    session.checking = True
+                missing = self.size - len(self._sessions)
+            for session in expired:
+                self._quit(session, 'lease_ttl')
+            for session in idle:
+                healthy = self._healthy(session)
+                with self._cond:
+                    if not healthy:
+                        self._retire(session, 'health')
+                    session.checking = False
+                    self._cond.notify_all()
+                if not healthy:
+                    self._quit(session, 'health')
+            if missing > 0:
+                # Un lancement à la fois : undetected_chromedriver patche le binaire au démarrage
+                t0 = time.perf_counter()
+                try:
+                    driver = self.driver_factory()
+                except Exception as e:
+                    self.failed_startups += 1
+                    print(f"Échec du lancement d'une session : {e}")
+                    time.sleep(5)
+                    continue
+                session = WarmSession(driver, time.perf_counter() - t0)
+                with self._cond:
+                    self._sessions[session.id] = session
+                    self._cond.notify_all()
+                print(f"Session {session.id} prête en {session.startup_seconds:.1f}s ({len(self._sessions)}/{self.size}).")
+                continue
+            with self._cond:
+                self._cond.wait(1.0)
+
+    def stats(self):
+        with self._cond:
+            waits, durations = sorted(self.lease_waits), sorted(self.lease_durations)
+            sessions = [{
+                'id': s.id,
+                'leased': s.lease_id is not None,
+                'checking': s.checking,
+                'job': s.job,
+                'pages': s.pages,
+                'leases': s.leases,
+                'startup_seconds': round(s.startup_seconds, 2),
+                'rss_mb': round(driver_rss(s.driver) / 1e6, 1),
+            } for s in self._sessions.values()]
+        return {
+            'size': self.size,
+            'sessions': sessions,
+            'leases': len(waits),
+            'lease_wait_p50': _percentile(waits, 50),
+            'lease_wait_p95': _percentile(waits, 95),
+            'lease_duration_p50': _percentile(durations, 50),
+            'lease_duration_p95': _percentile(durations, 95),
+            'recycled': dict(self.recycled),
+            'failed_startups': self.failed_startups,
+        }
+
+    def shutdown(self):
+        with self._cond:
+            self._stopping = True
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+            self._cond.notify_all()
+        for session in sessions:
+            try:
+                session.driver.quit()
+            except Exception:
+                pass
+
+
+class PoolRequestHandler(BaseHTTPRequestHandler):
+    """API locale JSON : POST /lease, POST /renew, POST /release, GET /stats."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        if self.path == '/stats':
+            self._send(200, self.server.pool.stats())
+        else:
+            self._send(404, {'error': 'not found'})
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        payload = json.loads(self.rfile.read(length) or b'{}')
+        pool = self.server.pool
+        if self.path == '/lease':
+            session, wait = pool.lease(payload.get('job'), float(payload.get('timeout', 60.0)))
+            if session is None:
+                self._send(503, {'error': 'aucune session disponible', 'wait_seconds': wait})
+                return
+            self._send(200, {
+                'lease_id': session.lease_id,
+                'session_id': session.driver.session_id,
+                'executor_url': executor_url(session.driver),
+                'wait_seconds': wait,
+                'lease_ttl': pool.lease_ttl,
+            })
+        elif self.path == '/renew':
+            renewed = pool.renew(payload['lease_id'])
+            self._send(200 if renewed else 404, {'renewed': renewed})
+        elif self.path == '/release':
+            released = pool.release(payload['lease_id'], int(payload.get('pages', 0)), bool(payload.get('healthy', True)))
+            self._send(200 if released else 404, {'released': released})
+        else:
+            self._send(404, {'error': 'not found'})
+
+    def _send(self, status, data):
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_pool_server(pool, host='127.0.0.1', port=DAEMON_PORT):
+    server = ThreadingHTTPServer((host, port), PoolRequestHandler)
+    server.pool = pool
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# --- Côté crawl ---
+
+class PooledDriver(RemoteWebDriver):
+    """
+    Driver attaché à une session louée au démon (même chromedriver, même session) : aucun
+    lancement de Chrome. Un thread renouvelle le bail tant que le driver est ouvert, quelle que
+    soit la durée du crawl ; quit() rend la session au pool au lieu de la fermer.
+    """
+
+    def __init__(self, client, lease):
+        self._client = client
+        self._attach_session_id = lease['session_id']
+        self.lease_id = lease['lease_id']
+        self.lease_wait_seconds = lease['wait_seconds']
+        self.pages = 0
+        self.healthy = True
+        self._released = False
+        executor = ChromiumRemoteConnection(lease['executor_url'], 'goog', 'chrome')
+        super().__init__(command_executor=executor, options=ChromeOptions())
+        # Trois battements par délai d'expiration : un battement perdu ne suffit pas à perdre le bail
+        self._renew_interval = lease.get('lease_ttl', 1800.0) / 3
+        self._stop_renewing = threading.Event()
+        threading.Thread(target=self._renew_loop, name=f"lease-renew-{self.lease_id[:8]}", daemon=True).start()
+
+    def _renew_loop(self):
+        while not self._stop_renewing.wait(self._renew_interval):
+            if not self._client.renew(self.lease_id):
+                print("⚠️ Bail de la session expiré côté pool : le navigateur a pu être recyclé.")
+                self.healthy = False
+                return
+
+    def start_session(self, capabilities, *args, **kwargs):
+        # S'attache à la session existante au lieu d'en créer une nouvelle
+        self.session_id = self._attach_session_id
+        self.caps = {}
+
+    def get(self, url):
+        self.pages += 1
+        try:
+            super().get(url)
+        except Exception:
+            self.healthy = False
+            raise
+
+    def execute_cdp_cmd(self, cmd, cmd_args):
+        return self.execute('executeCdpCommand', {'cmd': cmd, 'params': cmd_args})['value']
+
+    def quit(self):
+        if not self._released:
+            self._released = True
+            self._stop_renewing.set()
+            self._client.release(self.lease_id, self.pages, self.healthy)
+
+
+class BrowserPoolClient:
+    """Client de l'API du démon : lease() renvoie un PooledDriver prêt à l'emploi."""
+
+    def __init__(self, url=f"http://127.0.0.1:{DAEMON_PORT}", job=None, timeout=60.0):
+        self.url = url.rstrip('/')
+        self.job = job
+        self.timeout = timeout
+
+    def _call(self, path, payload=None, timeout=None):
+        data = json.dumps(payload).encode('utf-8') if payload is not None else None
+        request = urllib.request.Request(self.url + path, data=data, headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(request, timeout=timeout or self.timeout + 10) as response:
+            return json.loads(response.read())
+
+    def lease(self):
+        lease = self._call('/lease', {'job': self.job, 'timeout': self.timeout})
+        print(f"Session louée au pool en {lease['wait_seconds'] * 1000:.0f} ms.")
+        return PooledDriver(self, lease)
+
+    def renew(self, lease_id):
+        """Renouvelle un bail ; False s'il a expiré. Démon injoignable : True, on réessaiera au battement suivant."""
+        try:
+            return self._call('/renew', {'lease_id': lease_id}, timeout=10)['renewed']
+        except urllib.error.HTTPError as e:
+            return e.code != 404
+        except Exception as e:
+            print(f"⚠️ Impossible de renouveler le bail : {e}")
+            return True
+
+    def release(self, lease_id, pages=0, healthy=True):
+        try:
+            self._call('/release', {'lease_id': lease_id, 'pages': pages, 'healthy': healthy})
+        except Exception as e:
+            # Démon injoignable : sans battement, le bail expirera de lui-même (lease_ttl)
+            print(f"⚠️ Impossible de rendre la session au pool : {e}")
+
+    def stats(self):
+        return self._call('/stats')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Démon local qui garde des sessions Chrome chaudes pour les crawls.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    serve = subparsers.add_parser("serve", help="Démarrer le démon.")
+    serve.add_argument("--port", type=int, default=DAEMON_PORT)
+    serve.add_argument("--size", type=int, default=2, help="Nombre de sessions gardées chaudes (défaut : 2).")
+    serve.add_argument("--chromedriver", default="./chromedriver")
+    serve.add_argument("--max-pages", type=int, default=200, help="Pages avant recyclage d'une session (défaut : 200).")
+    serve.add_argument("--max-rss-growth-mb", type=float, default=500.0,
+                       help="Croissance mémoire tolérée avant recyclage (défaut : 500 Mo).")
+    serve.add_argument("--lease-ttl", type=float, default=1800.0,
+                       help="Délai sans battement du client avant récupération de la session louée (défaut : 1800 s).")
+    stats = subparsers.add_parser("stats", help="Afficher l'état du démon.")
+    stats.add_argument("--url", default=f"http://127.0.0.1:{DAEMON_PORT}")
+    args = parser.parse_args()
+
+    if args.command == "stats":
+        print(json.dumps(BrowserPoolClient(args.url).stats(), indent=2, ensure_ascii=False))
+        return
+
+    scraper = load_scraper()
+    pool = WarmBrowserPool(lambda: scraper.create_driver(args.chromedriver), size=args.size,
+                           max_pages=args.max_pages, max_rss_growth_mb=args.max_rss_growth_mb,
+                           lease_ttl=args.lease_ttl).start()
+    server = start_pool_server(pool, port=args.port)
+    print(f"Pool de {args.size} sessions Chrome sur http://127.0.0.1:{args.port} (Ctrl+C pour arrêter).")
+    try:
+        while True:
+            time.sleep(60)
+            s = pool.stats()
+            print(f"{len(s['sessions'])} sessions, {s['leases']} baux, attente p50={s['lease_wait_p50'] or 0:.3f}s, "
+                  f"détention p50={s['lease_duration_p50'] or 0:.0f}s, recyclées : {s['recycled']}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,40 +2,73 @@
 
 import streamlit as st
 import json
-import chromadb
-from sentence_transformers import SentenceTransformer
 import os
+from chroma_index import COLLECTION_NAME, MANIFEST_NAME, MODEL_NAME, IncrementalIndexer, build_where
+from dataset_store import count_rows, ensure_dataset, iter_dataset_records, load_dataset_records
+from embedding_cache import EmbeddingCache
+from lexical_index import LEXICAL_DIR, LexicalIndex, hybrid_search
+from onnx_embedder import DEFAULT_BACKEND, embedder_id, load_encoder
+from query_cache import QueryCache
 
                                   
 JSON_PATH = '/home/mohamed/Bureau/global_dataset.json'                                          
 CHROMA_PATH = "./chromadb-tawilpfa-docs"                                                           
+INDEX_BATCH_SIZE = 256     # cours encodés puis ajoutés à ChromaDB par lot
+ENCODE_BATCH_SIZE = 64     # taille de lot du modèle SentenceTransformer
+EMBEDDING_BACKEND = DEFAULT_BACKEND   # "onnx" : modèle int8 sur CPU, pour les serveurs sans GPU
+EMBEDDER_ID = embedder_id(MODEL_NAME, EMBEDDING_BACKEND)
 
                                                                           
 
 @st.cache_resource
 def load_model():
     """
-    Charge le modèle SentenceTransformer, en essayant d'utiliser CUDA si disponible,
+    Charge l'encodeur de phrases : modèle ONNX quantifié int8 sur CPU si EMBEDDING_BACKEND vaut
+    "onnx", sinon le modèle SentenceTransformer, en essayant d'utiliser CUDA si disponible,
     sinon en se rabattant sur le CPU.
     """
+    if EMBEDDING_BACKEND == "onnx":
+        model = load_encoder(MODEL_NAME, "onnx")
+        st.success("✅ Modèle ONNX int8 chargé sur CPU.")
+        return model
     try:
                                              
-        model = SentenceTransformer('all-MiniLM-L6-v2', device='cuda')
+        model = load_encoder(MODEL_NAME, "torch", device='cuda')
         st.success("✅ Modèle SentenceTransformer chargé sur CUDA (GPU).")
         return model
     except Exception as e:
                                         
         st.warning(f"⚠️ CUDA indisponible ou erreur lors du chargement sur GPU: {e}. Passage sur CPU.")
-        return SentenceTransformer('all-MiniLM-L6-v2', device='cpu')
+        return load_encoder(MODEL_NAME, "torch", device='cpu')
+
+@st.cache_resource
+def load_embedding_cache():
+    """Cache disque des embeddings, partagé avec prediction_ML et le notebook."""
+    return EmbeddingCache(EMBEDDER_ID)
+
+@st.cache_resource
+def load_query_cache():
+    """Cache des embeddings de questions et des résultats, invalidé à chaque mise à jour de l'index."""
+    return QueryCache(manifest_path=os.path.join(CHROMA_PATH, MANIFEST_NAME))
+
+@st.cache_resource
+def load_lexical_index():
+    """
+    Index lexical BM25 (titre, "ce que vous apprendrez", prérequis) rangé à côté de la collection
+    ChromaDB : relu depuis le disque, reconstruit seulement si le jeu de données a changé.
+    """
+    lexical = LexicalIndex.load_or_build(os.path.join(CHROMA_PATH, LEXICAL_DIR), ensure_dataset(JSON_PATH))
+    st.success(f"✅ Index lexical prêt ({len(lexical.vocabulary)} termes).")
+    return lexical
 
 @st.cache_data
 def load_json():
     """
-    Charge les données depuis le fichier JSON spécifié.
+    Charge les cours depuis le jeu de données colonnaire (dataset_store.py), construit à partir
+    du fichier JSON (liste) ou JSONL (flux du scraper) spécifié s'il est absent ou périmé.
     """
     try:
-        with open(JSON_PATH, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data = load_dataset_records(ensure_dataset(JSON_PATH))
         st.success(f"✅ Données JSON chargées depuis '{JSON_PATH}'.")
         return data
     except FileNotFoundError:
@@ -49,101 +82,48 @@ def load_json():
         st.stop()
 
 @st.cache_resource
-def initialize_chroma(data):
+def initialize_chroma():
     """
-    Initialise ou réinitialise la collection ChromaDB, ajoute les documents et leurs embeddings.
-    Gère la suppression de la collection existante pour un démarrage propre.
+    Rattache la collection ChromaDB existante si le jeu de données n'a pas changé depuis la
+    dernière indexation (manifeste), sinon la met à jour de façon incrémentale : seuls les
+    cours nouveaux ou modifiés sont encodés, les cours disparus sont supprimés.
     """
     st.info("🚀 Initialisation de ChromaDB...")
-    client = chromadb.PersistentClient(path=CHROMA_PATH)
-    
-                                                                          
-    try:
-        client.delete_collection("courses_collection")
-        st.info("🔄 Collection 'courses_collection' existante supprimée pour re-création.")
-    except chromadb.errors.NotFoundError:
-        st.info("➕ Collection 'courses_collection' n'existe pas encore. Création en cours.")
-    except Exception as e:
-        st.error(f"❌ Erreur inattendue lors de la tentative de suppression de la collection: {e}")
-        st.stop()
-
-                                                                                                       
-    collection = client.create_collection(name="courses_collection")
-    st.success("✅ Collection 'courses_collection' prête.")
-
-    docs, ids, metas = [], [], []
-    model = load_model()                                                     
-
-                                                                          
-    for idx, record in enumerate(data):
-                                                               
-        title = str(record.get('title', ''))
-        description = str(record.get('description', ''))
-        
-                                                                                 
-        what_you_will_learn_list = record.get('what_you_will_learn')
-        if isinstance(what_you_will_learn_list, list):
-            what_you_learn_str = " ".join(map(str, what_you_will_learn_list))
-        elif what_you_will_learn_list is not None:
-            what_you_learn_str = str(what_you_will_learn_list)
-        else:
-            what_you_learn_str = ""
-
-        combined_text = f"{title} {description} {what_you_learn_str}"
-        docs.append(combined_text)
-        ids.append(str(idx))
-
-                                                                   
-        clean_meta = {}
-        for k, v in record.items():
-                                                                         
-            if isinstance(v, (str, int, float, bool)):
-                clean_meta[k] = v
-            elif isinstance(v, list):
-                                                                      
-                clean_meta[k] = " / ".join(map(str, v))
-            elif v is None:
-                                                                                              
-                clean_meta[k] = ""
-                                                                               
-                                                                                        
-                                                                                                   
-                                               
+    dataset_path = ensure_dataset(JSON_PATH)
+    indexer = IncrementalIndexer(CHROMA_PATH, model_name=EMBEDDER_ID)
+    collection = indexer.attach(dataset_path)
+    if collection is not None:
+        st.success(f"✅ Collection '{COLLECTION_NAME}' à jour ({collection.count()} documents).")
+        return collection
 
-                                                                                                      
-        try:
-            clean_meta['rating'] = float(clean_meta.get('rating', 0.0))
-        except (ValueError, TypeError):
-            clean_meta['rating'] = 0.0                             
+    st.info("⏳ Mise à jour incrémentale de l'index...")
+    progress_bar = st.progress(0.0)
+    total = count_rows(dataset_path)
 
-        try:
-            clean_meta['current_price'] = float(clean_meta.get('current_price', 0.0))
-        except (ValueError, TypeError):
-            clean_meta['current_price'] = 0.0                             
-
-                                                                                      
-        clean_meta['title'] = str(clean_meta.get('title', ''))
-        clean_meta['description'] = str(clean_meta.get('description', ''))
-        clean_meta['category'] = str(clean_meta.get('category', ''))
-        clean_meta['level'] = str(clean_meta.get('level', ''))
-        clean_meta['language'] = str(clean_meta.get('language', ''))
-        clean_meta['requirements'] = str(clean_meta.get('requirements', ''))
-        clean_meta['what_you_will_learn'] = str(clean_meta.get('what_you_will_learn', ''))                                   
-
-        metas.append(clean_meta)
-    
-    st.info(f"⏳ Encodage de {len(docs)} documents en embeddings...")
-    embeddings = model.encode(docs).tolist()
-    st.success(f"✅ {len(embeddings)} embeddings générés.")
+    def show_progress(stats):
+        progress_bar.progress(min(stats['seen'] / total, 1.0) if total else 1.0,
+                              text=f"{stats['seen']}/{total} cours, {stats['docs_per_sec']:.0f} docs/s")
 
-    st.info("📥 Ajout des documents à ChromaDB...")
     try:
-        collection.add(documents=docs, embeddings=embeddings, ids=ids, metadatas=metas)
-        st.success("✅ Documents ajoutés à ChromaDB avec succès.")
+        cache = load_embedding_cache()
+        collection, stats = indexer.sync(
+            iter_dataset_records(dataset_path),
+            lambda docs: cache.encode(docs, lambda texts: load_model().encode(texts, batch_size=ENCODE_BATCH_SIZE)),
+            dataset_path,
+            batch_size=INDEX_BATCH_SIZE,
+            on_progress=show_progress,
+        )
     except Exception as e:
-        st.error(f"❌ Erreur lors de l'ajout des documents à ChromaDB: {e}")
+        st.error(f"❌ Erreur lors de l'indexation dans ChromaDB: {e}")
         st.stop()
-        
+    cache_stats = cache.stats()
+    st.success(f"✅ Index mis à jour en {stats['seconds']:.1f}s ({stats['docs_per_sec']:.0f} docs/s) : "
+               f"{stats['added']} ajoutés, {stats['updated']} modifiés, {stats['deleted']} supprimés, "
+               f"{stats['unchanged']} inchangés (cache d'embeddings : {cache_stats['hits']} trouvés, "
+               f"{cache_stats['misses']} encodés).")
+    if stats['failed']:
+        st.warning(f"⚠️ {stats['failed']} cours non indexés (retentés au prochain démarrage) : "
+                   + "; ".join(f"{id_} ({error})" for id_, error in stats['errors'].items()))
     return collection
 
                                                
@@ -177,7 +157,8 @@ def main():
 
                                                           
     data = load_json()
-    collection = initialize_chroma(data)
+    collection = initialize_chroma()
+    lexical = load_lexical_index()
 
                                                      
     st.header("🔎 Effectuer une Recherche")
@@ -234,49 +215,31 @@ def main():
         st.info("🔍 Lancement de la recherche...")
         
                                   
-        question_emb = load_model().encode([question]).tolist()
-
-                                                                                                    
-                                                                                        
+        query_cache = load_query_cache()
+        question_emb = query_cache.embedding(question, lambda q: load_model().encode([q])[0])
+
+        # Filtres appliqués pendant la recherche, par ChromaDB comme par l'index lexical. Les codes exacts
+        # ("AZ-102", noms d'outils) sont trouvés par l'index lexical, fusionné avec la recherche vectorielle.
+        if choice == "Cours":
+            filters = dict(category="courses",
+                           level=None if selected_level == "Tous les niveaux" else selected_level,
+                           min_price=min_price, max_price=max_price)
+        else:
+            filters = dict(category="certificats")
         try:
-            results = collection.query(query_embeddings=question_emb, n_results=50)                                  
+            results = query_cache.results(question_emb, build_where(**filters), 10,
+                                          lambda: hybrid_search(collection, lexical, question, question_emb,
+                                                                n_results=10, **filters))
         except Exception as e:
             st.error(f"❌ Erreur lors de la recherche dans ChromaDB: {e}")
             return
 
-        found_items = []
-        if results and results['documents'] and results['metadatas']:
-            for doc_text, meta in zip(results['documents'][0], results['metadatas'][0]):
-                                                                              
-                                                                                    
-                meta_category = str(meta.get('category', '')).lower()
-                expected_category = ("courses" if choice == "Cours" else "certificats").lower()
-
-                if meta_category != expected_category:
-                    continue                                                                      
-
-                if choice == "Cours":
-                                         
-                    meta_level = str(meta.get('level', '')).lower()
-                    if selected_level != "Tous les niveaux":
-                                                                                                
-                        if selected_level.lower() != meta_level:
-                            continue
-
-                                       
-                    try:
-                        price = float(meta.get('current_price', 0.0))
-                    except (ValueError, TypeError):
-                        price = 0.0                                                          
-
-                    if not (min_price <= price <= max_price):
-                        continue
-                
-                                                                           
-                found_items.append(meta)
-        
-                                                                                 
-        found_items = found_items[:10]
+        found_items = results['metadatas']
+        cache_stats = query_cache.stats()
+        st.caption(f"⚡ Cache des requêtes : embeddings {cache_stats['embeddings']['hits']}/"
+                   f"{cache_stats['embeddings']['hits'] + cache_stats['embeddings']['misses']} trouvés, résultats "
+                   f"{cache_stats['results']['hits']}/{cache_stats['results']['hits'] + cache_stats['results']['misses']} "
+                   f"trouvés, {cache_stats['saved_seconds'] * 1000:.0f} ms économisées.")
 
         if found_items:
             st.success(f"✅ {len(found_items)} résultats pertinents trouvés avec vos critères :")
@@ -0,0 +1,328 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+
+import chromadb
+import numpy as np
+
+from crawl_scheduler import normalize_course_url
+from dataset_store import ensure_dataset, iter_dataset_records
+from embedding_cache import EmbeddingCache
+from record_stream import JsonlSink, iter_records
+
+COLLECTION_NAME = "courses_collection"
+MODEL_NAME = "all-MiniLM-L6-v2"
+MANIFEST_NAME = "index_manifest.json"
+PROGRESS_NAME = "index_progress.jsonl"
+# Cours encodés puis ajoutés à Chroma par lot : borne la mémoire d'une synchronisation
+DEFAULT_BATCH_SIZE = 256
+# Taille des lots de suppression envoyés à Chroma
+CHROMA_BATCH_SIZE = 1000
+
+
+def document_text(record):
+    """Texte indexé d'un cours : titre, description et "ce que vous apprendrez"."""
+    what_you_will_learn = record.get('what_you_will_learn')
+    if isinstance(what_you_will_learn, list):
+        what_you_will_learn = " ".join(map(str, what_you_will_learn))
+    return f"{record.get('title') or ''} {record.get('description') or ''} {what_you_will_learn or ''}"
+
+
+def course_metadata(record):
+    """Métadonnées Chroma d'un cours : valeurs scalaires uniquement (listes jointes, absents -> "")."""
+    meta = {}
+    for key, value in record.items():
+        if isinstance(value, (str, int, float, bool)):
+            meta[key] = value
+        elif isinstance(value, list):
+            meta[key] = " / ".join(map(str, value))
+        elif value is None:
+            meta[key] = ""
+    # Prix et note déjà normalisés par dataset_store.py (prix absent / gratuit -> 0.0)
+    meta['rating'] = record.get('rating') or 0.0
+    meta['current_price'] = record.get('price') or 0.0
+    for key in ('title', 'description', 'category', 'level', 'language', 'requirements', 'what_you_will_learn'):
+        meta[key] = str(meta.get(key, ''))
+    # Clés de filtrage normalisées : les prédicats `where` de Chroma sont sensibles à la casse
+    meta['category_key'] = filter_key(meta['category'])
+    meta['level_key'] = filter_key(meta['level'])
+    return meta
+
+
+def filter_key(value):
+    return str(value or '').strip().lower()
+
+
+def build_where(category=None, level=None, min_price=None, max_price=None):
+    """Prédicat `where` de Chroma pour une catégorie, un niveau et une fourchette de prix (None : pas de filtre)."""
+    clauses = []
+    if category is not None:
+        clauses.append({'category_key': filter_key(category)})
+    if level is not None:
+        clauses.append({'level_key': filter_key(level)})
+    if min_price is not None:
+        clauses.append({'current_price': {'$gte': float(min_price)}})
+    if max_price is not None:
+        clauses.append({'current_price': {'$lte': float(max_price)}})
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {'$and': clauses}
+
+
+def _distances(embeddings, query, space):
+    if space == 'cosine':
+        norms = np.linalg.norm(embeddings, axis=1) * np.linalg.norm(query)
+        return 1.0 - embeddings @ query / np.where(norms == 0, 1.0, norms)
+    if space == 'ip':
+        return 1.0 - embeddings @ query
+    return ((embeddings - query) ** 2).sum(axis=1)
+
+
+def filtered_query(collection, query_embedding, where=None, n_results=10):
+    """
+    Les `n_results` cours les plus proches parmi ceux qui vérifient `where`, filtrés par Chroma
+    pendant la recherche (et non après). Si l'index approché renvoie moins de résultats que
+    demandé alors que le filtre en admet davantage (filtre très sélectif), les cours admis sont
+    classés exactement par force brute. Renvoie les listes ids / documents / metadatas / distances.
+    """
+    results = collection.query(query_embeddings=[np.asarray(query_embedding).tolist()], n_results=n_results,
+                               where=where, include=['documents', 'metadatas', 'distances'])
+    found = {key: results[key][0] for key in ('ids', 'documents', 'metadatas', 'distances')}
+    if len(found['ids']) >= n_results or where is None:
+        return found
+    admitted = collection.get(where=where, include=['embeddings', 'documents', 'metadatas'])
+    if len(admitted['ids']) <= len(found['ids']):
+        return found
+    space = (collection.metadata or {}).get('hnsw:space', 'l2')
+    distances = _distances(np.asarray(admitted['embeddings'], dtype=np.float32),
+                           np.asarray(query_embedding, dtype=np.float32), space)
+    order = np.argsort(distances, kind='stable')[:n_results]
+    return {
+        'ids': [admitted['ids'][i] for i in order],
+        'documents': [admitted['documents'][i] for i in order],
+        'metadatas': [admitted['metadatas'][i] for i in order],
+        'distances': [float(distances[i]) for i in order],
+    }
+
+
+def content_hash(text, metadata):
+    return hashlib.sha1(json.dumps([text, metadata], sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def course_id(record, digest):
+    """Identifiant stable : URL normalisée du cours, ou empreinte du contenu s'il n'a pas d'URL."""
+    return normalize_course_url(record['url']) if record.get('url') else f"sha1:{digest}"
+
+
+def dataset_fingerprint(path):
+    stat = os.stat(path)
+    return {'path': os.path.abspath(path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+class IncrementalIndexer:
+    """
+    Index Chroma des cours tenu à jour de façon incrémentale : chaque cours a un identifiant
+    stable (URL normalisée) et une empreinte de son contenu, conservées dans un manifeste à côté
+    de la base. Une synchronisation n'encode que les cours nouveaux ou modifiés et supprime les
+    cours disparus ; si le jeu de données n'a pas changé depuis le manifeste, la collection
+    existante est rattachée sans relire les données ni charger le modèle.
+    """
+
+    def __init__(self, chroma_path, collection_name=COLLECTION_NAME, model_name=MODEL_NAME, manifest_path=None):
+        self.client = chromadb.PersistentClient(path=chroma_path)
+        self.collection_name = collection_name
+        self.model_name = model_name
+        self.manifest_path = manifest_path or os.path.join(chroma_path, MANIFEST_NAME)
+        self.progress_path = os.path.join(os.path.dirname(self.manifest_path), PROGRESS_NAME)
+
+    def load_manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return None
+        with open(self.manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def save_manifest(self, manifest):
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _existing_collection(self):
+        try:
+            return self.client.get_collection(self.collection_name)
+        except Exception:
+            return None
+
+    def attach(self, dataset_path=None):
+        """
+        Collection existante si elle correspond au manifeste (même modèle, même jeu de données,
+        même nombre de documents), sinon None : une synchronisation est alors nécessaire.
+        """
+        manifest = self.load_manifest()
+        if manifest is None or manifest.get('model') != self.model_name:
+            return None
+        if dataset_path is None or manifest.get('dataset') != dataset_fingerprint(dataset_path):
+            return None
+        collection = self._existing_collection()
+        if collection is None or collection.count() != len(manifest['entries']):
+            return None
+        return collection
+
+    def _indexed_hashes(self, collection):
+        """Empreintes déjà indexées : manifeste, ou métadonnées de la collection si le manifeste est perdu."""
+        manifest = self.load_manifest()
+        if manifest is not None and manifest.get('model') == self.model_name:
+            return dict(manifest['entries'])
+        existing = collection.get(include=['metadatas'])
+        return {id_: meta.get('content_hash', '') for id_, meta in zip(existing['ids'], existing['metadatas'])}
+
+    def _upsert(self, collection, batch, encode):
+        """
+        Encode et ajoute un lot de (id, texte, métadonnées). Un lot en échec est coupé en deux et
+        chaque moitié retentée, jusqu'à isoler les cours fautifs. Renvoie (ids ajoutés, échecs).
+        """
+        try:
+            ids, docs, metas = (list(column) for column in zip(*batch))
+            collection.upsert(ids=ids, documents=docs, embeddings=encode(docs).tolist(), metadatas=metas)
+            return ids, []
+        except Exception as e:
+            if len(batch) == 1:
+                return [], [(batch[0][0], e)]
+        middle = len(batch) // 2
+        done, failed = self._upsert(collection, batch[:middle], encode)
+        done_right, failed_right = self._upsert(collection, batch[middle:], encode)
+        return done + done_right, failed + failed_right
+
+    def sync(self, records, encode, dataset_path=None, batch_size=DEFAULT_BATCH_SIZE, on_progress=None):
+        """
+        Met la collection à jour à partir de `records` (itérable, lu une seule fois) : les cours
+        nouveaux ou modifiés sont encodés par `encode(textes)` (tableau numpy, une ligne par texte)
+        et ajoutés par lots de `batch_size`, seuls les identifiants et empreintes de tous les cours
+        restant en mémoire. Chaque lot ajouté est noté dans un fichier de progression : une
+        synchronisation interrompue reprend là où elle s'était arrêtée. Un cours en erreur est
+        ignoré (et retenté à la prochaine synchronisation) sans interrompre les autres.
+        `on_progress(statistiques)` est appelé après chaque lot. Renvoie (collection, statistiques).
+        """
+        t0 = time.perf_counter()
+        manifest = self.load_manifest()
+        if manifest is not None and manifest.get('model') != self.model_name and self._existing_collection():
+            # Autre modèle : dimensions et espace d'embeddings différents, on repart de zéro
+            self.client.delete_collection(self.collection_name)
+            if os.path.exists(self.progress_path):
+                os.remove(self.progress_path)
+        collection = self.client.get_or_create_collection(self.collection_name)
+        indexed = self._indexed_hashes(collection)
+        previous = dict(indexed)
+        # Lots déjà ajoutés par une synchronisation interrompue
+        if os.path.exists(self.progress_path):
+            for entry in iter_records(self.progress_path):
+                indexed[entry['id']] = entry['hash']
+        progress = JsonlSink(self.progress_path, fsync_every=batch_size, mode='a')
+
+        stats = {'added': 0, 'updated': 0, 'deleted': 0, 'unchanged': 0, 'failed': 0, 'seen': 0,
+                 'encode_seconds': 0.0, 'docs_per_sec': 0.0}
+        current, failures, batch = {}, {}, []
+
+        def flush():
+            t_batch = time.perf_counter()
+            done, failed = self._upsert(collection, batch, encode)
+            stats['encode_seconds'] += time.perf_counter() - t_batch
+            hashes = {id_: meta['content_hash'] for id_, _, meta in batch}
+            for id_ in done:
+                stats['updated' if id_ in previous else 'added'] += 1
+                indexed[id_] = hashes[id_]
+                progress.write({'id': id_, 'hash': hashes[id_]})
+            for id_, error in failed:
+                failures[id_] = error
+                stats['failed'] += 1
+                # L'ancienne version (s'il y en a une) reste indexée ; ce cours sera retenté
+                current[id_] = previous.get(id_)
+            encoded = stats['added'] + stats['updated']
+            stats['docs_per_sec'] = encoded / stats['encode_seconds'] if stats['encode_seconds'] > 0 else 0.0
+            batch.clear()
+            if on_progress is not None:
+                on_progress(dict(stats))
+
+        try:
+            for record in records:
+                stats['seen'] += 1
+                text = document_text(record)
+                meta = course_metadata(record)
+                digest = content_hash(text, meta)
+                id_ = course_id(record, digest)
+                current[id_] = digest
+                if indexed.get(id_) == digest:
+                    stats['unchanged'] += 1
+                    continue
+                batch.append((id_, text, dict(meta, content_hash=digest)))
+                if len(batch) >= batch_size:
+                    flush()
+            if batch:
+                flush()
+        finally:
+            progress.close()
+
+        removed = [id_ for id_ in indexed if id_ not in current]
+        for start in range(0, len(removed), CHROMA_BATCH_SIZE):
+            collection.delete(ids=removed[start:start + CHROMA_BATCH_SIZE])
+        stats['deleted'] = len(removed)
+        entries = {id_: digest for id_, digest in current.items() if digest is not None}
+
+        self.save_manifest({
+            'model': self.model_name,
+            'collection': self.collection_name,
+            # Avec des échecs, la prochaine ouverture refait une synchronisation (qui ne retentera qu'eux)
+            'dataset': dataset_fingerprint(dataset_path) if dataset_path and not failures else None,
+            'updated_at': time.time(),
+            'entries': entries,
+        })
+        os.remove(self.progress_path)
+        stats['seconds'] = time.perf_counter() - t0
+        stats['errors'] = {id_: f"{type(e).__name__}: {e}" for id_, e in list(failures.items())[:20]}
+        return collection, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Indexation incrémentale du jeu de données dans ChromaDB.")
+    parser.add_argument("dataset", help="Jeu de données (.arrow, ou .json / .jsonl converti par dataset_store).")
+    parser.add_argument("--chroma-path", default="./chromadb-tawilpfa-docs")
+    parser.add_argument("--model", default=MODEL_NAME)
+    parser.add_argument("--backend", choices=('torch', 'onnx'), default=None,
+                        help="Encodeur : PyTorch, ou ONNX quantifié int8 sur CPU (défaut : variable EMBEDDING_BACKEND, sinon torch).")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help="Cours encodés et ajoutés par lot (défaut : 256).")
+    args = parser.parse_args()
+
+    # Import local : le modèle n'est chargé que si des cours sont à encoder
+    from onnx_embedder import DEFAULT_BACKEND, embedder_id, load_encoder
+
+    backend = args.backend or DEFAULT_BACKEND
+    dataset_path = ensure_dataset(args.dataset)
+    indexer = IncrementalIndexer(args.chroma_path, model_name=embedder_id(args.model, backend))
+    if indexer.attach(dataset_path) is not None:
+        print("Index déjà à jour.")
+        return
+    cache = EmbeddingCache(embedder_id(args.model, backend))
+    model = []
+
+    def encode(docs):
+        if not model:
+            model.append(load_encoder(args.model, backend))
+        return cache.encode(docs, lambda texts: model[0].encode(texts, batch_size=args.batch_size))
+
+    def report(stats):
+        print(f"  {stats['seen']} cours lus, {stats['added'] + stats['updated']} encodés "
+              f"({stats['docs_per_sec']:.0f} docs/s), {stats['failed']} en erreur", end="\r")
+
+    _, stats = indexer.sync(iter_dataset_records(dataset_path), encode, dataset_path, args.batch_size, report)
+    print(f"\nIndex mis à jour en {stats['seconds']:.1f}s : {stats['added']} ajoutés, {stats['updated']} modifiés, "
+          f"{stats['deleted']} supprimés, {stats['unchanged']} inchangés, {stats['failed']} en erreur "
+          f"({stats['docs_per_sec']:.0f} docs/s).")
+    for id_, error in stats['errors'].items():
+        print(f"  ⚠️ {id_} : {error}")
+
+
+if __name__ == "__main__":
+    main()
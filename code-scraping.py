@@ -5,20 +5,39 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import (
     TimeoutException, WebDriverException, ElementClickInterceptedException, StaleElementReferenceException
 )
-from bs4 import BeautifulSoup
-import json
+from browser_pool import BrowserWorkerPool
+from crawl_state import CrawlStateStore
+from record_stream import JsonlSink, compact
+from udemy_extractors import DETAIL_FIELDS, empty_course_details, missing_fields, parse_course_details, parse_listing
+from http_fetcher import HttpPageFetcher, has_detail_markers
+from page_readiness import PageReadinessWaiter
+from pagination import page_url, plan_listing_pages
+from crawl_scheduler import CourseRegistry, topic_label, topic_search_url
+from rate_limit import HostRateLimiter
+from crawl_pipeline import CrawlPipeline
+from html_archive import ARCHIVE_ROOT, HtmlArchive
+from telemetry import Telemetry, timed
+from retry_policy import (
+    FATAL_HTTP_STATUSES, CircuitBreaker, DeadLetterQueue, HttpStatusError, RetryPolicy, load_dead_letters
+)
+from browser_pool_daemon import BrowserPoolClient
+from lean_fetch import DEFAULT_BLOCKED_TYPES, LeanFetchController, blocked_url_patterns
+import argparse
 import time
-import re
-import html
 import os
 
-def scrape_udemy_chatgpt_courses():
-    # URL pour la catégorie "ChatGPT"
-    BASE_SEARCH_URL = "https://www.udemy.com/topic/microsoft-ai-102/"
-    
-    
-    NUM_PAGES_TO_SCRAPE = 5
+DEFAULT_TOPICS = ["microsoft-ai-102"]
+CRAWL_STATE_PATH = "crawl_state.sqlite"
+DEAD_LETTERS_PATH = "dead_letters.jsonl"
+OUTPUT_JSONL_PATH = "udemy-microsoft AI.jsonl"
+OUTPUT_JSON_PATH = "udemy-microsoft AI.json"
 
+
+def build_chrome_options():
+    """
+    Construit les options Chrome. undetected_chromedriver refuse de réutiliser un même
+    objet ChromeOptions : il faut en créer un par navigateur lancé.
+    """
     options = uc.ChromeOptions()
     
     options.add_argument('--no-sandbox')
@@ -29,9 +48,277 @@ def scrape_udemy_chatgpt_courses():
     options.add_argument('--disable-extensions')
     options.add_argument('--log-level=3')
     options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36")
+    return options
+
+
+def create_driver(chromedriver_path, telemetry=None):
+    with timed(telemetry, 'driver_startup'):
+        return uc.Chrome(options=build_chrome_options(), driver_executable_path=chromedriver_path)
+
+
+def extract_details(page_html, url=None, telemetry=None):
+    """Extrait les champs d'une page de détails et affiche ceux qui n'ont pas été trouvés."""
+    with timed(telemetry, 'parse', 'detail'):
+        details = parse_course_details(page_html)
+    if telemetry is not None:
+        telemetry.record_fields(url, details)
+    missing = missing_fields(details)
+    found = len(DETAIL_FIELDS) - len(missing)
+    print(f"  -> {found}/{len(DETAIL_FIELDS)} champs extraits" + (f" (manquants : {', '.join(missing)})" if missing else "") + ".")
+    return details
+
+
+def scrape_course_details(driver, course_info, waiter, rate_limiter=None, lean=None, archive=None, telemetry=None):
+    """
+    Visite la page de détails d'un cours dans le navigateur et complète `course_info`.
+    Lève TimeoutException si la page ne se charge pas dans le délai imparti.
+    """
+    course_url = course_info['url']
+    if rate_limiter is not None:
+        rate_limiter.wait(course_url)
+    lean_mode = lean.prepare(driver, 'detail') if lean is not None else None
+    with timed(telemetry, 'navigation', 'detail'):
+        driver.get(course_url)
+    print("  -> URL demandée. Attente du chargement de l'élément d'inscription et autres sections.")
+    # Attendre que les sections utilisées par les extracteurs soient présentes (budget par page)
+    with timed(telemetry, 'ready', 'detail'):
+        ready_seconds = waiter.wait(driver, 'detail')
+    print(f"  -> Page de détails prête en {ready_seconds:.2f}s.")
+    if lean is not None:
+        lean.measure(driver, lean_mode, 'detail')
+
+    page_source = driver.page_source
+    if archive is not None:
+        archive.put(course_url, page_source, 'detail')
+    # Ajouter toutes les données extraites au dictionnaire course_info
+    course_info.update(extract_details(page_source, course_url, telemetry))
+    return course_info
+
+
+def visit_course(driver, course_info, position, total, waiter, on_result=None, rate_limiter=None, lean=None,
+                 archive=None, telemetry=None, retry=None):
+    """
+    Scrape un cours, en réessayant les erreurs transitoires selon `retry` (RetryPolicy).
+    `on_result(course_info, error)` est appelé dès que le cours est terminé (error vaut None
+    en cas de succès) ; un cours en échec définitif n'est pas complété avec des valeurs vides.
+    """
+    course_url = course_info['url']
+    print(f"\n--- Visiting Course {position}/{total}: {course_info.get('title', 'N/A')} ---")
+    print(f"  -> Navigating to: {course_url}")
+
+    def scrape():
+        return scrape_course_details(driver, course_info, waiter, rate_limiter, lean, archive, telemetry)
+
+    try:
+        retry.call(scrape, course_url) if retry is not None else scrape()
+        if on_result is not None:
+            on_result(course_info, None)
+        return course_info
+    except TimeoutException as e:
+        print(f"  -> L'un des éléments d'attente n'a pas été trouvé dans le délai imparti pour {course_url}. Le scraping des détails est annulé pour ce cours.")
+        error = e
+    except Exception as e:
+        print(f"  -> Une erreur s'est produite lors du traitement de la page de détails {course_url} : {e}. Skip ce cours.")
+        error = e
+    if on_result is not None:
+        on_result(course_info, error)
+    return course_info
+
+
+NEXT_BUTTON_SELECTORS = [
+    "a[aria-label='next page']",
+    "a[data-page='+1']",
+    "a[rel='next']",
+    "a[aria-label='Next page']", "button[aria-label='Next page']",
+    "a[aria-label='Page suivante']", "button[aria-label='Page suivante']", # Localisation française
+    "a[data-purpose='pagination-button-next']", "button[data-purpose='pagination-button-next']",
+    "a.pagination_next__aBqfT", # Classe spécifique si présente
+    "a:has(svg use[xlink:href='#icon-next'])", "button:has(svg use[xlink:href='#icon-next'])"
+]
+
+
+def scrape_listing_page(driver, url, page_num, page_count, waiter, rate_limiter=None, lean=None, archive=None,
+                        telemetry=None):
+    """
+    Charge une page de résultats dans le navigateur et renvoie (cartes, HTML).
+    En cas d'échec, renvoie ([], None) après avoir affiché la cause.
+    """
+    print(f"\n--- Scraping de la page de résultats {page_num}/{page_count} ---")
+    print(f"2. Navigation vers: {url}")
+    if rate_limiter is not None:
+        rate_limiter.wait(url)
+    lean_mode = lean.prepare(driver, 'listing') if lean is not None else None
+    with timed(telemetry, 'navigation', 'listing'):
+        driver.get(url)
+    print("URL demandée. Attente du chargement des cartes de cours.")
+
+    try:
+        print("   -> Attente de la présence des cartes de cours sur la page avec le nouveau sélecteur...")
+        with timed(telemetry, 'ready', 'listing'):
+            ready_seconds = waiter.wait(driver, 'listing')
+        print(f"   -> Cartes de cours détectées avec le nouveau sélecteur en {ready_seconds:.2f}s.")
+        if lean is not None:
+            lean.measure(driver, lean_mode, 'listing')
+
+        # --- Section pour gérer le pop-up "Ouvrir une application externe" ---
+        # Vérification immédiate : la page est déjà prête, inutile d'attendre un pop-up hypothétique
+        try:
+            cancel_buttons = driver.find_elements(By.XPATH, "//button[text()='Annuler'] | //button[text()='Cancel']")
+            if cancel_buttons:
+                cancel_buttons[0].click()
+                print("   -> Pop-up fermé en cliquant sur 'Annuler'.")
+        except Exception as e:
+            print(f"   -> Erreur lors de la gestion du pop-up : {e}")
+        # --- Fin de la section pop-up ---
+
+        print(f"3. URL actuellement affichée dans le navigateur: {driver.current_url}")
+
+        page_source = driver.page_source
+        if archive is not None:
+            archive.put(url, page_source, 'listing')
+        with timed(telemetry, 'parse', 'listing'):
+            course_cards = parse_listing(page_source)
+        if not course_cards:
+            print(f"Aucune carte de cours trouvée sur la page {page_num} avec le nouveau sélecteur. Cela peut indiquer la fin des résultats ou un problème de chargement.")
+            return [], page_source
+
+        print(f"Trouvé {len(course_cards)} cours sur la page de résultats {page_num}.")
+        return course_cards, page_source
+
+    except TimeoutException:
+        print(f"4. Pas de cartes de cours trouvées sur la page {page_num} dans le délai imparti.")
+    except Exception as e:
+        print(f"5. Une erreur inattendue s'est produite pendant le processus de la page {page_num}: {e}.")
+    return [], None
+
+
+def click_next_page(driver):
+    """
+    Repli quand le nombre de pages n'a pas pu être planifié : cherche et clique le bouton
+    "page suivante". Une seule attente couvre tous les sélecteurs candidats.
+    """
+    try:
+        next_button = WebDriverWait(driver, 10).until(
+            EC.any_of(*(EC.element_to_be_clickable((By.CSS_SELECTOR, selector)) for selector in NEXT_BUTTON_SELECTORS))
+        )
+        # Faire défiler et cliquer en utilisant JavaScript pour plus de robustesse
+        driver.execute_script("arguments[0].scrollIntoView(true);", next_button)
+        next_button.click()
+        print("   -> Bouton 'page suivante' cliqué avec succès.")
+        return True
+    except (TimeoutException, ElementClickInterceptedException, StaleElementReferenceException):
+        print("   -> Aucun bouton 'page suivante' trouvé ou cliquable. Fin de la pagination.")
+    except Exception as e:
+        print(f"   -> Erreur inattendue lors de la recherche du bouton 'page suivante' : {e}")
+    return False
+
+
+def collect_topic_courses(driver, base_search_url, max_pages, waiter, fetcher=None, rate_limiter=None, on_page=None,
+                          lean=None, archive=None, telemetry=None):
+    """
+    Parcourt les pages de résultats d'une recherche et renvoie ses cartes de cours (avec URL),
+    dans l'ordre des pages. Avec un `fetcher` HTTP, les pages planifiées sont d'abord
+    récupérées en parallèle, le navigateur ne servant que de repli. `on_page(cards)` est
+    appelé dès qu'une page est analysée, pour alimenter le pipeline sans attendre la fin.
+    """
+    listing_cards = {}
+
+    def add_page(page_num, cards):
+        valid_cards = []
+        for course_temp_info in cards:
+            if course_temp_info['url']:
+                valid_cards.append(course_temp_info)
+            else:
+                print(f"  - URL du cours non trouvée pour : {course_temp_info.get('title', 'N/A')}. Skip.")
+        listing_cards[page_num] = valid_cards
+        if on_page is not None and valid_cards:
+            on_page(valid_cards)
+
+    # --- Page 1 : ses cartes, et le total de résultats / la pagination pour planifier les suivantes ---
+    first_cards, first_html = scrape_listing_page(driver, base_search_url, 1, max_pages, waiter, rate_limiter, lean, archive, telemetry)
+    if first_cards:
+        add_page(1, first_cards)
+        plan = plan_listing_pages(base_search_url, first_html, max_pages, page_size=len(first_cards))
+        if plan.page_count is not None:
+            print(f"Pagination planifiée : {plan.page_count} page(s) de résultats ({plan.source}).")
+            remaining_pages = {n: url for n, url in enumerate(plan.urls, start=1) if n > 1}
+            if fetcher is not None and remaining_pages:
+                # Toutes les pages connues d'avance : on les récupère en parallèle
+                http_results = fetcher.fetch_all(remaining_pages.values())
+                if telemetry is not None:
+                    for result in http_results.values():
+                        telemetry.record_stage('http_fetch', result.elapsed, 'listing',
+                                               error=result.error or (None if result.ok else result.status))
+                for page_num, url in list(remaining_pages.items()):
+                    result = http_results.get(url)
+                    cards = parse_listing(result.html) if result is not None and result.ok else []
+                    if cards and archive is not None:
+                        archive.put(url, result.html, 'listing')
+                    if cards:
+                        print(f"Page de résultats {page_num} récupérée en HTTP.")
+                        add_page(page_num, cards)
+                        del remaining_pages[page_num]
+            for page_num, url in remaining_pages.items():
+                cards, _ = scrape_listing_page(driver, url, page_num, plan.page_count, waiter, rate_limiter, lean, archive, telemetry)
+                add_page(page_num, cards)
+        else:
+            # Repli : nombre de pages introuvable, on suit le bouton "page suivante"
+            print("Nombre de pages inconnu : repli sur la détection du bouton 'page suivante'.")
+            page_num = 1
+            while page_num < max_pages and click_next_page(driver):
+                page_num += 1
+                cards, _ = scrape_listing_page(driver, page_url(base_search_url, page_num), page_num, max_pages, waiter, rate_limiter, lean, archive, telemetry)
+                if not cards:
+                    break
+                add_page(page_num, cards)
+            if page_num >= max_pages:
+                print(f"   -> Nombre maximum de pages ({max_pages}) à scraper atteint. Arrêt de la pagination.")
+
+    return [card for page_num in sorted(listing_cards) for card in listing_cards[page_num]]
+
+
+def scrape_udemy_chatgpt_courses(topics=None, max_pages=5, num_workers=1, fetch_mode='browser', http_concurrency=8,
+                                 http_origin=None, rate_per_host=1.0, state_path=CRAWL_STATE_PATH, max_age_hours=None,
+                                 output_path=OUTPUT_JSONL_PATH, compact_path=OUTPUT_JSON_PATH, pipeline=False,
+                                 queue_size=32, lean=False, block_types=DEFAULT_BLOCKED_TYPES, block_patterns=(),
+                                 lean_baseline_pages=4, archive_root=ARCHIVE_ROOT, events_path=None, metrics_path=None,
+                                 metrics_port=None, max_attempts=3, backoff_base=2.0, breaker_error_rate=0.5,
+                                 breaker_window=20, breaker_cooldown=120.0, dead_letters_path=DEAD_LETTERS_PATH,
+                                 retry_dead_letters=False, pool_url=None):
+    """
+    Scrape les pages de résultats de chaque topic (slug ou URL de recherche) puis les pages de
+    détails des cours. Un cours présent sous plusieurs topics n'est visité qu'une fois et son
+    enregistrement porte la liste `topics` où il apparaît. Toutes les requêtes (navigateur et
+    HTTP) passent par une limite de `rate_per_host` requêtes/s par hôte.
+    Avec num_workers > 1, les pages de détails sont réparties sur un pool de navigateurs.
+    Avec fetch_mode='http', les pages de détails sont d'abord récupérées en HTTP ; seules celles
+    sans les marqueurs data-purpose attendus repassent par le navigateur.
+    L'état de chaque cours est conservé dans `state_path` (SQLite) : un crawl relancé saute les
+    cours déjà scrapés, retente ceux en échec, et re-scrape ceux plus vieux que `max_age_hours`.
+    Chaque cours est écrit dans `output_path` (JSONL) dès qu'il est terminé ; `compact_path`
+    (.json ou .parquet, None pour ne rien produire) est généré à partir de ce flux en fin de crawl.
+    Avec pipeline=True, les pages de détails sont traitées par `num_workers` consommateurs (chacun
+    avec son navigateur) pendant le parcours des pages de résultats, via une file de `queue_size` cours.
+    Avec lean=True, les navigateurs bloquent les requêtes `block_types` / `block_patterns` (images,
+    polices, vidéos, traceurs...) ; les `lean_baseline_pages` premières paires de pages de chaque type
+    alternent sans et avec blocage pour chiffrer le gain en octets et en temps de chargement.
+    Le HTML brut de chaque page est archivé (zstd, adressé par contenu) sous `archive_root`
+    (None pour désactiver), pour pouvoir ré-extraire les champs hors ligne avec html_archive.py.
+    La durée de chaque étape et les champs trouvés / manquants sont émis comme événements JSON dans
+    `events_path`, résumés en fin de run, et exportés au format Prometheus dans `metrics_path`
+    (fichier réécrit en fin de run) et/ou sur http://127.0.0.1:`metrics_port`/metrics pendant le run.
+    Les erreurs transitoires sont réessayées (`max_attempts`, délai exponentiel à gigue à partir de
+    `backoff_base` secondes) et un coupe-circuit met le crawl en pause quand plus de
+    `breaker_error_rate` des `breaker_window` dernières pages échouent. Les cours en échec définitif
+    vont dans `dead_letters_path` ; retry_dead_letters=True relance uniquement ces cours.
+    Avec `pool_url` (browser_pool_daemon.py), les navigateurs sont loués à un pool de sessions
+    Chrome déjà lancées au lieu d'être démarrés par ce run.
+    """
+    topics = topics or DEFAULT_TOPICS
 
     driver = None
-    all_courses_data = []
+    course_urls_to_visit = []
+    waiter = PageReadinessWaiter()
 
     
     chromedriver_path = "./chromedriver"
@@ -42,7 +329,10 @@ def scrape_udemy_chatgpt_courses():
     print(f"DEBUG: Le script s'attend à trouver 'chromedriver' à l'emplacement relatif : {chromedriver_path}")
     print(f"DEBUG: Chemin absolu calculé pour 'chromedriver' : {absolute_chromedriver_path}")
 
-    if not os.path.exists(absolute_chromedriver_path):
+    if pool_url:
+        # Les sessions sont lancées et vérifiées par le démon : pas de chromedriver local à contrôler
+        print(f"Sessions Chrome louées au démon {pool_url}.")
+    elif not os.path.exists(absolute_chromedriver_path):
         print(f"ERREUR CRITIQUE DE FICHIER: Le fichier '{absolute_chromedriver_path}' N'EXISTE PAS.")
         print("Veuillez vous assurer que 'chromedriver' est décompressé, exécutable, et placé dans le même dossier que le script.")
         print(f"Le dossier actuel du script est : {os.getcwd()}")
@@ -56,326 +346,189 @@ def scrape_udemy_chatgpt_courses():
         else:
             print(f"DEBUG: Le fichier '{absolute_chromedriver_path}' EST EXÉCUTABLE.")
 
+    # Relance des échecs : la liste est lue avant d'être réécrite, et le flux JSONL est complété
+    # (la compaction garde la dernière version de chaque URL)
+    dead_letter_courses = load_dead_letters(dead_letters_path) if retry_dead_letters else None
+    state = CrawlStateStore(state_path)
+    sink = JsonlSink(output_path, mode='a' if retry_dead_letters else 'w')
+    dead_letters = DeadLetterQueue(dead_letters_path)
+    breaker = CircuitBreaker(window=breaker_window, error_rate=breaker_error_rate, cooldown=breaker_cooldown)
+    retry = RetryPolicy(max_attempts=max_attempts, base_delay=backoff_base, breaker=breaker)
+    # Une seule limite de débit par hôte, partagée par le navigateur et le client HTTP
+    rate_limiter = HostRateLimiter(rate_per_host=rate_per_host)
+    archive = HtmlArchive(archive_root) if archive_root else None
+    telemetry = Telemetry(events_path)
+    metrics_server = telemetry.serve_prometheus(metrics_port) if metrics_port else None
+    lean_fetch = LeanFetchController(blocked_url_patterns(block_types, block_patterns), lean_baseline_pages) if lean else None
+    fetcher = HttpPageFetcher(concurrency=http_concurrency, origin=http_origin, rate_limiter=rate_limiter) if fetch_mode == 'http' else None
+
+    pool_client = BrowserPoolClient(pool_url, job=",".join(topics)) if pool_url else None
+
+    def new_driver():
+        if pool_client is not None:
+            with timed(telemetry, 'driver_lease'):
+                return pool_client.lease()
+        return create_driver(chromedriver_path, telemetry)
+
+    def on_result(course_info, error=None):
+        with telemetry.stage('write', 'detail'):
+            if error is None:
+                state.mark_done(course_info['url'], course_info)
+                sink.write(course_info)
+            else:
+                state.mark_failed(course_info['url'], error)
+                dead_letters.add(course_info, error)
+        telemetry.count('courses_ok' if error is None else 'courses_failed')
+
     try:
         print("1. Lancement du navigateur Chrome avec undetected_chromedriver...")
-        driver = uc.Chrome(options=options, driver_executable_path=chromedriver_path)
+        driver = new_driver()
         print("Navigateur lancé avec succès.")
 
-        course_urls_to_visit = []
-        for page_num in range(1, NUM_PAGES_TO_SCRAPE + 1):
-            # L'URL de base pour la première page, avec paramètre p pour les pages suivantes
-            current_page_url = BASE_SEARCH_URL if page_num == 1 else f"{BASE_SEARCH_URL}?p={page_num}"
-
-            print(f"\n--- Scraping de la page de résultats {page_num}/{NUM_PAGES_TO_SCRAPE} ---")
-            print(f"2. Navigation vers: {current_page_url}")
-            driver.get(current_page_url)
-            print("URL demandée. Attente du chargement des cartes de cours (environ 25 seconds).")
-            time.sleep(25) # Donnez un peu plus de temps pour le chargement initial
-
-            # --- Section pour gérer le pop-up "Ouvrir une application externe" ---
+        registry = CourseRegistry()
+        max_age_seconds = max_age_hours * 3600 if max_age_hours is not None else None
+
+        def reuse_if_fresh(course_info):
+            """Reprise : réutilise un cours déjà scrapé et encore frais (renvoie True), sans le revisiter."""
+            if state.should_fetch(course_info['url'], max_age_seconds):
+                return False
+            stored = state.get(course_info['url'])['record'] or {}
+            course_info.update({k: stored.get(k, v) for k, v in empty_course_details().items()})
+            sink.write(course_info)
+            telemetry.count('courses_reused')
+            return True
+
+        if pipeline and dead_letter_courses is None:
+            # --- Pipeline : les pages de détails sont traitées pendant le parcours des pages de résultats ---
+            def consume(lazy_driver, item):
+                position, course_info = item
+                if fetcher is not None:
+                    breaker.before_call()
+                    result = fetcher.fetch(course_info['url'])
+                    telemetry.record_stage('http_fetch', result.elapsed, 'detail',
+                                           error=result.error or (None if result.ok else result.status))
+                    # Une réponse sans les sections attendues (page de challenge) compte comme un échec
+                    breaker.record(result.ok and has_detail_markers(result.html))
+                    if result.status in FATAL_HTTP_STATUSES:
+                        on_result(course_info, HttpStatusError(result.status))
+                        return
+                    if result.ok and has_detail_markers(result.html):
+                        print(f"\n--- Cours (HTTP) : {course_info.get('title', 'N/A')} ---")
+                        if archive is not None:
+                            archive.put(course_info['url'], result.html, 'detail')
+                        course_info.update(extract_details(result.html, course_info['url'], telemetry))
+                        on_result(course_info)
+                        return
+                try:
+                    worker_driver = lazy_driver.get()
+                except Exception as e:
+                    # Navigateur impossible à lancer : le cours part dans la liste d'échecs au lieu d'être perdu
+                    print(f"\n--- Cours ignoré, navigateur indisponible : {course_info.get('title', 'N/A')} ({e}) ---")
+                    on_result(course_info, e)
+                    return
+                visit_course(worker_driver, course_info, position, '?', waiter, on_result, rate_limiter, lean_fetch, archive, telemetry, retry)
+
+            pipe = CrawlPipeline(consume, new_driver,
+                                 num_consumers=num_workers, queue_size=queue_size)
+
+            def submit_new_courses(cards, label):
+                for card in cards:
+                    course_info = registry.add(card, label)
+                    if course_info is None:
+                        continue
+                    course_urls_to_visit.append(course_info)
+                    if not reuse_if_fresh(course_info):
+                        pipe.submit((len(course_urls_to_visit), course_info))
+
+            pipe.start()
             try:
-                print("   -> Tentative de gérer le pop-up 'Ouvrir une application externe'...")
-                cancel_button = WebDriverWait(driver, 5).until(
-                    EC.element_to_be_clickable((By.XPATH, "//button[text()='Annuler'] | //button[text()='Cancel']"))
-                )
-                cancel_button.click()
-                print("   -> Pop-up fermé en cliquant sur 'Annuler'.")
-            except TimeoutException:
-                print("   -> Pas de pop-up 'Ouvrir une application externe' détecté ou géré dans le délai.")
-            except Exception as e:
-                print(f"   -> Erreur lors de la gestion du pop-up : {e}")
-            # --- Fin de la section pop-up ---
-
-
-            print(f"3. URL actuellement affichée dans le navigateur: {driver.current_url}")
-
-            try:
-                print("   -> Attente de la présence des cartes de cours sur la page avec le nouveau sélecteur...")
-                WebDriverWait(driver, 30).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, "div[data-purpose='container']"))
-                )
-                print("   -> Cartes de cours détectées avec le nouveau sélecteur.")
-
-                page_source = driver.page_source
-                soup = BeautifulSoup(page_source, 'html.parser')
-
-                course_cards = soup.find_all('div', {'data-purpose': 'container'})
-
-                if not course_cards:
-                    print(f"Aucune carte de cours trouvée sur la page {page_num} avec le nouveau sélecteur. Cela peut indiquer la fin des résultats ou un problème de chargement.")
-                    break
-
-                print(f"Trouvé {len(course_cards)} cours sur la page de résultats {page_num}.")
-
-                for i, card_soup in enumerate(course_cards):
-                    course_temp_info = {}
-
-                    title_link_element = card_soup.select_one('h3[data-purpose="course-title-url"] a')
-
-                    if title_link_element:
-                        # Créer une copie de l'élément pour supprimer le div SEO caché avant d'extraire le texte
-                        title_soup_copy = BeautifulSoup(str(title_link_element), 'html.parser')
-                        hidden_seo_div = title_soup_copy.find('div', class_='ud-sr-only')
-                        if hidden_seo_div:
-                            hidden_seo_div.decompose() # Supprimer le div caché
-
-                        course_temp_info['title'] = title_soup_copy.get_text(strip=True)
-                        # S'assurer que l'URL est absolue
-                        course_temp_info['url'] = "https://www.udemy.com" + title_link_element['href'] if title_link_element.get('href') and title_link_element['href'].startswith('/') else title_link_element['href']
-                    else:
-                        course_temp_info['title'] = None
-                        course_temp_info['url'] = None
-
-                    if course_temp_info['url']:
-                        course_urls_to_visit.append(course_temp_info)
-                    else:
-                        print(f"  - URL du cours non trouvée pour : {course_temp_info.get('title', 'N/A')}. Skip.")
-
-                # --- PARTIE POUR GÉRER LA PAGINATION (PASSER À LA PAGE SUIVANTE) ---
-                if page_num < NUM_PAGES_TO_SCRAPE: # Si ce n'est pas la dernière page que nous voulons scraper
-                    # Sélecteurs potentiels pour le bouton "page suivante"
-                    next_button_selectors = [
-                        "a[aria-label='next page']",
-                        "a[data-page='+1']",
-                        "a[rel='next']",
-                        "a[aria-label='Next page']", "button[aria-label='Next page']",
-                        "a[aria-label='Page suivante']", "button[aria-label='Page suivante']", # Localisation française
-                        "a[data-purpose='pagination-button-next']", "button[data-purpose='pagination-button-next']",
-                        "a.pagination_next__aBqfT", # Classe spécifique si présente
-                        "a:has(svg use[xlink:href='#icon-next'])", "button:has(svg use[xlink:href='#icon-next'])"
-                    ]
-                    
-                    next_button_found = False
-                    for selector in next_button_selectors:
-                        try:
-                            print(f"   -> Tentative de trouver le bouton 'page suivante' avec le sélecteur : '{selector}'")
-                            next_button = WebDriverWait(driver, 10).until(
-                                EC.element_to_be_clickable((By.CSS_SELECTOR, selector))
-                            )
-                            # Faire défiler et cliquer en utilisant JavaScript pour plus de robustesse
-                            driver.execute_script("arguments[0].scrollIntoView(true);", next_button)
-                            time.sleep(1) # Petit délai après le scroll
-                            next_button.click()
-                            print(f"   -> Bouton 'page suivante' cliqué avec succès via le sélecteur '{selector}'. Attente du chargement de la nouvelle page.")
-                            time.sleep(5) # Laisser le temps à la nouvelle page de se charger
-                            next_button_found = True
-                            break # Sortir de la boucle si le bouton est trouvé et cliqué
-                        except (TimeoutException, ElementClickInterceptedException, StaleElementReferenceException):
-                            # Essayer le sélecteur suivant si l'actuel échoue
-                            continue 
-                        except Exception as e:
-                            print(f"   -> Erreur inattendue avec le sélecteur '{selector}': {e}")
-                            continue
-
-                    if not next_button_found:
-                        print(f"   -> Aucun bouton 'page suivante' trouvé ou cliquable pour passer à la page {page_num + 1} après toutes les tentatives. Fin de la pagination.")
-                        break # Arrêter si aucun bouton suivant n'est trouvé
-                else:
-                    print(f"   -> Nombre maximum de pages ({NUM_PAGES_TO_SCRAPE}) à scraper atteint. Arrêt de la pagination.")
-
-            except TimeoutException:
-                print(f"4. Pas de cartes de cours trouvées sur la page {page_num} dans le délai imparti. Arrêt du scraping des pages de résultats.")
-                break
-            except Exception as e:
-                print(f"5. Une erreur inattendue s'est produite pendant le processus de la page {page_num}: {e}. Arrêt du scraping des pages de résultats.")
-                break
-
-        print(f"\nDébut du scraping des pages de détails pour {len(course_urls_to_visit)} cours pour l'extraction du nombre d'étudiants, des objectifs, de la description, du prix, des exigences, de la langue et du rating.")
-        for i, course_info in enumerate(course_urls_to_visit):
-            course_url = course_info['url']
-            print(f"\n--- Visiting Course {i+1}/{len(course_urls_to_visit)}: {course_info.get('title', 'N/A')} ---")
-            print(f"  -> Navigating to: {course_url}")
-
-            # Initialiser les variables pour les informations détaillées
-            students_enrolled = None
-            what_you_will_learn = []
-            description_text = None
-            current_price = None
-            original_price = None
-            discount_percentage = None
-            requirements = []
-            course_language = None
-            rating = None
-
-            try:
-                driver.get(course_url)
-                print("  -> URL demandée. Attente du chargement de l'élément d'inscription et autres sections.")
-                # Attendre qu'un élément clé de la page de détails soit présent
-                WebDriverWait(driver, 20).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, "div[data-purpose='enrollment']"))
-                )
-                time.sleep(5) # Un petit délai supplémentaire après l'attente explicite pour tout contenu dynamique
-
-                detail_soup = BeautifulSoup(driver.page_source, 'html.parser')
-
-                # --- Extraction du nombre d'étudiants inscrits ---
-                # The provided outerHTML for rating also contains the enrollment div
-                enrollment_div = detail_soup.find('div', {'data-purpose': 'enrollment'})
-                if enrollment_div:
-                    enrollment_text = enrollment_div.get_text(strip=True)
-                    cleaned_enrollment_text = re.sub(r'[^\d]', '', enrollment_text) # Supprimer les caractères non numériques
-                    try:
-                        students_enrolled = int(cleaned_enrollment_text)
-                        print(f"  -> Nombre d'étudiants trouvé : {students_enrolled}")
-                    except ValueError:
-                        print(f"  -> Impossible de convertir '{enrollment_text}' en nombre d'étudiants.")
-                        students_enrolled = None
-                else:
-                    print("  -> Div 'data-purpose=\"enrollment\"' non trouvé dans le HTML.")
-
-                # --- Extraction de la langue du cours ---
-                language_div = detail_soup.find('div', {'data-purpose': 'lead-course-locale'})
-                if language_div:
-                    course_language = language_div.get_text(strip=True)
-                    # Supprimer "Course Language" si c'est préfixé (peut être ajouté par aria-label)
-                    course_language = course_language.replace('Course Language', '').strip() 
-                    print(f"  -> Langue du cours trouvée : {course_language}")
-                else:
-                    print("  -> Langue du cours non trouvée (div 'data-purpose=\"lead-course-locale\"' manquant).")
-
-                # --- Extraction du Rating ---
-                rating_span = detail_soup.find('span', {'data-purpose': 'rating-number'})
-                if rating_span:
-                    rating = rating_span.get_text(strip=True)
-                    print(f"  -> Rating trouvé : {rating}")
-                else:
-                    print("  -> Rating non trouvé (span 'data-purpose=\"rating-number\"' manquant).")
-
-
-                # --- Extraction de "What you'll learn" ---
-                learn_section = detail_soup.find('div', class_='what-you-will-learn--what-will-you-learn--jsm83')
-                if learn_section:
-                    # CORRECTED LINE: Pass multiple classes as a list to class_
-                    objectives_list_ul = learn_section.find('ul', class_=['ud-unstyled-list', 'what-you-will-learn--objectives-list--qsvE2'])
-                    if objectives_list_ul:
-                        # Itérer sur les li, puis trouver le div contenant le texte de l'objectif
-                        for item in objectives_list_ul.find_all('li'): # Find all 'li' elements directly
-                            # The text is typically within a div with class 'ud-block-list-item-content'
-                            content_div = item.find('div', class_='ud-block-list-item-content')
-                            if content_div:
-                                what_you_will_learn.append(content_div.get_text(strip=True))
-                        print(f"  -> Objectifs d'apprentissage trouvés : {len(what_you_will_learn)} éléments.")
-                    else:
-                        print("  -> Liste des objectifs (ul.what-you-will-learn--objectives-list) non trouvée.")
-                else:
-                    print("  -> Section 'What you'll learn' (div.what-you-will-learn--what-will-you-learn) non trouvée.")
-
-
-                # --- Extraction de la "Description" ---
-                description_div = detail_soup.find('div', {'data-purpose': 'course-description'})
-                if description_div:
-                    description_content_div = description_div.find('div', {'data-purpose': 'safely-set-inner-html:description:description'})
-                    if description_content_div:
-                        # Extraire tout le texte des balises pertinentes dans la description
-                        all_text_elements = description_content_div.find_all(['p', 'li', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'span', 'div'])
-                        description_parts = []
-                        for elem in all_text_elements:
-                            text = elem.get_text(strip=True)
-                            if text:
-                                description_parts.append(text)
-                        description_text = "\n\n".join(description_parts)
-                        
-                        # Supprimer la section "Who this course is for:" si elle est involontairement incluse
-                        if description_text and "Who this course is for:" in description_text:
-                            description_text = description_text.split("Who this course is for:")[0].strip()
-
-                        print(f"  -> Description trouvée (longueur : {len(description_text) if description_text else 0}).")
-                    else:
-                        print("  -> Contenu de la description non trouvé dans data-purpose='course-description'.")
-                else:
-                    print("  -> Section 'Description' (div data-purpose='course-description') non trouvée.")
-
-
-                # --- Extraction des "Requirements" ---
-                # Rechercher le h2 avec data-purpose="requirements-title" puis son ul frère
-                requirements_section_title = detail_soup.find('h2', {'data-purpose': 'requirements-title'})
-                if requirements_section_title:
-                    requirements_list_ul = requirements_section_title.find_next_sibling('ul', class_='ud-unstyled-list')
-                    if requirements_list_ul:
-                        for item in requirements_list_ul.find_all('div', class_='ud-block-list-item-content'):
-                            req_text = item.get_text(strip=True)
-                            if req_text:
-                                requirements.append(req_text)
-                        print(f"  -> Exigences trouvées : {len(requirements)} éléments.")
-                    else:
-                        print("  -> Liste des exigences (ul.ud-unstyled-list) non trouvée après le titre.")
-                else:
-                    print("  -> Titre de la section 'Requirements' (h2 data-purpose='requirements-title') non trouvé.")
-
-
-                # --- Extraction du Prix ---
-                price_container = detail_soup.find('div', {'data-purpose': 'price-text-container'})
-                if price_container:
-                    current_price_element = price_container.find('div', {'data-purpose': 'course-price-text'})
-                    if current_price_element:
-                        current_price = current_price_element.get_text(strip=True)
-                        # Nettoyer la chaîne de prix (supprimer les symboles de devise, garder les chiffres et la décimale, convertir la virgule en point)
-                        current_price = re.sub(r'[^\d.,]+', '', current_price).replace(',', '.')
-                        print(f"  -> Prix actuel trouvé : {current_price}")
-                    else:
-                        print("  -> Élément de prix actuel non trouvé.")
-
-                    original_price_element = price_container.find('div', {'data-purpose': 'course-old-price-text'})
-                    if original_price_element:
-                        original_price = original_price_element.get_text(strip=True)
-                        original_price = re.sub(r'[^\d.,]+', '', original_price).replace(',', '.')
-                        print(f"  -> Prix original trouvé : {original_price}")
-                    else:
-                        print("  -> Élément de prix original non trouvé.")
-
-                    discount_element = price_container.find('div', {'data-purpose': 'discount-percentage'})
-                    if discount_element:
-                        discount_percentage = discount_element.get_text(strip=True)
-                        print(f"  -> Pourcentage de réduction trouvé : {discount_percentage}")
-                    else:
-                        print("  -> Élément de pourcentage de réduction non trouvé.")
+                for topic_num, topic in enumerate(topics, start=1):
+                    label = topic_label(topic)
+                    print(f"\n===== Topic {topic_num}/{len(topics)} : {label} =====")
+                    collect_topic_courses(driver, topic_search_url(topic), max_pages, waiter, fetcher, rate_limiter,
+                                          on_page=lambda cards, label=label: submit_new_courses(cards, label),
+                                          lean=lean_fetch, archive=archive, telemetry=telemetry)
+            finally:
+                pipe.close_and_drain()
+            # Un cours déjà écrit peut avoir été retrouvé sous un autre topic : on réécrit sa version
+            # complète (la compaction ne garde que la dernière version de chaque URL)
+            for url in registry.retagged:
+                course_info = registry.get(url)
+                if 'students_enrolled' in course_info:
+                    sink.write(course_info)
+            browser_queue = []
+        elif dead_letter_courses is not None:
+            print(f"\nRelance de {len(dead_letter_courses)} cours en échec lus dans {dead_letters_path}.")
+            course_urls_to_visit.extend(dead_letter_courses)
+            browser_queue = list(dead_letter_courses)
+        else:
+            # --- Pages de résultats de chaque topic, avec déduplication des cours entre topics ---
+            for topic_num, topic in enumerate(topics, start=1):
+                label = topic_label(topic)
+                print(f"\n===== Topic {topic_num}/{len(topics)} : {label} =====")
+                cards = collect_topic_courses(driver, topic_search_url(topic), max_pages, waiter, fetcher, rate_limiter,
+                                              lean=lean_fetch, archive=archive, telemetry=telemetry)
+                new_courses = sum(1 for card in cards if registry.add(card, label))
+                print(f"  -> {len(cards)} cours pour '{label}', dont {new_courses} nouveaux ({len(cards) - new_courses} déjà vus sur un autre topic).")
+            course_urls_to_visit.extend(registry.courses)
+
+            print(f"\nDébut du scraping des pages de détails pour {len(course_urls_to_visit)} cours pour l'extraction du nombre d'étudiants, des objectifs, de la description, du prix, des exigences, de la langue et du rating.")
+            pending_courses = [course_info for course_info in course_urls_to_visit if not reuse_if_fresh(course_info)]
+            print(f"  -> {len(course_urls_to_visit) - len(pending_courses)} cours déjà à jour dans {state_path}, {len(pending_courses)} à scraper.")
+            browser_queue = list(pending_courses)
+
+        if registry.duplicates:
+            print(f"\n{registry.duplicates} doublon(s) entre topics ignoré(s) : chaque cours n'a été visité qu'une fois.")
+
+        total = len(browser_queue)
+        if fetch_mode == 'http' and browser_queue:
+            # Mode HTTP : une requête par cours, le navigateur ne sert que de repli
+            print(f"Récupération HTTP de {total} pages de détails ({http_concurrency} requêtes simultanées max)...")
+            t0 = time.perf_counter()
+            http_results = fetcher.fetch_all(course['url'] for course in browser_queue)
+            for result in http_results.values():
+                telemetry.record_stage('http_fetch', result.elapsed, 'detail',
+                                       error=result.error or (None if result.ok else result.status))
+                breaker.record(result.ok and has_detail_markers(result.html))
+            print(f"  -> {len(http_results)} réponses HTTP reçues en {time.perf_counter() - t0:.1f}s.")
+            pending_courses, browser_queue = browser_queue, []
+            for course_info in pending_courses:
+                result = http_results.get(course_info['url'])
+                if result is not None and result.ok and has_detail_markers(result.html):
+                    print(f"\n--- Cours (HTTP) : {course_info.get('title', 'N/A')} ---")
+                    if archive is not None:
+                        archive.put(course_info['url'], result.html, 'detail')
+                    course_info.update(extract_details(result.html, course_info['url'], telemetry))
+                    on_result(course_info)
+                elif result is not None and result.status in FATAL_HTTP_STATUSES:
+                    # Page supprimée : inutile de la repasser dans le navigateur
+                    on_result(course_info, HttpStatusError(result.status))
                 else:
-                    print("  -> Conteneur de prix non trouvé.")
-
-
-                # Ajouter toutes les données extraites au dictionnaire course_info
-                course_info['students_enrolled'] = students_enrolled
-                course_info['what_you_will_learn'] = what_you_will_learn
-                course_info['description'] = description_text
-                course_info['current_price'] = current_price
-                course_info['original_price'] = original_price
-                course_info['discount_percentage'] = discount_percentage
-                course_info['requirements'] = requirements
-                course_info['course_language'] = course_language
-                course_info['rating'] = rating
-
-                all_courses_data.append(course_info)
-
-            except TimeoutException:
-                print(f"  -> L'un des éléments d'attente n'a pas été trouvé dans le délai imparti pour {course_url}. Le scraping des détails est annulé pour ce cours.")
-                # S'assurer que toutes les clés sont présentes même en cas d'erreur pour la cohérence
-                course_info.update({
-                    'students_enrolled': None,
-                    'what_you_will_learn': [],
-                    'description': None,
-                    'current_price': None,
-                    'original_price': None,
-                    'discount_percentage': None,
-                    'requirements': [],
-                    'course_language': None,
-                    'rating': None
-                })
-                all_courses_data.append(course_info)
-            except Exception as e:
-                print(f"  -> Une erreur s'est produite lors du traitement de la page de détails {course_url} : {e}. Skip ce cours.")
-                # S'assurer que toutes les clés sont présentes même en cas d'erreur pour la cohérence
-                course_info.update({
-                    'students_enrolled': None,
-                    'what_you_will_learn': [],
-                    'description': None,
-                    'current_price': None,
-                    'original_price': None,
-                    'discount_percentage': None,
-                    'requirements': [],
-                    'course_language': None,
-                    'rating': None
-                })
-                all_courses_data.append(course_info)
+                    browser_queue.append(course_info)
+            print(f"  -> {total - len(browser_queue)} cours extraits en HTTP, {len(browser_queue)} à repasser dans le navigateur.")
+
+        if num_workers > 1 and len(browser_queue) > 1:
+            print(f"Mode pool : {num_workers} navigateurs en parallèle.")
+            # Le navigateur déjà ouvert pour les pages de résultats sert de premier worker.
+            warm_drivers = [driver]
+            driver = None
+
+            def driver_factory():
+                return warm_drivers.pop() if warm_drivers else new_driver()
+
+            pool = BrowserWorkerPool(driver_factory, num_workers=num_workers)
+            results = pool.map(
+                lambda worker_driver, item: visit_course(worker_driver, item[1], item[0], len(browser_queue), waiter, on_result, rate_limiter, lean_fetch, archive, telemetry, retry),
+                enumerate(browser_queue, start=1)
+            )
+            for course_info, record in zip(browser_queue, results):
+                if record is None:
+                    # Cours jamais traité (aucun worker disponible) : il part dans la liste d'échecs
+                    on_result(course_info, WebDriverException("aucun navigateur disponible"))
+            pool.report()
+        else:
+            for i, course_info in enumerate(browser_queue):
+                visit_course(driver, course_info, i + 1, len(browser_queue), waiter, on_result, rate_limiter, lean_fetch, archive, telemetry, retry)
 
     except WebDriverException as e:
         print(f"\nERREUR CRITIQUE DE SELENIUM/CHROMEDRIVER: {e}")
@@ -388,14 +541,134 @@ def scrape_udemy_chatgpt_courses():
         if driver:
             print("\n6. Fermeture du navigateur.")
             driver.quit()
-
-    if all_courses_data:
-        json_filename = "udemy-microsoft AI.json" # Changed filename
-        with open(json_filename, "w", encoding="utf-8") as f:
-            json.dump(all_courses_data, f, ensure_ascii=False, indent=4)
-        print(f"\nScraping terminé. {len(all_courses_data)} cours (titre, URL, nombre d'étudiants, objectifs, description, prix, exigences, langue, rating) sauvegardés dans {json_filename}")
+        waiter.stats.report()
+        if lean_fetch is not None:
+            lean_fetch.stats.report()
+        print(f"État du crawl ({state_path}) : {state.counts()}")
+        print(f"Attente cumulée imposée par la limite de débit : {rate_limiter.waited_seconds:.1f}s.")
+        print(f"Réessais : {retry.retries}, coupe-circuit déclenché {breaker.trips} fois ({breaker.paused_seconds:.0f}s de pause).")
+        if dead_letters.count:
+            print(f"{dead_letters.count} cours en échec définitif listés dans {dead_letters_path} "
+                  f"(à relancer avec --retry-dead-letters).")
+        state.close()
+        sink.close()
+        dead_letters.close()
+        if fetcher is not None:
+            fetcher.close()
+        telemetry.report()
+        if metrics_path:
+            telemetry.write_prometheus(metrics_path)
+            print(f"Métriques Prometheus écrites dans {metrics_path}")
+        if metrics_server is not None:
+            metrics_server.shutdown()
+        telemetry.close()
+        if archive is not None:
+            print(f"Archive HTML ({archive_root}) : {archive.stored} nouvelles pages, {archive.deduplicated} contenus déjà archivés.")
+            archive.close()
+
+    if sink.count:
+        print(f"\nScraping terminé. {sink.count} cours (titre, URL, nombre d'étudiants, objectifs, description, prix, exigences, langue, rating) sauvegardés au fil de l'eau dans {output_path}")
+        if compact_path:
+            compact(output_path, compact_path)
+            print(f"Fichier compacté écrit dans {compact_path}")
     else:
         print("\nAucun cours n'a pu être scrapé. Veuillez revoir les messages d'erreur ci-dessus.")
 
 if __name__ == "__main__":
-    scrape_udemy_chatgpt_courses()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Scraping des cours Udemy d'un ou plusieurs topics.")
+    parser.add_argument("topics", nargs="*", default=DEFAULT_TOPICS,
+                        help=f"Slugs de topics ou URLs de recherche Udemy (défaut : {' '.join(DEFAULT_TOPICS)}).")
+    parser.add_argument("--topics-file", default=None,
+                        help="Fichier listant un topic ou une URL de recherche par ligne (s'ajoute aux topics donnés).")
+    parser.add_argument("--max-pages", type=int, default=5,
+                        help="Nombre maximal de pages de résultats par topic (défaut : 5).")
+    parser.add_argument("--rate-per-host", type=float, default=1.0,
+                        help="Requêtes par seconde autorisées par hôte, navigateur et HTTP confondus (défaut : 1).")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Nombre de navigateurs en parallèle pour les pages de détails (défaut : 1).")
+    parser.add_argument("--fetch-mode", choices=["browser", "http"], default="browser",
+                        help="'http' : pages de détails récupérées sans navigateur, avec repli sur Chrome.")
+    parser.add_argument("--http-concurrency", type=int, default=8,
+                        help="Nombre maximal de requêtes HTTP simultanées (défaut : 8).")
+    parser.add_argument("--http-origin", default=None,
+                        help="Origine à substituer à https://www.udemy.com (ex : serveur local de pages sauvegardées).")
+    parser.add_argument("--state-db", default=CRAWL_STATE_PATH,
+                        help=f"Base SQLite de l'état du crawl, pour reprendre un crawl interrompu (défaut : {CRAWL_STATE_PATH}).")
+    parser.add_argument("--max-age-hours", type=float, default=None,
+                        help="Re-scraper les cours scrapés il y a plus de N heures (défaut : jamais).")
+    parser.add_argument("--output", default=OUTPUT_JSONL_PATH,
+                        help=f"Fichier JSONL écrit au fil du crawl (défaut : {OUTPUT_JSONL_PATH}).")
+    parser.add_argument("--compact", default=OUTPUT_JSON_PATH,
+                        help="Fichier final .json ou .parquet généré depuis le JSONL ('' pour aucun).")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="Traiter les pages de détails pendant le parcours des pages de résultats.")
+    parser.add_argument("--queue-size", type=int, default=32,
+                        help="Taille de la file entre pages de résultats et pages de détails en mode pipeline (défaut : 32).")
+    parser.add_argument("--lean", action="store_true",
+                        help="Bloquer dans le navigateur les ressources inutiles à l'extraction (images, polices, vidéos, traceurs).")
+    parser.add_argument("--block-types", default=",".join(DEFAULT_BLOCKED_TYPES),
+                        help=f"Types de ressources bloqués en mode --lean, séparés par des virgules (défaut : {','.join(DEFAULT_BLOCKED_TYPES)}).")
+    parser.add_argument("--block-pattern", action="append", default=[],
+                        help="Motif d'URL supplémentaire à bloquer en mode --lean (ex : '*widgets*'), répétable.")
+    parser.add_argument("--lean-baseline", type=int, default=4,
+                        help="Paires de pages chargées sans puis avec blocage, pour comparer les deux modes (défaut : 4).")
+    parser.add_argument("--archive", default=ARCHIVE_ROOT,
+                        help=f"Dossier de l'archive HTML brute, pour la ré-extraction hors ligne (défaut : {ARCHIVE_ROOT}, '' pour aucune).")
+    parser.add_argument("--events", default=None,
+                        help="Fichier JSONL où émettre les événements de télémétrie (durée de chaque étape, champs manquants).")
+    parser.add_argument("--metrics-file", default=None,
+                        help="Fichier de métriques Prometheus écrit en fin de run (textfile collector de node_exporter).")
+    parser.add_argument("--metrics-port", type=int, default=None,
+                        help="Exposer les métriques Prometheus sur http://127.0.0.1:PORT/metrics pendant le run.")
+    parser.add_argument("--max-attempts", type=int, default=3,
+                        help="Tentatives par page de détails sur erreur transitoire (défaut : 3).")
+    parser.add_argument("--backoff-base", type=float, default=2.0,
+                        help="Délai de base (s) du réessai exponentiel à gigue (défaut : 2).")
+    parser.add_argument("--breaker-error-rate", type=float, default=0.5,
+                        help="Taux d'erreur des pages récentes qui met le crawl en pause (défaut : 0.5).")
+    parser.add_argument("--breaker-window", type=int, default=20,
+                        help="Nombre de pages récentes observées par le coupe-circuit (défaut : 20).")
+    parser.add_argument("--breaker-cooldown", type=float, default=120.0,
+                        help="Pause (s) à l'ouverture du coupe-circuit, doublée à chaque échec d'essai (défaut : 120).")
+    parser.add_argument("--dead-letters", default=DEAD_LETTERS_PATH,
+                        help=f"Liste JSONL des cours en échec définitif (défaut : {DEAD_LETTERS_PATH}).")
+    parser.add_argument("--retry-dead-letters", action="store_true",
+                        help="Relancer uniquement les cours de la liste d'échecs, sans parcourir les pages de résultats.")
+    parser.add_argument("--browser-pool", default=None,
+                        help="URL du démon browser_pool_daemon.py auquel louer des sessions Chrome déjà lancées.")
+    args = parser.parse_args()
+    topics = list(args.topics)
+    if args.topics_file:
+        with open(args.topics_file, 'r', encoding='utf-8') as f:
+            topics += [line.strip() for line in f if line.strip() and not line.startswith('#')]
+    scrape_udemy_chatgpt_courses(
+        topics=list(dict.fromkeys(topics)),
+        max_pages=args.max_pages,
+        num_workers=args.workers,
+        fetch_mode=args.fetch_mode,
+        http_concurrency=args.http_concurrency,
+        http_origin=args.http_origin,
+        rate_per_host=args.rate_per_host,
+        state_path=args.state_db,
+        max_age_hours=args.max_age_hours,
+        output_path=args.output,
+        compact_path=args.compact or None,
+        pipeline=args.pipeline,
+        queue_size=args.queue_size,
+        lean=args.lean,
+        block_types=[t.strip() for t in args.block_types.split(",") if t.strip()],
+        block_patterns=args.block_pattern,
+        lean_baseline_pages=args.lean_baseline,
+        archive_root=args.archive or None,
+        events_path=args.events,
+        metrics_path=args.metrics_file,
+        metrics_port=args.metrics_port,
+        max_attempts=args.max_attempts,
+        backoff_base=args.backoff_base,
+        breaker_error_rate=args.breaker_error_rate,
+        breaker_window=args.breaker_window,
+        breaker_cooldown=args.breaker_cooldown,
+        dead_letters_path=args.dead_letters,
+        retry_dead_letters=args.retry_dead_letters,
+        pool_url=args.browser_pool,
+    )
@@ -0,0 +1,170 @@
+import queue
+import threading
+import time
+
+_DONE = object()
+
+
+class LazyDriver:
+    """
+    Navigateur d'un consommateur, lancé seulement au premier besoin : en mode HTTP,
+    un consommateur qui n'a jamais besoin de repli ne paie pas le démarrage de Chrome.
+    Après un échec de lancement, get() relève la même erreur sans relancer Chrome pendant
+    un délai qui double à chaque échec : les cours en file échouent vite au lieu de
+    retenter un démarrage chacun.
+    """
+
+    def __init__(self, factory, startup_lock, backoff=5.0, max_backoff=300.0):
+        self._factory = factory
+        self._startup_lock = startup_lock
+        self._driver = None
+        # Durée du lancement de Chrome ; None tant qu'il n'a pas été lancé
+        self.startup_seconds = None
+        self.failed_startups = 0
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._startup_error = None
+        self._retry_at = 0.0
+
+    def get(self):
+        if self._driver is None:
+            if self._startup_error is not None and time.monotonic() < self._retry_at:
+                raise self._startup_error
+            t0 = time.perf_counter()
+            try:
+                with self._startup_lock:
+                    self._driver = self._factory()
+            except Exception as e:
+                self.failed_startups += 1
+                self._startup_error = e
+                self._retry_at = time.monotonic() + min(self.backoff * 2 ** (self.failed_startups - 1), self.max_backoff)
+                raise
+            self._startup_error = None
+            self.startup_seconds = time.perf_counter() - t0
+        return self._driver
+
+    def quit(self):
+        if self._driver is not None:
+            try:
+                self._driver.quit()
+            except Exception:
+                pass
+            self._driver = None
+
+
+class ConsumerStats:
+    def __init__(self, consumer_id):
+        self.consumer_id = consumer_id
+        self.items = 0
+        self.errors = 0
+        self.failed_startups = 0
+        self.startup_seconds = None
+        self.busy_seconds = 0.0
+        self.idle_seconds = 0.0
+
+
+class CrawlPipeline:
+    """
+    Pipeline producteur/consommateurs : l'étape "pages de résultats" soumet les cours dès
+    qu'une page est analysée, et N consommateurs traitent les pages de détails en même temps.
+    La file est bornée : quand les consommateurs prennent du retard, submit() bloque le
+    producteur (backpressure) au lieu d'accumuler les cours en mémoire.
+    """
+
+    def __init__(self, consume_fn, driver_factory, num_consumers=2, queue_size=32, sample_interval=0.5):
+        self.consume_fn = consume_fn
+        self.driver_factory = driver_factory
+        self.num_consumers = max(1, num_consumers)
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.sample_interval = sample_interval
+        self.consumer_stats = [ConsumerStats(i + 1) for i in range(self.num_consumers)]
+        self.submitted = 0
+        self.producer_blocked_seconds = 0.0
+        self._depth_samples = []
+        self._startup_lock = threading.Lock()
+        self._threads = []
+        self._stop_sampling = threading.Event()
+        self._started_at = None
+        self._producer_done_at = None
+        self._finished_at = None
+
+    def _consumer(self, stats):
+        lazy_driver = LazyDriver(self.driver_factory, self._startup_lock)
+        try:
+            while True:
+                t0 = time.perf_counter()
+                item = self.queue.get()
+                stats.idle_seconds += time.perf_counter() - t0
+                if item is _DONE:
+                    break
+                t0 = time.perf_counter()
+                try:
+                    self.consume_fn(lazy_driver, item)
+                except Exception as e:
+                    stats.errors += 1
+                    print(f"[consommateur {stats.consumer_id}] Erreur inattendue : {e}")
+                finally:
+                    stats.busy_seconds += time.perf_counter() - t0
+                    stats.items += 1
+        finally:
+            stats.failed_startups = lazy_driver.failed_startups
+            stats.startup_seconds = lazy_driver.startup_seconds
+            lazy_driver.quit()
+
+    def _sample_depth(self):
+        while not self._stop_sampling.wait(self.sample_interval):
+            self._depth_samples.append(self.queue.qsize())
+
+    def start(self):
+        self._started_at = time.perf_counter()
+        for stats in self.consumer_stats:
+            thread = threading.Thread(target=self._consumer, args=(stats,),
+                                      name=f"detail-consumer-{stats.consumer_id}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        sampler = threading.Thread(target=self._sample_depth, name="queue-depth-sampler", daemon=True)
+        sampler.start()
+        self._threads.append(sampler)
+
+    def submit(self, item):
+        """Ajoute un élément à traiter ; bloque tant que la file est pleine."""
+        t0 = time.perf_counter()
+        self.queue.put(item)
+        self.producer_blocked_seconds += time.perf_counter() - t0
+        self.submitted += 1
+
+    def close_and_drain(self):
+        """Signale la fin de la production, attend que les consommateurs vident la file et renvoie le rapport."""
+        self._producer_done_at = time.perf_counter()
+        for _ in range(self.num_consumers):
+            self.queue.put(_DONE)
+        for thread in self._threads[:self.num_consumers]:
+            thread.join()
+        self._finished_at = time.perf_counter()
+        self._stop_sampling.set()
+        return self.report()
+
+    def report(self):
+        samples = self._depth_samples or [0]
+        producer_seconds = self._producer_done_at - self._started_at
+        drain_seconds = self._finished_at - self._producer_done_at
+        print("\n--- Pipeline pages de résultats -> pages de détails ---")
+        print(f"  Production (pages de résultats) : {self.submitted} cours soumis en {producer_seconds:.1f}s, "
+              f"dont {self.producer_blocked_seconds:.1f}s bloqué sur file pleine")
+        print(f"  File (max {self.queue.maxsize}) : profondeur max {max(samples)}, moyenne {sum(samples) / len(samples):.1f}")
+        for stats in self.consumer_stats:
+            startup = (f"navigateur lancé en {stats.startup_seconds:.1f}s" if stats.startup_seconds is not None
+                       else "navigateur non lancé")
+            print(f"  consommateur {stats.consumer_id}: {stats.items} cours, {stats.errors} erreurs, "
+                  f"{startup} ({stats.failed_startups} échecs), "
+                  f"occupé {stats.busy_seconds:.1f}s, en attente {stats.idle_seconds:.1f}s")
+        print(f"  Vidage final de la file : {drain_seconds:.1f}s (total {self._finished_at - self._started_at:.1f}s)")
+        return {
+            'submitted': self.submitted,
+            'producer_seconds': producer_seconds,
+            'producer_blocked_seconds': self.producer_blocked_seconds,
+            'queue_max_depth': max(samples),
+            'queue_mean_depth': sum(samples) / len(samples),
+            'drain_seconds': drain_seconds,
+            'consumers': [vars(s).copy() for s in self.consumer_stats],
+        }
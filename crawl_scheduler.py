@@ -0,0 +1,71 @@
+from urllib.parse import urlsplit, urlunsplit
+
+UDEMY_ORIGIN = "https://www.udemy.com"
+
+
+def topic_search_url(topic):
+    """URL de recherche d'un topic : une URL complète est gardée telle quelle, un slug devient /topic/<slug>/."""
+    if topic.startswith(('http://', 'https://')):
+        return topic
+    return f"{UDEMY_ORIGIN}/topic/{topic.strip('/')}/"
+
+
+def topic_label(topic):
+    """Libellé court d'un topic pour étiqueter les cours (slug, ou chemin + requête de l'URL)."""
+    if not topic.startswith(('http://', 'https://')):
+        return topic.strip('/')
+    parts = urlsplit(topic)
+    path = parts.path.strip('/')
+    if path.startswith('topic/'):
+        path = path[len('topic/'):]
+    return f"{path}?{parts.query}" if parts.query else path
+
+
+def normalize_course_url(url):
+    """
+    Forme canonique d'une URL de cours, pour dédupliquer entre topics : https, hôte en
+    minuscules, slash final, sans paramètres de suivi ni fragment.
+    """
+    parts = urlsplit(url)
+    path = parts.path if parts.path.endswith('/') else parts.path + '/'
+    return urlunsplit(('https', parts.netloc.lower(), path, '', ''))
+
+
+class CourseRegistry:
+    """
+    Cours rencontrés sur l'ensemble des topics, dans l'ordre de première apparition.
+    Chaque cours n'est gardé qu'une fois et porte la liste des topics où il apparaît.
+    """
+
+    def __init__(self):
+        self._by_url = {}
+        self.duplicates = 0
+        # Cours dont la liste de topics a changé après leur première apparition
+        self.retagged = set()
+
+    def add(self, card, topic):
+        """
+        Ajoute une carte de résultat. Renvoie l'enregistrement du cours s'il n'avait
+        jamais été vu, None s'il s'agit d'un doublon (son topic est alors ajouté).
+        """
+        url = normalize_course_url(card['url'])
+        course = self._by_url.get(url)
+        if course is not None:
+            self.duplicates += 1
+            if topic not in course['topics']:
+                course['topics'].append(topic)
+                self.retagged.add(url)
+            return None
+        course = dict(card, url=url, topics=[topic])
+        self._by_url[url] = course
+        return course
+
+    def get(self, url):
+        return self._by_url.get(normalize_course_url(url))
+
+    @property
+    def courses(self):
+        return list(self._by_url.values())
+
+    def __len__(self):
+        return len(self._by_url)
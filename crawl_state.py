@@ -0,0 +1,113 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS crawl_state (
+    url TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    last_fetched REAL NOT NULL,
+    content_hash TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    record TEXT
+)
+"""
+
+
+def content_hash(record):
+    """Hash stable du contenu extrait d'un cours (indépendant de l'ordre des clés)."""
+    payload = json.dumps(record, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class CrawlStateStore:
+    """
+    État durable du crawl, indexé par URL de cours : statut, date du dernier passage,
+    hash du contenu et dernier enregistrement extrait. Permet de reprendre un crawl
+    interrompu et de ne re-scraper que les cours périmés lors des passages planifiés.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        # Partagé entre les workers du pool : une connexion, protégée par un verrou
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(_SCHEMA)
+
+    def get(self, url):
+        """Renvoie l'état d'une URL (dict) ou None si elle n'a jamais été vue."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, last_fetched, content_hash, attempts, last_error, record "
+                "FROM crawl_state WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            'url': url,
+            'status': row[0],
+            'last_fetched': row[1],
+            'content_hash': row[2],
+            'attempts': row[3],
+            'last_error': row[4],
+            'record': json.loads(row[5]) if row[5] else None,
+        }
+
+    def should_fetch(self, url, max_age_seconds=None, now=None):
+        """
+        Vrai si l'URL doit être (re)scrapée : jamais vue, en échec, ou terminée depuis
+        plus de `max_age_seconds` (None : un cours terminé n'est jamais re-scrapé).
+        """
+        state = self.get(url)
+        if state is None or state['status'] != STATUS_DONE:
+            return True
+        if max_age_seconds is None:
+            return False
+        now = time.time() if now is None else now
+        return now - state['last_fetched'] > max_age_seconds
+
+    def mark_done(self, url, record):
+        """Enregistre un cours scrapé avec succès. Renvoie True si son contenu a changé."""
+        new_hash = content_hash(record)
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT content_hash FROM crawl_state WHERE url = ?", (url,)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT INTO crawl_state (url, status, last_fetched, content_hash, attempts, last_error, record) "
+                "VALUES (?, ?, ?, ?, 1, NULL, ?) "
+                "ON CONFLICT(url) DO UPDATE SET status = excluded.status, last_fetched = excluded.last_fetched, "
+                "content_hash = excluded.content_hash, attempts = crawl_state.attempts + 1, "
+                "last_error = NULL, record = excluded.record",
+                (url, STATUS_DONE, time.time(), new_hash, json.dumps(record, ensure_ascii=False))
+            )
+        return row is None or row[0] != new_hash
+
+    def mark_failed(self, url, error):
+        """Enregistre un échec : l'URL sera retentée au prochain passage."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO crawl_state (url, status, last_fetched, attempts, last_error) "
+                "VALUES (?, ?, ?, 1, ?) "
+                "ON CONFLICT(url) DO UPDATE SET status = excluded.status, last_fetched = excluded.last_fetched, "
+                "attempts = crawl_state.attempts + 1, last_error = excluded.last_error",
+                (url, STATUS_FAILED, time.time(), str(error))
+            )
+
+    def counts(self):
+        """Nombre d'URLs par statut."""
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM crawl_state GROUP BY status").fetchall()
+        return dict(rows)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
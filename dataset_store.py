@@ -0,0 +1,149 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from normalization import normalize_frame
+from record_stream import iter_latest_records, iter_records
+
+LIST_COLUMNS = ('topics', 'what_you_will_learn', 'requirements')
+
+# Schéma commun aux trois applications : colonnes typées, prix / note / inscrits déjà numériques.
+SCHEMA = pa.schema([
+    ('url', pa.string()),
+    ('title', pa.string()),
+    ('description', pa.string()),
+    ('category', pa.string()),
+    ('level', pa.string()),
+    ('language', pa.string()),
+    ('type', pa.string()),
+    ('topics', pa.list_(pa.string())),
+    ('what_you_will_learn', pa.list_(pa.string())),
+    ('requirements', pa.list_(pa.string())),
+    ('current_price', pa.string()),
+    ('price', pa.float64()),
+    ('is_free', pa.bool_()),
+    ('original_price', pa.float64()),
+    ('discount_percentage', pa.float64()),
+    ('rating', pa.float64()),
+    ('students_enrolled', pa.int64()),
+    ('duration_hours', pa.float64()),
+])
+
+
+def _text_list(value):
+    if isinstance(value, list):
+        return [str(v) for v in value]
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return []
+    return [str(value)]
+
+
+def normalize_batch(records):
+    """
+    Convertit un lot de cours bruts (scraper ou jeu de données fusionné) en RecordBatch conforme
+    à SCHEMA ; les colonnes scalaires passent par normalization.normalize_frame (vectorisé).
+    """
+    df = pd.DataFrame.from_records(records)
+    frame = normalize_frame(df)
+    for column in LIST_COLUMNS:
+        values = df[column] if column in df.columns else [None] * len(df)
+        frame[column] = [_text_list(value) for value in values]
+    return pa.RecordBatch.from_pandas(frame, schema=SCHEMA, preserve_index=False)
+
+
+def dataset_path_for(source_path):
+    """Chemin du jeu de données colonnaire associé à un fichier de cours (même nom, extension .arrow)."""
+    return os.path.splitext(source_path)[0] + '.arrow'
+
+
+def build_dataset(sources, output_path, batch_size=10000):
+    """
+    Convertit un ou plusieurs fichiers de cours (.json/.jsonl) en fichier Arrow IPC non compressé,
+    lisible par mappage mémoire. Les enregistrements sont lus en flux et écrits par lots de
+    `batch_size` ; une URL réécrite dans un flux JSONL n'est gardée que dans sa dernière version.
+    Renvoie le nombre de lignes écrites.
+    """
+    count = 0
+    tmp_path = output_path + '.tmp'
+    with pa.OSFile(tmp_path, 'wb') as sink, pa.ipc.new_file(sink, SCHEMA) as writer:
+        batch = []
+        for source in sources:
+            records = iter_latest_records(source) if source.endswith('.jsonl') else iter_records(source)
+            for record in records:
+                batch.append(record)
+                if len(batch) >= batch_size:
+                    writer.write_batch(normalize_batch(batch))
+                    count += len(batch)
+                    batch = []
+        if batch:
+            writer.write_batch(normalize_batch(batch))
+            count += len(batch)
+    os.replace(tmp_path, output_path)
+    return count
+
+
+def ensure_dataset(source_path, dataset_path=None):
+    """
+    Renvoie le chemin du jeu de données colonnaire de `source_path`, reconstruit seulement
+    s'il est absent ou plus ancien que la source. Un chemin .arrow est renvoyé tel quel.
+    """
+    if source_path.endswith('.arrow'):
+        return source_path
+    dataset_path = dataset_path or dataset_path_for(source_path)
+    if not os.path.exists(dataset_path) or os.path.getmtime(dataset_path) < os.path.getmtime(source_path):
+        build_dataset([source_path], dataset_path)
+    return dataset_path
+
+
+def open_dataset(path, columns=None):
+    """Table Arrow mappée en mémoire : les colonnes ne sont lues depuis le disque qu'à l'usage."""
+    table = pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+    return table.select(columns) if columns else table
+
+
+def load_dataframe(path, columns=None):
+    """DataFrame pandas des colonnes demandées (toutes par défaut)."""
+    return open_dataset(path, columns).to_pandas()
+
+
+def load_dataset_records(path, columns=None):
+    """Liste de dicts, pour les consommateurs qui itèrent sur les cours (ex : indexation Chroma)."""
+    return open_dataset(path, columns).to_pylist()
+
+
+def count_rows(path):
+    """Nombre de lignes, lu dans les métadonnées des lots sans charger les colonnes."""
+    reader = pa.ipc.open_file(pa.memory_map(path, 'r'))
+    return sum(reader.get_batch(i).num_rows for i in range(reader.num_record_batches))
+
+
+def iter_dataset_records(path, batch_size=1000, columns=None):
+    """Itère sur les cours par lots de `batch_size` lignes converties en dicts : mémoire bornée."""
+    for batch in open_dataset(path, columns).to_batches(max_chunksize=batch_size):
+        yield from batch.to_pylist()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Jeu de données colonnaire (Arrow) partagé par les applications.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build = subparsers.add_parser("build", help="Construire le jeu de données à partir de fichiers de cours.")
+    build.add_argument("output", help="Fichier .arrow à écrire.")
+    build.add_argument("sources", nargs="+", help="Fichiers de cours .json / .jsonl.")
+    info = subparsers.add_parser("info", help="Afficher le schéma et le nombre de lignes.")
+    info.add_argument("path")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        count = build_dataset(args.sources, args.output)
+        print(f"{count} cours écrits dans {args.output} ({os.path.getsize(args.output) / 1e6:.1f} Mo).")
+    else:
+        table = open_dataset(args.path)
+        print(f"{table.num_rows} lignes")
+        print(table.schema)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+import argparse
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+CACHE_ROOT = "embedding_cache"
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+# Après éviction, le cache redescend à cette fraction de sa taille maximale
+EVICTION_TARGET = 0.9
+_SQL_CHUNK = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    key TEXT PRIMARY KEY,
+    row INTEGER NOT NULL UNIQUE,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used);
+CREATE TABLE IF NOT EXISTS free_rows (row INTEGER PRIMARY KEY);
+CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+
+
+def text_key(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def namespace(model_name, normalization):
+    """Dossier du cache pour un (modèle, normalisation) : leurs embeddings ne sont pas interchangeables."""
+    return re.sub(r'[^A-Za-z0-9._-]+', '_', f"{model_name}__{normalization}")
+
+
+class EmbeddingCache:
+    """
+    Cache disque des embeddings de textes, partagé entre le chatbot, prediction_ML et le notebook.
+    Clé : (modèle, normalisation, sha256 du texte). Les vecteurs float32 sont stockés ligne par
+    ligne dans un fichier mappé en mémoire ; l'index SQLite associe chaque clé à sa ligne et à sa
+    date de dernier usage. Au-delà de `max_bytes`, les entrées les moins récemment utilisées sont
+    évincées et leurs lignes réutilisées. Seuls les textes absents passent par l'encodeur.
+    """
+
+    def __init__(self, model_name, normalization='raw', root=CACHE_ROOT, max_bytes=DEFAULT_MAX_BYTES):
+        self.model_name = model_name
+        self.normalization = normalization
+        self.max_bytes = max_bytes
+        self.dir = os.path.join(root, namespace(model_name, normalization))
+        os.makedirs(self.dir, exist_ok=True)
+        self._vectors_path = os.path.join(self.dir, "vectors.f32")
+        self._conn = sqlite3.connect(os.path.join(self.dir, "index.sqlite"), check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+        row = self._conn.execute("SELECT value FROM meta WHERE name = 'dim'").fetchone()
+        self.dim = int(row[0]) if row else None
+        self._vectors = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _capacity(self):
+        return self._vectors.shape[0] if self._vectors is not None else 0
+
+    def _ensure_capacity(self, rows):
+        """(Re)mappe le fichier des vecteurs avec au moins `rows` lignes (il a pu grandir dans un autre processus)."""
+        if self._capacity() >= rows:
+            return
+        row_bytes = self.dim * 4
+        size = os.path.getsize(self._vectors_path) if os.path.exists(self._vectors_path) else 0
+        if size < rows * row_bytes:
+            # Croissance par paliers pour limiter les remappages
+            size = max(rows, 2 * (size // row_bytes), 1024) * row_bytes
+            with open(self._vectors_path, 'ab') as f:
+                f.truncate(size)
+        self._vectors = np.memmap(self._vectors_path, dtype=np.float32, mode='r+', shape=(size // row_bytes, self.dim))
+
+    def _lookup(self, keys):
+        rows = {}
+        for start in range(0, len(keys), _SQL_CHUNK):
+            chunk = keys[start:start + _SQL_CHUNK]
+            query = f"SELECT key, row FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})"
+            rows.update(self._conn.execute(query, chunk).fetchall())
+        return rows
+
+    def _allocate(self, count):
+        """Lignes libres pour `count` nouveaux vecteurs : lignes évincées d'abord, puis fin du fichier."""
+        rows = [r for (r,) in self._conn.execute("SELECT row FROM free_rows ORDER BY row LIMIT ?", (count,))]
+        if rows:
+            self._conn.executemany("DELETE FROM free_rows WHERE row = ?", [(r,) for r in rows])
+        if len(rows) < count:
+            (next_row,) = self._conn.execute(
+                "SELECT MAX(m) FROM (SELECT MAX(row) + 1 AS m FROM embeddings UNION ALL "
+                "SELECT MAX(row) + 1 FROM free_rows UNION ALL SELECT 0)").fetchone()
+            rows += range(next_row, next_row + count - len(rows))
+        return rows
+
+    def _evict(self):
+        (entries,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        max_entries = self.max_bytes // (self.dim * 4)
+        if entries <= max_entries:
+            return
+        excess = entries - int(max_entries * EVICTION_TARGET)
+        victims = self._conn.execute(
+            "SELECT key, row FROM embeddings ORDER BY last_used LIMIT ?", (excess,)).fetchall()
+        self._conn.executemany("DELETE FROM embeddings WHERE key = ?", [(key,) for key, _ in victims])
+        self._conn.executemany("INSERT OR IGNORE INTO free_rows (row) VALUES (?)", [(row,) for _, row in victims])
+        self.evictions += len(victims)
+
+    def encode(self, texts, encoder):
+        """
+        Embeddings de `texts` (tableau float32, une ligne par texte) : lus dans le cache, ou calculés
+        par `encoder(textes_absents)` puis ajoutés au cache. Les doublons ne sont encodés qu'une fois.
+        Les entrées trouvées sont revérifiées sous verrou d'écriture avant lecture : une entrée évincée
+        par un autre processus pendant l'encodage (sa ligne a pu être réutilisée) est encodée à nouveau.
+        """
+        texts = list(texts)
+        keys = [text_key(text) for text in texts]
+        with self._lock:
+            found = self._lookup(list(set(keys))) if self.dim is not None else {}
+        computed = {}
+        while True:
+            missing = {}
+            for key, text in zip(keys, texts):
+                if key not in found and key not in computed and key not in missing:
+                    missing[key] = text
+            if missing:
+                vectors = np.asarray(encoder(list(missing.values())), dtype=np.float32)
+                computed.update(zip(missing, vectors))
+
+            with self._lock, self._conn:
+                # Verrou d'écriture jusqu'à la fin des lectures : d'autres processus partagent le cache
+                self._conn.execute("BEGIN IMMEDIATE")
+                confirmed = self._lookup(list(found)) if found else {}
+                if len(confirmed) < len(found):
+                    # Entrées évincées entre-temps : elles deviennent des absentes, encodées au tour suivant
+                    found = confirmed
+                    continue
+                found = confirmed
+                # Textes ajoutés par un autre processus pendant l'encodage : leur ligne est gardée
+                stored = self._lookup(list(computed)) if computed else {}
+                new = {key: vector for key, vector in computed.items() if key not in stored}
+                if self.dim is None and computed:
+                    self.dim = vectors.shape[1]
+                    self._conn.execute("INSERT OR IGNORE INTO meta (name, value) VALUES ('dim', ?)", (str(self.dim),))
+                if found:
+                    self._ensure_capacity(max(found.values()) + 1)
+                result = np.empty((len(texts), self.dim or 0), dtype=np.float32)
+                hit_positions = [i for i, key in enumerate(keys) if key in found]
+                if hit_positions:
+                    result[hit_positions] = self._vectors[[found[keys[i]] for i in hit_positions]]
+                miss_positions = [i for i, key in enumerate(keys) if key not in found]
+                if miss_positions:
+                    result[miss_positions] = np.stack([computed[keys[i]] for i in miss_positions])
+                now = time.time()
+                used = list(found) + list(stored)
+                if used:
+                    self._conn.executemany("UPDATE embeddings SET last_used = ? WHERE key = ?", [(now, k) for k in used])
+                if new:
+                    rows = self._allocate(len(new))
+                    self._ensure_capacity(max(rows) + 1)
+                    for row, vector in zip(rows, new.values()):
+                        self._vectors[row] = vector
+                    self._vectors.flush()
+                    self._conn.executemany("INSERT INTO embeddings (key, row, last_used) VALUES (?, ?, ?)",
+                                           [(key, row, now) for key, row in zip(new, rows)])
+                    self._evict()
+                self.hits += len(hit_positions)
+                self.misses += len(miss_positions)
+            return result
+
+    def stats(self):
+        with self._lock:
+            (entries,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            'model': self.model_name,
+            'normalization': self.normalization,
+            'entries': entries,
+            'dim': self.dim,
+            'bytes': entries * (self.dim or 0) * 4,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else None,
+            'evictions': self.evictions,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+            self._vectors = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cache disque des embeddings partagé entre les applications.")
+    parser.add_argument("root", nargs="?", default=CACHE_ROOT, help="Dossier du cache (défaut : embedding_cache).")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.root):
+        print(f"Aucun cache dans '{args.root}'.")
+        return
+    for name in sorted(os.listdir(args.root)):
+        index_path = os.path.join(args.root, name, "index.sqlite")
+        if not os.path.exists(index_path):
+            continue
+        conn = sqlite3.connect(index_path)
+        (entries,) = conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        dim = conn.execute("SELECT value FROM meta WHERE name = 'dim'").fetchone()
+        conn.close()
+        size = os.path.getsize(os.path.join(args.root, name, "vectors.f32")) / 1e6
+        print(f"{name}: {entries} embeddings (dim {dim[0] if dim else '?'}), fichier {size:.1f} Mo")
+
+
+if __name__ == "__main__":
+    main()
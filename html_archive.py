@@ -0,0 +1,189 @@
+import argparse
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import zstandard
+
+from record_stream import JsonlSink, iter_latest_records
+from udemy_extractors import empty_course_details, missing_fields, parse_course_details
+
+ARCHIVE_ROOT = "html_archive"
+ZSTD_LEVEL = 6
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT PRIMARY KEY,
+    page_type TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    size INTEGER NOT NULL
+)
+"""
+
+
+def object_path(root, sha):
+    """Chemin du blob compressé d'un contenu : objects/<2 premiers caractères>/<hash>.html.zst."""
+    return os.path.join(root, 'objects', sha[:2], sha + '.html.zst')
+
+
+def read_object(root, sha):
+    with open(object_path(root, sha), 'rb') as f:
+        return zstandard.ZstdDecompressor().decompress(f.read()).decode('utf-8')
+
+
+class HtmlArchive:
+    """
+    Archive des pages brutes récupérées pendant le crawl, adressée par contenu : chaque HTML
+    distinct est stocké une seule fois, compressé en zstd, et un index SQLite associe chaque
+    URL au hash de sa dernière version. Permet de ré-extraire les champs sans re-crawler.
+    """
+
+    def __init__(self, root=ARCHIVE_ROOT, level=ZSTD_LEVEL):
+        self.root = root
+        self.level = level
+        os.makedirs(os.path.join(root, 'objects'), exist_ok=True)
+        # Partagé entre les workers du pool : une connexion, protégée par un verrou
+        self._conn = sqlite3.connect(os.path.join(root, 'index.sqlite'), check_same_thread=False)
+        self._lock = threading.Lock()
+        # Un compresseur zstd ne doit pas servir à deux threads en même temps
+        self._local = threading.local()
+        self.stored = 0
+        self.deduplicated = 0
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(_SCHEMA)
+
+    def _compressor(self):
+        compressor = getattr(self._local, 'compressor', None)
+        if compressor is None:
+            compressor = self._local.compressor = zstandard.ZstdCompressor(level=self.level)
+        return compressor
+
+    def put(self, url, html, page_type='detail'):
+        """Archive le HTML d'une URL et renvoie son hash ; un contenu déjà connu n'est pas réécrit."""
+        data = html.encode('utf-8')
+        sha = hashlib.sha256(data).hexdigest()
+        path = object_path(self.root, sha)
+        is_new = not os.path.exists(path)
+        if is_new:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(self._compressor().compress(data))
+            os.replace(tmp_path, path)
+        with self._lock, self._conn:
+            if is_new:
+                self.stored += 1
+            else:
+                self.deduplicated += 1
+            self._conn.execute(
+                "INSERT INTO pages (url, page_type, sha256, fetched_at, size) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(url) DO UPDATE SET page_type = excluded.page_type, sha256 = excluded.sha256, "
+                "fetched_at = excluded.fetched_at, size = excluded.size",
+                (url, page_type, sha, time.time(), len(data))
+            )
+        return sha
+
+    def get(self, url):
+        """Renvoie le dernier HTML archivé pour une URL, ou None."""
+        with self._lock:
+            row = self._conn.execute("SELECT sha256 FROM pages WHERE url = ?", (url,)).fetchone()
+        return read_object(self.root, row[0]) if row else None
+
+    def entries(self, page_type=None):
+        """Liste des (url, hash, type de page) de l'index, éventuellement filtrée par type."""
+        query = "SELECT url, sha256, page_type FROM pages"
+        params = ()
+        if page_type is not None:
+            query += " WHERE page_type = ?"
+            params = (page_type,)
+        with self._lock:
+            return self._conn.execute(query + " ORDER BY url", params).fetchall()
+
+    def stats(self):
+        """Nombre d'URLs et de contenus distincts, taille brute et taille compressée sur disque."""
+        with self._lock:
+            urls, raw_size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM pages").fetchone()
+        objects, compressed_size = 0, 0
+        for dirpath, _, filenames in os.walk(os.path.join(self.root, 'objects')):
+            for name in filenames:
+                if name.endswith('.html.zst'):
+                    objects += 1
+                    compressed_size += os.path.getsize(os.path.join(dirpath, name))
+        return {'urls': urls, 'objects': objects, 'raw_bytes': raw_size, 'compressed_bytes': compressed_size}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _reextract_one(args):
+    """Travail d'un processus : relit un blob archivé et relance l'extracteur de pages de détails."""
+    root, url, sha = args
+    return url, parse_course_details(read_object(root, sha))
+
+
+def reextract(root, output_path, base_path=None, workers=None, chunksize=16):
+    """
+    Relance les extracteurs de pages de détails sur toute l'archive, en parallèle sur
+    plusieurs processus et sans réseau. Avec `base_path` (fichier de cours .json/.jsonl),
+    les champs ré-extraits remplacent ceux des enregistrements existants (titre, topics... gardés).
+    Renvoie le nombre d'enregistrements écrits dans `output_path` (JSONL).
+    """
+    archive = HtmlArchive(root)
+    entries = archive.entries('detail')
+    archive.close()
+    base = {record['url']: record for record in iter_latest_records(base_path)} if base_path else {}
+
+    t0 = time.perf_counter()
+    incomplete = 0
+    with JsonlSink(output_path) as sink, ProcessPoolExecutor(max_workers=workers) as executor:
+        jobs = ((root, url, sha) for url, sha, _ in entries)
+        for url, details in executor.map(_reextract_one, jobs, chunksize=chunksize):
+            record = dict(base.get(url) or {'url': url})
+            record.update(empty_course_details())
+            record.update(details)
+            if missing_fields(details):
+                incomplete += 1
+            sink.write(record)
+        count = sink.count
+    elapsed = time.perf_counter() - t0
+    print(f"{count} pages de détails ré-extraites en {elapsed:.1f}s "
+          f"({count / elapsed if elapsed > 0 else 0:.0f} pages/s), dont {incomplete} avec des champs manquants.")
+    if base:
+        not_archived = len(set(base) - {url for url, _, _ in entries})
+        if not_archived:
+            print(f"⚠️ {not_archived} cours de {base_path} n'ont pas de page archivée et ne sont pas dans {output_path}.")
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive HTML brute du crawl : statistiques et ré-extraction hors ligne.")
+    parser.add_argument("--archive", default=ARCHIVE_ROOT, help=f"Dossier de l'archive (défaut : {ARCHIVE_ROOT}).")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("stats", help="Afficher la taille de l'archive.")
+    reextract_parser = subparsers.add_parser("reextract", help="Ré-extraire les champs de toutes les pages de détails archivées.")
+    reextract_parser.add_argument("output", help="Fichier JSONL des cours ré-extraits.")
+    reextract_parser.add_argument("--base", default=None,
+                                  help="Fichier de cours existant (.json/.jsonl) dont les autres champs sont conservés.")
+    reextract_parser.add_argument("--workers", type=int, default=None,
+                                  help="Nombre de processus (défaut : nombre de cœurs).")
+    args = parser.parse_args()
+
+    if args.command == "stats":
+        archive = HtmlArchive(args.archive)
+        stats = archive.stats()
+        archive.close()
+        ratio = stats['raw_bytes'] / stats['compressed_bytes'] if stats['compressed_bytes'] else 0
+        print(f"{stats['urls']} URLs, {stats['objects']} contenus distincts, "
+              f"{stats['raw_bytes'] / 1e6:.1f} Mo bruts -> {stats['compressed_bytes'] / 1e6:.1f} Mo compressés (x{ratio:.1f}).")
+    else:
+        reextract(args.archive, args.output, base_path=args.base, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+import asyncio
+import re
+import threading
+import time
+from urllib.parse import urlsplit, urlunsplit
+
+import httpx
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"
+
+# Marqueurs "data-purpose" qui prouvent que le HTML serveur contient les sections extraites.
+# Sans eux (page de challenge anti-bot, rendu côté client...), on repasse par le navigateur.
+DETAIL_MARKERS = ('enrollment',)
+
+_MARKER_PATTERNS = {
+    marker: re.compile(r'data-purpose\s*=\s*["\']' + re.escape(marker) + r'["\']')
+    for marker in DETAIL_MARKERS
+}
+
+
+class FetchResult:
+    """Résultat d'une requête HTTP : statut, HTML, durée et erreur éventuelle."""
+
+    def __init__(self, url, status=None, html=None, elapsed=0.0, error=None):
+        self.url = url
+        self.status = status
+        self.html = html
+        self.elapsed = elapsed
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.error is None and self.status == 200 and self.html is not None
+
+
+def has_detail_markers(html, markers=DETAIL_MARKERS):
+    """Vrai si le HTML contient tous les marqueurs data-purpose attendus d'une page de détails."""
+    if not html:
+        return False
+    for marker in markers:
+        pattern = _MARKER_PATTERNS.get(marker) or re.compile(
+            r'data-purpose\s*=\s*["\']' + re.escape(marker) + r'["\']'
+        )
+        if not pattern.search(html):
+            return False
+    return True
+
+
+def rewrite_origin(url, origin):
+    """
+    Remplace le schéma et l'hôte d'une URL par `origin` (ex : http://127.0.0.1:8765),
+    pour viser un serveur local qui rejoue des pages sauvegardées.
+    """
+    if not origin:
+        return url
+    target = urlsplit(origin)
+    parts = urlsplit(url)
+    return urlunsplit((target.scheme, target.netloc, parts.path, parts.query, parts.fragment))
+
+
+class HttpPageFetcher:
+    """
+    Récupère des pages en HTTP avec un client asynchrone partagé : connexions keep-alive
+    réutilisées, et nombre de requêtes simultanées borné par un sémaphore. Un
+    `rate_limiter` (HostRateLimiter) éventuel borne en plus le débit par hôte.
+    """
+
+    def __init__(self, concurrency=8, timeout=20.0, origin=None, headers=None, rate_limiter=None):
+        self.concurrency = concurrency
+        self.rate_limiter = rate_limiter
+        self.timeout = timeout
+        self.origin = origin
+        self.headers = {
+            'User-Agent': USER_AGENT,
+            'Accept': 'text/html,application/xhtml+xml',
+            'Accept-Language': 'en-US,en;q=0.9',
+        }
+        self.headers.update(headers or {})
+        self._sync_client = None
+        self._sync_lock = threading.Lock()
+
+    def _client(self):
+        limits = httpx.Limits(
+            max_connections=self.concurrency,
+            max_keepalive_connections=self.concurrency,
+        )
+        return httpx.AsyncClient(
+            headers=self.headers, limits=limits, timeout=self.timeout, follow_redirects=True
+        )
+
+    async def _fetch_one(self, client, semaphore, url):
+        async with semaphore:
+            if self.rate_limiter is not None:
+                await self.rate_limiter.wait_async(url)
+            t0 = time.perf_counter()
+            try:
+                response = await client.get(rewrite_origin(url, self.origin))
+                return FetchResult(url, response.status_code, response.text, time.perf_counter() - t0)
+            except httpx.HTTPError as e:
+                return FetchResult(url, elapsed=time.perf_counter() - t0, error=str(e) or type(e).__name__)
+
+    async def fetch_all_async(self, urls):
+        semaphore = asyncio.Semaphore(self.concurrency)
+        async with self._client() as client:
+            results = await asyncio.gather(*(self._fetch_one(client, semaphore, url) for url in urls))
+        return {result.url: result for result in results}
+
+    def fetch_all(self, urls):
+        """Version synchrone : renvoie un dict url -> FetchResult."""
+        return asyncio.run(self.fetch_all_async(list(urls)))
+
+    def fetch(self, url):
+        """
+        Récupère une seule page depuis un thread (pipeline) : un client synchrone partagé par
+        tous les threads garde les connexions keep-alive, dans la même limite de connexions.
+        """
+        with self._sync_lock:
+            if self._sync_client is None:
+                self._sync_client = httpx.Client(
+                    headers=self.headers,
+                    limits=httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency),
+                    timeout=self.timeout, follow_redirects=True
+                )
+        if self.rate_limiter is not None:
+            self.rate_limiter.wait(url)
+        t0 = time.perf_counter()
+        try:
+            response = self._sync_client.get(rewrite_origin(url, self.origin))
+            return FetchResult(url, response.status_code, response.text, time.perf_counter() - t0)
+        except httpx.HTTPError as e:
+            return FetchResult(url, elapsed=time.perf_counter() - t0, error=str(e) or type(e).__name__)
+
+    def close(self):
+        with self._sync_lock:
+            if self._sync_client is not None:
+                self._sync_client.close()
+                self._sync_client = None
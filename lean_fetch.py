@@ -0,0 +1,179 @@
+import threading
+
+from page_readiness import _percentile
+
+# Motifs d'URL bloqués par type de ressource (syntaxe Network.setBlockedURLs : '*' = joker).
+# Les extracteurs ne lisent que le texte du DOM : images, polices, vidéos et traceurs sont inutiles.
+RESOURCE_TYPE_PATTERNS = {
+    'image': [
+        '*.png*', '*.jpg*', '*.jpeg*', '*.gif*', '*.webp*', '*.avif*', '*.svg*', '*.ico*',
+        '*img-b.udemycdn.com/*', '*img-c.udemycdn.com/*',
+    ],
+    'font': ['*.woff*', '*.woff2*', '*.ttf*', '*.otf*', '*.eot*'],
+    'media': ['*.mp4*', '*.webm*', '*.m3u8*', '*.m4s*', '*.mp3*', '*mp4-c.udemycdn.com/*'],
+    'stylesheet': ['*.css*'],
+    'tracker': [
+        '*google-analytics.com/*', '*googletagmanager.com/*', '*doubleclick.net/*',
+        '*facebook.net/*', '*facebook.com/tr*', '*hotjar.com/*', '*segment.com/*', '*segment.io/*',
+        '*bat.bing.com/*', '*optimizely.com/*', '*cookielaw.org/*', '*onetrust.com/*',
+        '*snap.licdn.com/*', '*analytics.tiktok.com/*', '*sentry.io/*',
+    ],
+}
+
+# Les feuilles de style ne sont pas bloquées par défaut : sans elles, les boutons de
+# pagination peuvent devenir non cliquables pour le repli "page suivante".
+DEFAULT_BLOCKED_TYPES = ('image', 'font', 'media', 'tracker')
+
+# Le tampon Resource Timing de Chrome garde 250 entrées par défaut : au-delà, les ressources d'une
+# page lourde (mode 'full' surtout) ne seraient pas comptées et le gain du blocage serait sous-estimé
+RESOURCE_BUFFER_SIZE = 10000
+
+# Octets transférés et temps de chargement de la page courante, via l'API Performance.
+# Les ressources tierces sans en-tête Timing-Allow-Origin annoncent une taille de 0 :
+# les octets mesurés sont donc un minorant, identique avec et sans blocage.
+_TRANSFER_SCRIPT = """
+var nav = performance.getEntriesByType('navigation')[0];
+var resources = performance.getEntriesByType('resource');
+var bytes = nav ? (nav.transferSize || nav.encodedBodySize || 0) : 0;
+for (var i = 0; i < resources.length; i++) {
+    bytes += resources[i].transferSize || resources[i].encodedBodySize || 0;
+}
+var load = nav && nav.loadEventEnd > 0 ? nav.loadEventEnd : performance.now();
+return {bytes: bytes, requests: resources.length + 1, load_ms: load};
+"""
+
+
+def blocked_url_patterns(resource_types=DEFAULT_BLOCKED_TYPES, extra_patterns=()):
+    """Liste des motifs à bloquer pour les types de ressources donnés, plus des motifs libres."""
+    patterns = []
+    for resource_type in resource_types:
+        if resource_type not in RESOURCE_TYPE_PATTERNS:
+            raise ValueError(f"Type de ressource inconnu : {resource_type} "
+                             f"(attendu : {', '.join(RESOURCE_TYPE_PATTERNS)})")
+        patterns.extend(RESOURCE_TYPE_PATTERNS[resource_type])
+    patterns.extend(extra_patterns)
+    return list(dict.fromkeys(patterns))
+
+
+def set_request_blocking(driver, patterns):
+    """Bloque (ou débloque avec une liste vide) les requêtes correspondant aux motifs, au niveau DevTools."""
+    driver.execute_cdp_cmd('Network.enable', {})
+    driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': list(patterns)})
+
+
+def enlarge_resource_buffer(driver, size=RESOURCE_BUFFER_SIZE):
+    """Agrandit le tampon Resource Timing de chaque nouveau document du navigateur (avant ses premières requêtes)."""
+    driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument',
+                           {'source': f"performance.setResourceTimingBufferSize({int(size)});"})
+
+
+def measure_page_transfer(driver):
+    """Renvoie (octets transférés, nombre de requêtes, temps de chargement en secondes) de la page courante."""
+    result = driver.execute_script(_TRANSFER_SCRIPT) or {}
+    return int(result.get('bytes') or 0), int(result.get('requests') or 0), (result.get('load_ms') or 0) / 1000.0
+
+
+class TransferStats:
+    """
+    Octets transférés et temps de chargement par page, par mode ('full' sans blocage,
+    'lean' avec blocage) et type de page. Thread-safe, partagé entre les workers du pool.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples = {}
+
+    def record(self, mode, page_type, num_bytes, requests, load_seconds):
+        with self._lock:
+            self._samples.setdefault((page_type, mode), []).append((num_bytes, requests, load_seconds))
+
+    def summary(self):
+        """Renvoie, par (type de page, mode), le nombre de pages, les octets et temps de chargement médians."""
+        with self._lock:
+            samples = {k: list(v) for k, v in self._samples.items()}
+        result = {}
+        for key, values in samples.items():
+            sizes = sorted(b for b, _, _ in values)
+            loads = sorted(s for _, _, s in values)
+            result[key] = {
+                'count': len(values),
+                'bytes_p50': _percentile(sizes, 50),
+                'bytes_mean': sum(sizes) / len(sizes),
+                'requests_mean': sum(r for _, r, _ in values) / len(values),
+                'load_p50': _percentile(loads, 50),
+                'load_p95': _percentile(loads, 95),
+            }
+        return result
+
+    def report(self):
+        summary = self.summary()
+        if not summary:
+            return summary
+        print("\n--- Transfert par page (lean fetch) ---")
+        for (page_type, mode), s in sorted(summary.items()):
+            print(f"  {page_type:8s} {mode:5s}: {s['count']} pages, {s['bytes_p50'] / 1024:.0f} Ko médian "
+                  f"({s['bytes_mean'] / 1024:.0f} Ko moyen, {s['requests_mean']:.0f} requêtes), "
+                  f"chargement p50={s['load_p50']:.2f}s p95={s['load_p95']:.2f}s")
+        for page_type in sorted({page_type for page_type, _ in summary}):
+            full, lean = summary.get((page_type, 'full')), summary.get((page_type, 'lean'))
+            if full and lean and full['bytes_mean'] and full['load_p50']:
+                print(f"  {page_type:8s} gain : {100 * (1 - lean['bytes_mean'] / full['bytes_mean']):.0f}% d'octets, "
+                      f"{100 * (1 - lean['load_p50'] / full['load_p50']):.0f}% de temps de chargement médian")
+        return summary
+
+
+class LeanFetchController:
+    """
+    Active le blocage des requêtes sur chaque navigateur et mesure le transfert de chaque page.
+    Les `baseline_pages` premières paires de pages de chaque type alternent sans blocage
+    ('full') et avec blocage ('lean'), pour comparer les deux modes sur des pages similaires.
+    """
+
+    def __init__(self, patterns, baseline_pages=4, stats=None):
+        self.patterns = list(patterns)
+        self.baseline_pages = baseline_pages
+        self.stats = stats or TransferStats()
+        self._lock = threading.Lock()
+        self._loads = {}
+        self._unsupported = False
+
+    def _next_mode(self, page_type):
+        with self._lock:
+            n = self._loads.get(page_type, 0)
+            self._loads[page_type] = n + 1
+        if n < 2 * self.baseline_pages:
+            return 'full' if n % 2 == 0 else 'lean'
+        return 'lean'
+
+    def prepare(self, driver, page_type):
+        """À appeler avant driver.get() : applique le mode de la prochaine page et le renvoie."""
+        if self._unsupported:
+            return None
+        mode = self._next_mode(page_type)
+        try:
+            # Une fois par navigateur, avant la première page mesurée
+            if not getattr(driver, '_lean_fetch_buffer', False):
+                enlarge_resource_buffer(driver)
+                driver._lean_fetch_buffer = True
+            # Le mode appliqué est mémorisé sur le navigateur : un CDP seulement quand il change
+            if getattr(driver, '_lean_fetch_mode', None) != mode:
+                set_request_blocking(driver, self.patterns if mode == 'lean' else [])
+                driver._lean_fetch_mode = mode
+        except Exception as e:
+            # Ex : navigateur distant sans accès aux commandes DevTools
+            print(f"⚠️ Blocage des requêtes indisponible ({e}) : lean fetch désactivé.")
+            self._unsupported = True
+            return None
+        return mode
+
+    def measure(self, driver, mode, page_type):
+        """À appeler une fois la page prête : enregistre ses octets transférés et son temps de chargement."""
+        if mode is None:
+            return
+        try:
+            num_bytes, requests, load_seconds = measure_page_transfer(driver)
+        except Exception as e:
+            print(f"  -> Mesure du transfert impossible : {e}")
+            return
+        self.stats.record(mode, page_type, num_bytes, requests, load_seconds)
+        print(f"  -> [{mode}] {num_bytes / 1024:.0f} Ko transférés en {requests} requêtes, chargement {load_seconds:.2f}s.")
@@ -0,0 +1,255 @@
+import argparse
+import json
+import os
+import re
+import time
+import unicodedata
+from array import array
+from collections import Counter
+
+import numpy as np
+
+from chroma_index import build_where, content_hash, course_id, course_metadata, dataset_fingerprint, filter_key
+from chroma_index import document_text, filtered_query
+from dataset_store import ensure_dataset, iter_dataset_records
+
+LEXICAL_DIR = "lexical_index"
+LEXICAL_FIELDS = ('title', 'what_you_will_learn', 'requirements')
+DEFAULT_K1 = 1.2
+DEFAULT_B = 0.75
+# Constante de la fusion par rang réciproque (valeur usuelle de la littérature)
+RRF_K = 60
+_ARRAYS = ('offsets', 'postings', 'weights', 'categories', 'levels', 'prices')
+
+# Mots avec leurs liaisons internes : "az-102", "ai-900", "node.js", "c++", "c#"
+_TOKEN_RE = re.compile(r"[^\W_]+(?:[-.][^\W_]+)*(?:\+\+|#)?")
+_PART_RE = re.compile(r"[-.]")
+# Mots vides français et anglais : présents dans presque tous les cours, ils n'aident pas le
+# classement et leurs longues listes empêcheraient l'arrêt anticipé des requêtes
+STOPWORDS = frozenset("""
+au aux avec ce ces dans de des du elle en et eux il ils je la le les leur lui ma mais me même mes moi mon ne nos
+notre nous on ou par pas pour qu que qui sa se ses son sur ta te tes toi ton tu un une vos votre vous y à d l n s
+t c j m est sont être avoir sans comment tout tous toutes très plus
+a an and are as at be by for from how in into is of on or the this that to with your you
+""".split())
+
+
+def tokenize(text):
+    """
+    Termes d'un texte : mots en minuscules (NFKC), sans les mots vides. Un terme composé ("az-102")
+    est gardé tel quel pour les correspondances exactes, et ses parties ("az", "102") sont ajoutées.
+    """
+    tokens = []
+    for token in _TOKEN_RE.findall(unicodedata.normalize('NFKC', text).lower()):
+        if token in STOPWORDS:
+            continue
+        tokens.append(token)
+        parts = _PART_RE.split(token)
+        if len(parts) > 1:
+            tokens.extend(part for part in parts if part and part not in STOPWORDS)
+    return tokens
+
+
+def lexical_text(record):
+    values = []
+    for field in LEXICAL_FIELDS:
+        value = record.get(field)
+        if isinstance(value, list):
+            values.extend(map(str, value))
+        elif value:
+            values.append(str(value))
+    return " ".join(values)
+
+
+class LexicalIndex:
+    """
+    Index inversé BM25 des cours (titre, "ce que vous apprendrez", prérequis), en tableaux numpy :
+    pour chaque terme, la liste des cours qui le contiennent et le poids BM25 de chacun, précalculé
+    à la construction. Une requête additionne les poids des listes de ses termes dans un tableau
+    de scores (un passage vectorisé par terme, sans boucle Python sur les cours) ; les mots vides
+    étant exclus, ces listes restent courtes. Catégorie, niveau et prix de chaque cours sont gardés
+    pour appliquer les mêmes filtres que la recherche vectorielle. Sauvegardé en fichiers .npy,
+    relus par mappage mémoire.
+    """
+
+    def __init__(self, ids, vocabulary, category_names, level_names, arrays, meta=None):
+        self.ids = ids
+        self.vocabulary = vocabulary
+        self.category_names = category_names
+        self.level_names = level_names
+        self.offsets, self.postings, self.weights, self.categories, self.levels, self.prices = (
+            arrays[name] for name in _ARRAYS)
+        self.meta = meta or {}
+
+    @classmethod
+    def build(cls, records, k1=DEFAULT_K1, b=DEFAULT_B):
+        """Construit l'index en un passage sur `records` (itérable) ; un cours présent plusieurs fois garde sa dernière version."""
+        vocabulary, ids, position = {}, [], {}
+        categories, levels = {}, {}
+        doc_categories, doc_levels, doc_prices, lengths = array('i'), array('i'), array('d'), array('i')
+        term_ids, doc_ids, frequencies = array('i'), array('i'), array('i')
+        for record in records:
+            meta = course_metadata(record)
+            id_ = course_id(record, None if record.get('url') else content_hash(document_text(record), meta))
+            doc = len(ids)
+            if id_ in position:
+                # Version précédente remplacée : ses termes sont neutralisés (poids nul)
+                ids[position[id_]] = None
+            position[id_] = doc
+            ids.append(id_)
+            counts = Counter(tokenize(lexical_text(record)))
+            for term, count in counts.items():
+                term_ids.append(vocabulary.setdefault(term, len(vocabulary)))
+                doc_ids.append(doc)
+                frequencies.append(count)
+            lengths.append(sum(counts.values()))
+            doc_categories.append(categories.setdefault(meta['category_key'], len(categories)))
+            doc_levels.append(levels.setdefault(meta['level_key'], len(levels)))
+            doc_prices.append(float(meta['current_price']))
+
+        term_ids = np.frombuffer(term_ids, dtype=np.int32)
+        doc_ids = np.frombuffer(doc_ids, dtype=np.int32)
+        tf = np.frombuffer(frequencies, dtype=np.int32).astype(np.float32)
+        lengths = np.frombuffer(lengths, dtype=np.int32).astype(np.float32)
+        live = np.array([id_ is not None for id_ in ids], dtype=bool)
+        n_docs = max(int(live.sum()), 1)
+        avg_length = float(lengths[live].mean()) if live.any() else 1.0
+
+        order = np.argsort(term_ids, kind='stable')
+        term_ids, doc_ids, tf = term_ids[order], doc_ids[order], tf[order]
+        offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(term_ids, minlength=len(vocabulary)), out=offsets[1:])
+        df = np.bincount(term_ids, weights=live[doc_ids], minlength=len(vocabulary))
+        idf = np.log1p((n_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+        norm = k1 * (1 - b + b * lengths[doc_ids] / (avg_length or 1.0))
+        weights = (idf[term_ids] * tf * (k1 + 1) / (tf + norm) * live[doc_ids]).astype(np.float32)
+
+        arrays = {
+            'offsets': offsets,
+            # Indices en entiers natifs : l'addition indexée évite une conversion à chaque requête
+            'postings': doc_ids.astype(np.intp),
+            'weights': weights,
+            'categories': np.frombuffer(doc_categories, dtype=np.int32),
+            'levels': np.frombuffer(doc_levels, dtype=np.int32),
+            'prices': np.frombuffer(doc_prices, dtype=np.float64),
+        }
+        return cls(ids, vocabulary, list(categories), list(levels), arrays, {'k1': k1, 'b': b, 'documents': n_docs})
+
+    def save(self, directory, dataset_path=None):
+        os.makedirs(directory, exist_ok=True)
+        for name in _ARRAYS:
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(self, name))
+        meta = dict(self.meta, dataset=dataset_fingerprint(dataset_path) if dataset_path else None)
+        tmp_path = os.path.join(directory, "index.json.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'meta': meta, 'ids': self.ids, 'vocabulary': self.vocabulary,
+                       'categories': self.category_names, 'levels': self.level_names}, f, ensure_ascii=False)
+        # Écrit en dernier : un index à moitié sauvegardé n'est jamais relu
+        os.replace(tmp_path, os.path.join(directory, "index.json"))
+
+    @classmethod
+    def load(cls, directory):
+        with open(os.path.join(directory, "index.json"), 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        arrays = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode='r') for name in _ARRAYS}
+        return cls(index['ids'], index['vocabulary'], index['categories'], index['levels'], arrays, index['meta'])
+
+    @classmethod
+    def load_or_build(cls, directory, dataset_path):
+        """Index sauvegardé s'il a été construit sur ce jeu de données, sinon reconstruit et sauvegardé."""
+        meta_path = os.path.join(directory, "index.json")
+        if os.path.exists(meta_path):
+            index = cls.load(directory)
+            if index.meta.get('dataset') == dataset_fingerprint(dataset_path):
+                return index
+        index = cls.build(iter_dataset_records(dataset_path))
+        index.save(directory, dataset_path)
+        return index
+
+    def _filter_mask(self, category=None, level=None, min_price=None, max_price=None):
+        """Cours admis par les filtres (tableau booléen sur tous les cours), None sans filtre."""
+        conditions = []
+        for value, names, codes in ((category, self.category_names, self.categories),
+                                    (level, self.level_names, self.levels)):
+            if value is not None:
+                key = filter_key(value)
+                conditions.append(codes == (names.index(key) if key in names else -1))
+        if min_price is not None:
+            conditions.append(self.prices >= min_price)
+        if max_price is not None:
+            conditions.append(self.prices <= max_price)
+        return np.logical_and.reduce(conditions) if conditions else None
+
+    def search(self, query, n_results=20, **filters):
+        """Les `n_results` meilleurs cours au sens BM25 (liste de (id, score)), sous les filtres de build_where."""
+        terms = {self.vocabulary[t] for t in tokenize(query) if t in self.vocabulary}
+        if not terms:
+            return []
+        scores = np.zeros(len(self.ids), dtype=np.float32)
+        for t in terms:
+            start, end = self.offsets[t], self.offsets[t + 1]
+            np.add.at(scores, self.postings[start:end], self.weights[start:end])
+        mask = self._filter_mask(**filters)
+        if mask is not None:
+            scores *= mask
+        if len(scores) > n_results:
+            top = np.argpartition(-scores, n_results - 1)[:n_results]
+        else:
+            top = np.arange(len(scores))
+        top = top[scores[top] > 0]
+        # Score décroissant ; à égalité, ordre des cours
+        top = top[np.lexsort((top, -scores[top]))]
+        return [(self.ids[doc], float(scores[doc])) for doc in top]
+
+def reciprocal_rank_fusion(rankings, k=RRF_K):
+    """Fusion par rang réciproque : score(id) = somme sur les classements de 1 / (k + rang). Renvoie [(id, score)]."""
+    scores = {}
+    for ranking in rankings:
+        for rank, id_ in enumerate(ranking, start=1):
+            scores[id_] = scores.get(id_, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: -item[1])
+
+
+def hybrid_search(collection, lexical, question, question_embedding, n_results=10, candidates=30, **filters):
+    """
+    Recherche hybride : `candidates` meilleurs cours de la recherche vectorielle (filtrée dans Chroma)
+    et de l'index BM25 (mêmes filtres), fusionnés par rang réciproque. Renvoie ids / metadatas / scores.
+    """
+    vector = filtered_query(collection, question_embedding, where=build_where(**filters), n_results=candidates)
+    lexical_ids = [id_ for id_, _ in lexical.search(question, candidates, **filters)]
+    fused = reciprocal_rank_fusion([vector['ids'], lexical_ids])[:n_results]
+    metadatas = dict(zip(vector['ids'], vector['metadatas']))
+    missing = [id_ for id_, _ in fused if id_ not in metadatas]
+    if missing:
+        found = collection.get(ids=missing, include=['metadatas'])
+        metadatas.update(zip(found['ids'], found['metadatas']))
+    fused = [(id_, score) for id_, score in fused if id_ in metadatas]
+    return {
+        'ids': [id_ for id_, _ in fused],
+        'metadatas': [metadatas[id_] for id_, _ in fused],
+        'scores': [score for _, score in fused],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Index lexical BM25 des cours (construction et requêtes de test).")
+    parser.add_argument("dataset", help="Jeu de données (.arrow, ou .json / .jsonl converti par dataset_store).")
+    parser.add_argument("--output", default=os.path.join("./chromadb-tawilpfa-docs", LEXICAL_DIR))
+    parser.add_argument("--query", action="append", default=[], help="Requête de test (répétable).")
+    args = parser.parse_args()
+
+    dataset_path = ensure_dataset(args.dataset)
+    t0 = time.perf_counter()
+    index = LexicalIndex.load_or_build(args.output, dataset_path)
+    print(f"Index : {index.meta['documents']} cours, {len(index.vocabulary)} termes, "
+          f"{len(index.postings)} entrées ({time.perf_counter() - t0:.2f}s).")
+    for query in args.query:
+        t0 = time.perf_counter()
+        hits = index.search(query, 10)
+        print(f"\n{query!r} ({(time.perf_counter() - t0) * 1000:.2f} ms)")
+        for id_, score in hits:
+            print(f"  {score:6.2f}  {id_}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+import argparse
+import json
+import os
+import re
+import time
+import zlib
+
+import numpy as np
+
+from crawl_scheduler import normalize_course_url
+from record_stream import JsonlSink, compact, iter_records
+from udemy_extractors import DETAIL_FIELDS
+
+DEFAULT_NUM_PERM = 64
+DEFAULT_BANDS = 16
+DEFAULT_THRESHOLD = 0.8
+SHINGLE_SIZE = 3
+# Au-delà, un seau LSH n'est comparé qu'en chaîne (texte générique partagé par beaucoup de cours)
+MAX_BUCKET_PAIRS = 200
+
+_WORD_RE = re.compile(r'\w+')
+
+
+def record_score(record):
+    """Complétude d'un enregistrement : nombre de champs de détails renseignés."""
+    return sum(1 for field in DETAIL_FIELDS if record.get(field) not in (None, [], ''))
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    """Ensemble des n-grammes de mots (hachés en 32 bits) d'un texte normalisé."""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < size:
+        grams = words
+    else:
+        grams = [' '.join(words[i:i + size]) for i in range(len(words) - size + 1)]
+    return np.fromiter({zlib.crc32(g.encode('utf-8')) for g in grams}, dtype=np.uint64)
+
+
+class MinHasher:
+    """
+    Signatures MinHash de `num_perm` valeurs : chaque permutation est un hachage
+    multiply-shift (a * x + b) mod 2^64 >> 32, calculé pour tous les n-grammes à la fois.
+    """
+
+    def __init__(self, num_perm=DEFAULT_NUM_PERM, seed=1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self._a = rng.integers(1, 2 ** 63, num_perm, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 2 ** 63, num_perm, dtype=np.uint64)
+
+    def signature(self, hashes):
+        if len(hashes) == 0:
+            return None
+        with np.errstate(over='ignore'):
+            values = (self._a[:, None] * hashes[None, :] + self._b[:, None]) >> np.uint64(32)
+        return values.min(axis=1).astype(np.uint32)
+
+
+class UnionFind:
+    def __init__(self):
+        self._parent = {}
+
+    def find(self, x):
+        parent = self._parent.setdefault(x, x)
+        while parent != x:
+            grandparent = self._parent[parent]
+            self._parent[x] = grandparent
+            x, parent = parent, grandparent
+        return x
+
+    def union(self, x, y):
+        x, y = self.find(x), self.find(y)
+        if x != y:
+            self._parent[max(x, y)] = min(x, y)
+
+    def groups(self):
+        groups = {}
+        for x in self._parent:
+            groups.setdefault(self.find(x), []).append(x)
+        return [sorted(members) for members in groups.values() if len(members) > 1]
+
+
+class CourseIndex:
+    """
+    Premier passage de la fusion : un cours par URL normalisée, avec la position (fichier,
+    ligne) de sa version la plus complète, l'union de ses topics, ses fichiers d'origine et sa
+    signature MinHash (titre + description). Le contenu des enregistrements n'est pas gardé.
+    """
+
+    def __init__(self, num_perm=DEFAULT_NUM_PERM, bands=DEFAULT_BANDS):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) doit être un multiple de bands ({bands}).")
+        self.hasher = MinHasher(num_perm)
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.urls = []
+        self.titles = []
+        self.positions = []
+        self.scores = []
+        self.topics = []
+        self.sources = []
+        self.occurrences = []
+        self.signatures = []
+        self._by_url = {}
+        self.records_read = 0
+        self.without_url = 0
+
+    def add(self, record, source_index, position, source_name):
+        self.records_read += 1
+        if not record.get('url'):
+            self.without_url += 1
+            return
+        url = normalize_course_url(record['url'])
+        score = record_score(record)
+        doc = self._by_url.get(url)
+        if doc is None:
+            doc = self._by_url[url] = len(self.urls)
+            self.urls.append(url)
+            self.titles.append(record.get('title'))
+            self.positions.append((source_index, position))
+            self.scores.append(score)
+            self.topics.append(list(record.get('topics') or []))
+            self.sources.append({source_name})
+            self.occurrences.append(1)
+            text = f"{record.get('title') or ''} {record.get('description') or ''}"
+            self.signatures.append(self.hasher.signature(shingles(text)))
+            return
+        self.occurrences[doc] += 1
+        self.sources[doc].add(source_name)
+        for topic in record.get('topics') or []:
+            if topic not in self.topics[doc]:
+                self.topics[doc].append(topic)
+        # À complétude égale, la version la plus récente (fichier / ligne plus loin) l'emporte
+        if score >= self.scores[doc]:
+            self.scores[doc] = score
+            self.positions[doc] = (source_index, position)
+            self.titles[doc] = record.get('title')
+            text = f"{record.get('title') or ''} {record.get('description') or ''}"
+            self.signatures[doc] = self.hasher.signature(shingles(text))
+
+    def similarity(self, i, j):
+        """Jaccard estimé entre deux cours (part des valeurs MinHash égales)."""
+        return float(np.mean(self.signatures[i] == self.signatures[j]))
+
+    def near_duplicates(self, threshold=DEFAULT_THRESHOLD):
+        """
+        Groupes de quasi-doublons par LSH : deux cours sont candidats s'ils partagent au moins
+        une bande de leur signature, puis retenus si leur Jaccard estimé atteint `threshold`.
+        Renvoie (groupes, similarités des paires retenues).
+        """
+        buckets = [{} for _ in range(self.bands)]
+        for doc, signature in enumerate(self.signatures):
+            if signature is None:
+                continue
+            for band in range(self.bands):
+                key = signature[band * self.rows:(band + 1) * self.rows].tobytes()
+                buckets[band].setdefault(key, []).append(doc)
+
+        union_find, pairs, checked = UnionFind(), {}, set()
+        for band_buckets in buckets:
+            for members in band_buckets.values():
+                if len(members) < 2:
+                    continue
+                if len(members) * (len(members) - 1) // 2 <= MAX_BUCKET_PAIRS:
+                    candidates = [(a, b) for k, a in enumerate(members) for b in members[k + 1:]]
+                else:
+                    candidates = list(zip(members, members[1:]))
+                for pair in candidates:
+                    if pair in checked:
+                        continue
+                    checked.add(pair)
+                    similarity = self.similarity(*pair)
+                    if similarity >= threshold:
+                        pairs[pair] = similarity
+                        union_find.union(*pair)
+        return union_find.groups(), pairs
+
+
+def _write_records(output_path, records):
+    """Écrit les cours fusionnés en flux : JSONL directement, ou JSON / Parquet via record_stream.compact."""
+    if output_path.endswith('.jsonl'):
+        stream_path = output_path
+    else:
+        stream_path = output_path + '.merge.jsonl'
+    with JsonlSink(stream_path, fsync_every=10000, fsync_interval=60.0) as sink:
+        for record in records:
+            sink.write(record)
+    if stream_path != output_path:
+        compact(stream_path, output_path)
+        os.remove(stream_path)
+
+
+def merge_datasets(inputs, output_path, report_path=None, threshold=DEFAULT_THRESHOLD, num_perm=DEFAULT_NUM_PERM,
+                   bands=DEFAULT_BANDS, drop_near_duplicates=False):
+    """
+    Fusionne des fichiers de scraping (.json / .jsonl) en un jeu de données global, en deux passages
+    en flux (un seul fichier d'entrée en mémoire à la fois) :
+      1. index des cours par URL normalisée (doublons exacts) et signatures MinHash ;
+      2. réécriture de la version la plus complète de chaque cours, avec l'union de ses topics.
+    Les quasi-doublons (titre + description proches, URLs différentes) sont signalés dans le
+    rapport, et retirés de la sortie avec `drop_near_duplicates` (le plus complet est gardé).
+    Renvoie le rapport (dict).
+    """
+    t0 = time.perf_counter()
+    index = CourseIndex(num_perm, bands)
+    for source_index, path in enumerate(inputs):
+        for position, record in enumerate(iter_records(path)):
+            index.add(record, source_index, position, os.path.basename(path))
+
+    groups, pairs = index.near_duplicates(threshold)
+    dropped = {}
+    if drop_near_duplicates:
+        for members in groups:
+            keep = max(members, key=lambda doc: (index.scores[doc], -doc))
+            for doc in members:
+                if doc == keep:
+                    continue
+                dropped[doc] = keep
+                for topic in index.topics[doc]:
+                    if topic not in index.topics[keep]:
+                        index.topics[keep].append(topic)
+
+    wanted = {}
+    for doc, position in enumerate(index.positions):
+        if doc not in dropped:
+            wanted.setdefault(position[0], {})[position[1]] = doc
+
+    def merged_records():
+        for source_index, path in enumerate(inputs):
+            selected = wanted.get(source_index)
+            if not selected:
+                continue
+            for position, record in enumerate(iter_records(path)):
+                doc = selected.get(position)
+                if doc is not None:
+                    yield dict(record, url=index.urls[doc], topics=index.topics[doc])
+
+    _write_records(output_path, merged_records())
+
+    group_of = {doc: g for g, members in enumerate(groups) for doc in members}
+    group_pairs = [[] for _ in groups]
+    for (a, b), similarity in sorted(pairs.items()):
+        group_pairs[group_of[a]].append({'a': index.urls[a], 'b': index.urls[b], 'similarity': round(similarity, 3)})
+
+    report = {
+        'inputs': list(inputs),
+        'output': output_path,
+        'records_read': index.records_read,
+        'records_without_url': index.without_url,
+        'unique_urls': len(index.urls),
+        'exact_duplicates': index.records_read - index.without_url - len(index.urls),
+        'near_duplicate_groups': len(groups),
+        'near_duplicates_dropped': len(dropped),
+        'courses_written': len(index.urls) - len(dropped),
+        'threshold': threshold,
+        'elapsed_seconds': time.perf_counter() - t0,
+        'exact': [
+            {'url': index.urls[doc], 'occurrences': index.occurrences[doc], 'sources': sorted(index.sources[doc])}
+            for doc in range(len(index.urls)) if index.occurrences[doc] > 1
+        ],
+        'near': [
+            {
+                'courses': [{'url': index.urls[doc], 'title': index.titles[doc], 'kept': doc not in dropped}
+                            for doc in members],
+                'pairs': group_pairs[g],
+            }
+            for g, members in enumerate(groups)
+        ],
+    }
+    if report_path:
+        with open(report_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fusion des fichiers de scraping en un jeu de données global, avec détection des doublons.")
+    parser.add_argument("output", help="Jeu de données global à écrire (.json, .jsonl ou .parquet).")
+    parser.add_argument("inputs", nargs="+", help="Fichiers de scraping (.json / .jsonl), ex : 'udemy-microsoft AI.json'.")
+    parser.add_argument("--report", default="duplicates_report.json",
+                        help="Rapport des doublons exacts et quasi-doublons (défaut : duplicates_report.json).")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Similarité de Jaccard (titre + description) des quasi-doublons (défaut : 0.8).")
+    parser.add_argument("--num-perm", type=int, default=DEFAULT_NUM_PERM, help="Taille des signatures MinHash (défaut : 64).")
+    parser.add_argument("--bands", type=int, default=DEFAULT_BANDS, help="Nombre de bandes LSH (défaut : 16).")
+    parser.add_argument("--drop-near-duplicates", action="store_true",
+                        help="Ne garder que le cours le plus complet de chaque groupe de quasi-doublons.")
+    args = parser.parse_args()
+
+    report = merge_datasets(args.inputs, args.output, args.report, threshold=args.threshold, num_perm=args.num_perm,
+                            bands=args.bands, drop_near_duplicates=args.drop_near_duplicates)
+    print(f"{report['records_read']} enregistrements lus dans {len(args.inputs)} fichiers en {report['elapsed_seconds']:.1f}s.")
+    print(f"  {report['unique_urls']} cours uniques, {report['exact_duplicates']} doublons exacts (même URL), "
+          f"{report['records_without_url']} sans URL ignorés.")
+    print(f"  {report['near_duplicate_groups']} groupes de quasi-doublons (seuil {args.threshold}), "
+          f"{report['near_duplicates_dropped']} retirés.")
+    print(f"  {report['courses_written']} cours écrits dans {args.output} ; rapport : {args.report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+import re
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+UNKNOWN = "Inconnu"
+FREE_WORDS = ('free', 'gratuit', 'gratuite')
+NULL_WORDS = ('', 'null', 'none', 'nan')
+
+# Premier nombre d'un texte ("19.99", "19,99 €", "76% off", "4.6 out of 5")
+NUMBER_PATTERN = r'(?P<number>\d+(?:[.,]\d+)?)'
+# Virgule de milliers anglaise ("1,299.99", "12,345 students") : suivie de 3 chiffres exactement
+THOUSANDS_PATTERN = r',(\d{3})(\D|$)'
+# Règle des chargeurs d'origine : "certif" dans la catégorie, mais seulement certificat(e) ou
+# "aws certified" dans le titre ("Microsoft Certified: ..." reste un cours)
+CERTIFICATE_IN_CATEGORY = r'certif'
+CERTIFICATE_IN_TITLE = r'certificate|certificat|aws certified'
+# Chaînes stockées par Arrow : les opérations de texte s'exécutent en C (RE2) sur toute la colonne
+TEXT_DTYPE = 'string[pyarrow]'
+
+
+def _text(series):
+    """Colonne en tableau Arrow de texte minuscule sans espaces autour ; valeurs absentes -> null."""
+    text = pa.array(series.astype(TEXT_DTYPE))
+    text = pc.utf8_lower(pc.utf8_trim_whitespace(text))
+    return pc.if_else(pc.is_in(text, value_set=pa.array(NULL_WORDS)), pa.scalar(None, pa.string()), text)
+
+
+def _numeric_fast_path(series):
+    """Valeurs déjà numériques (int/float JSON) converties sans passer par les expressions régulières."""
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        return series.astype('float64')
+    return None
+
+
+def _to_float(array, index):
+    return pd.Series(pc.cast(array, pa.float64()).to_numpy(zero_copy_only=False), index=index)
+
+
+def to_number(series):
+    """Premier nombre de chaque valeur, en float64 (NaN si absent ou illisible)."""
+    numeric = _numeric_fast_path(series)
+    if numeric is not None:
+        return numeric
+    text = pc.replace_substring(pc.replace_substring(_text(series), ' ', ''), '\xa0', '')
+    text = pc.replace_substring_regex(text, THOUSANDS_PATTERN, r'\1\2')
+    number = pc.struct_field(pc.extract_regex(text, NUMBER_PATTERN), [0])
+    return _to_float(pc.replace_substring(number, ',', '.'), series.index)
+
+
+def to_count(series):
+    """Nombre entier (inscrits...) : chiffres de la valeur, en Int64 nullable."""
+    numeric = _numeric_fast_path(series)
+    if numeric is None:
+        digits = pc.replace_substring_regex(_text(series), r'\D', '')
+        digits = pc.if_else(pc.equal(digits, ''), pa.scalar(None, pa.string()), digits)
+        numeric = _to_float(digits, series.index)
+    return numeric.round().astype('Int64')
+
+
+def is_free(series):
+    """Vrai quand le prix est explicitement "free" / "gratuit"."""
+    free = pc.is_in(_text(series), value_set=pa.array(FREE_WORDS))
+    return pd.Series(free.to_numpy(zero_copy_only=False), index=series.index)
+
+
+def to_price(series):
+    """Prix numérique : gratuit, absent ou illisible -> 0.0."""
+    return to_number(series).fillna(0.0)
+
+
+def course_type(category, title):
+    """'Certificat' si la catégorie ou le titre désigne une certification, sinon 'Cours'."""
+    certificate = pc.or_(
+        pc.fill_null(pc.match_substring_regex(_text(category), CERTIFICATE_IN_CATEGORY), False),
+        pc.fill_null(pc.match_substring_regex(_text(title), CERTIFICATE_IN_TITLE), False),
+    )
+    return pd.Series(pd.array(pc.if_else(certificate, "Certificat", "Cours"), dtype=TEXT_DTYPE), index=category.index)
+
+
+def fill_unknown(series):
+    """Texte, "Inconnu" pour les valeurs absentes ou vides."""
+    text = series.astype(TEXT_DTYPE).str.strip()
+    return text.mask(text == '').fillna(UNKNOWN)
+
+
+def fill_text(series):
+    return series.astype(TEXT_DTYPE).fillna('')
+
+
+def _column(df, name, fallback=None):
+    if name in df.columns:
+        column = df[name]
+        if fallback is not None and fallback in df.columns:
+            column = column.where(column.notna() & (column.astype(TEXT_DTYPE) != ''), df[fallback])
+        return column
+    if fallback is not None and fallback in df.columns:
+        return df[fallback]
+    return pd.Series([None] * len(df), index=df.index, dtype=object)
+
+
+def normalize_frame(df):
+    """
+    Normalise un DataFrame de cours bruts (scraper ou jeu de données fusionné), colonne par
+    colonne et sans boucle Python par ligne. Renvoie les colonnes scalaires du jeu de données :
+    texte, catégorie / niveau / langue ("Inconnu" si absent), type Cours / Certificat,
+    prix (float, gratuit -> 0.0), note, inscrits, durée, réduction.
+    """
+    raw_price = _column(df, 'current_price', 'price')
+    title = _column(df, 'title')
+    category = _column(df, 'category')
+    return pd.DataFrame({
+        'url': _column(df, 'url').astype(TEXT_DTYPE),
+        'title': fill_text(title),
+        'description': fill_text(_column(df, 'description')),
+        'category': fill_unknown(category),
+        'level': fill_unknown(_column(df, 'level')),
+        'language': fill_unknown(_column(df, 'language', 'course_language')),
+        'type': course_type(category, title),
+        'current_price': raw_price.astype(TEXT_DTYPE),
+        'price': to_price(raw_price),
+        'is_free': is_free(raw_price),
+        'original_price': to_number(_column(df, 'original_price')),
+        'discount_percentage': to_number(_column(df, 'discount_percentage')),
+        'rating': to_number(_column(df, 'rating')),
+        'students_enrolled': to_count(_column(df, 'students_enrolled')),
+        'duration_hours': to_number(_column(df, 'duration_hours')),
+    }, index=df.index)
+
+
+# --- Version de référence, une ligne à la fois (ancienne approche des loaders, via .apply) ---
+
+def _number_reference(value):
+    if value is None or isinstance(value, bool) or (isinstance(value, float) and np.isnan(value)):
+        return np.nan
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value).strip().lower()
+    if text in NULL_WORDS:
+        return np.nan
+    text = re.sub(THOUSANDS_PATTERN, r'\1\2', text.replace('\xa0', '').replace(' ', ''))
+    match = re.search(NUMBER_PATTERN, text)
+    return float(match.group(1).replace(',', '.')) if match else np.nan
+
+
+def _price_reference(value):
+    number = _number_reference(value)
+    return 0.0 if np.isnan(number) else number
+
+
+def _count_reference(value):
+    number = _number_reference(value) if isinstance(value, (int, float)) else np.nan
+    if not np.isnan(number):
+        return round(number)
+    digits = re.sub(r'\D', '', str(value)) if value is not None else ''
+    return int(digits) if digits else pd.NA
+
+
+def _type_reference(row):
+    category, title = str(row.get('category') or '').lower(), str(row.get('title') or '').lower()
+    if re.search(CERTIFICATE_IN_CATEGORY, category) or re.search(CERTIFICATE_IN_TITLE, title):
+        return "Certificat"
+    return "Cours"
+
+
+def normalize_frame_reference(df):
+    """Même résultat que normalize_frame, calculé ligne par ligne ; sert de référence au benchmark."""
+    raw_price = _column(df, 'current_price', 'price')
+    return pd.DataFrame({
+        'price': raw_price.apply(_price_reference),
+        'is_free': raw_price.apply(lambda v: isinstance(v, str) and v.strip().lower() in FREE_WORDS),
+        'rating': _column(df, 'rating').apply(_number_reference),
+        'students_enrolled': _column(df, 'students_enrolled').apply(_count_reference).astype('Int64'),
+        'type': df.apply(_type_reference, axis=1),
+        'category': _column(df, 'category').apply(
+            lambda v: UNKNOWN if v is None or (isinstance(v, float) and np.isnan(v)) or not str(v).strip()
+            else str(v).strip()),
+    }, index=df.index)
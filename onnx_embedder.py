@@ -0,0 +1,189 @@
+import argparse
+import inspect
+import json
+import os
+import time
+
+import numpy as np
+import onnxruntime as ort
+from tokenizers import Tokenizer
+
+from embedding_cache import namespace
+
+ONNX_ROOT = "onnx_models"
+BACKENDS = ('torch', 'onnx')
+# Backend par défaut des applications : "onnx" sur les serveurs sans GPU
+DEFAULT_BACKEND = os.environ.get("EMBEDDING_BACKEND", "torch")
+MODEL_FILE = "model.onnx"
+QUANTIZED_FILE = "model.int8.onnx"
+CONFIG_FILE = "embedder.json"
+TOKENIZER_FILE = "tokenizer.json"
+POOLING_MODES = ('mean', 'cls')
+
+
+def embedder_id(model_name, backend=DEFAULT_BACKEND):
+    """
+    Identifiant d'un encodeur pour le cache d'embeddings et le manifeste Chroma : les vecteurs
+    du modèle quantifié sont proches de ceux de PyTorch mais pas identiques, ils ne sont pas mélangés.
+    """
+    return model_name if backend == 'torch' else f"{model_name}@onnx-int8"
+
+
+def model_dir(model_name, root=ONNX_ROOT):
+    return os.path.join(root, namespace(model_name, 'onnx'))
+
+
+def _pooling_mode(pooling):
+    """Mode d'un module Pooling : get_pooling_mode_str() avant sentence-transformers 6, attribut pooling_mode ensuite."""
+    if hasattr(pooling, 'get_pooling_mode_str'):
+        return pooling.get_pooling_mode_str()
+    mode = pooling.pooling_mode
+    return mode if isinstance(mode, str) else '+'.join(mode)
+
+
+def export_onnx(model_name, output_dir=None, opset=17):
+    """
+    Exporte le transformeur d'un modèle SentenceTransformer en ONNX (axes lot / séquence dynamiques),
+    puis le quantifie en int8 (quantification dynamique des poids, activations quantifiées à la volée).
+    Le tokenizer et la configuration du pooling sont écrits à côté. Renvoie le dossier du modèle.
+    """
+    # Imports locaux : PyTorch n'est nécessaire que pour l'export, pas pour l'inférence
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from sentence_transformers import SentenceTransformer
+    from sentence_transformers.models import Normalize, Pooling
+
+    model = SentenceTransformer(model_name, device='cpu')
+    # OnnxEmbedder ne sait refaire que ces poolings : un autre mode donnerait des vecteurs différents
+    pooling = next((_pooling_mode(module) for module in model if isinstance(module, Pooling)), None)
+    if pooling not in POOLING_MODES:
+        raise ValueError(f"Pooling {pooling!r} de {model_name} non pris en charge par l'export ONNX "
+                         f"(attendu : {', '.join(POOLING_MODES)}).")
+    output_dir = output_dir or model_dir(model_name)
+    os.makedirs(output_dir, exist_ok=True)
+    tokenizer = model.tokenizer
+    tokenizer.save_pretrained(output_dir)
+    sample = tokenizer(["exemple de phrase"], return_tensors='pt')
+    input_names = [name for name in ('input_ids', 'attention_mask', 'token_type_ids') if name in sample]
+
+    class Transformer(torch.nn.Module):
+        def __init__(self, auto_model):
+            super().__init__()
+            self.auto_model = auto_model
+
+        def forward(self, *inputs):
+            return self.auto_model(**dict(zip(input_names, inputs))).last_hidden_state
+
+    model_path = os.path.join(output_dir, MODEL_FILE)
+    axes = {0: 'batch', 1: 'sequence'}
+    torch.onnx.export(
+        Transformer(model[0].auto_model.eval()),
+        tuple(sample[name] for name in input_names),
+        model_path,
+        input_names=input_names,
+        output_names=['last_hidden_state'],
+        dynamic_axes={name: axes for name in input_names + ['last_hidden_state']},
+        opset_version=opset,
+        # Exporteur TorchScript (dynamic_axes) : celui par défaut depuis torch 2.9 (dynamo) exige onnxscript
+        **({'dynamo': False} if 'dynamo' in inspect.signature(torch.onnx.export).parameters else {}),
+    )
+    quantize_dynamic(model_path, os.path.join(output_dir, QUANTIZED_FILE), weight_type=QuantType.QInt8)
+
+    config = {
+        'model': model_name,
+        'inputs': input_names,
+        'pooling': pooling,
+        'normalize': any(isinstance(module, Normalize) for module in model),
+        'max_seq_length': model.max_seq_length,
+        'dim': model.get_sentence_embedding_dimension(),
+        'pad_token': tokenizer.pad_token,
+        'pad_id': tokenizer.pad_token_id,
+    }
+    with open(os.path.join(output_dir, CONFIG_FILE), 'w', encoding='utf-8') as f:
+        json.dump(config, f, indent=2)
+    return output_dir
+
+
+class OnnxEmbedder:
+    """
+    Encodeur de phrases exécuté par ONNX Runtime sur CPU (modèle int8 par défaut), avec la même
+    méthode encode() que SentenceTransformer : les appelants (chatbot, prediction_ML, index Chroma,
+    cache d'embeddings) n'ont pas à changer. Les textes sont regroupés par longueur pour limiter
+    le remplissage des lots ; pooling et normalisation reprennent ceux du modèle exporté.
+    """
+
+    def __init__(self, directory, quantized=True, threads=None):
+        with open(os.path.join(directory, CONFIG_FILE), 'r', encoding='utf-8') as f:
+            self.config = json.load(f)
+        self.tokenizer = Tokenizer.from_file(os.path.join(directory, TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(max_length=self.config['max_seq_length'])
+        self.tokenizer.enable_padding(pad_id=self.config['pad_id'], pad_token=self.config['pad_token'])
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.model_path = os.path.join(directory, QUANTIZED_FILE if quantized else MODEL_FILE)
+        self.session = ort.InferenceSession(self.model_path, options, providers=['CPUExecutionProvider'])
+
+    def get_sentence_embedding_dimension(self):
+        return self.config['dim']
+
+    def _embed(self, texts):
+        encodings = self.tokenizer.encode_batch(texts)
+        feeds = {
+            'input_ids': np.array([e.ids for e in encodings], dtype=np.int64),
+            'attention_mask': np.array([e.attention_mask for e in encodings], dtype=np.int64),
+            'token_type_ids': np.array([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        (hidden,) = self.session.run(None, {name: feeds[name] for name in self.config['inputs']})
+        if self.config['pooling'] == 'cls':
+            return hidden[:, 0]
+        mask = feeds['attention_mask'][:, :, None].astype(np.float32)
+        return (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+
+    def encode(self, sentences, batch_size=32, normalize_embeddings=False, **kwargs):
+        """Embeddings float32 (une ligne par texte, un vecteur pour un texte seul). Les autres options de SentenceTransformer sont ignorées."""
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        embeddings = np.empty((len(texts), self.config['dim']), dtype=np.float32)
+        order = np.argsort([-len(text) for text in texts], kind='stable')
+        for start in range(0, len(texts), batch_size):
+            batch = order[start:start + batch_size]
+            embeddings[batch] = self._embed([texts[i] for i in batch])
+        if self.config['normalize'] or normalize_embeddings:
+            embeddings /= np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+        return embeddings[0] if single else embeddings
+
+
+def load_encoder(model_name, backend=DEFAULT_BACKEND, device='cpu', root=ONNX_ROOT):
+    """
+    Encodeur de `model_name` pour le backend choisi : SentenceTransformer (PyTorch, sur `device`)
+    ou OnnxEmbedder int8, exporté une fois dans `root` au premier usage.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend d'embeddings inconnu : {backend!r} (attendu : {', '.join(BACKENDS)}).")
+    if backend == 'onnx':
+        directory = model_dir(model_name, root)
+        if not os.path.exists(os.path.join(directory, CONFIG_FILE)):
+            export_onnx(model_name, directory)
+        return OnnxEmbedder(directory)
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name, device=device)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export ONNX et quantification int8 d'un modèle SentenceTransformer.")
+    parser.add_argument("model", nargs="?", default="all-MiniLM-L6-v2")
+    parser.add_argument("--root", default=ONNX_ROOT, help="Dossier des modèles exportés (défaut : onnx_models).")
+    parser.add_argument("--opset", type=int, default=17)
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    directory = export_onnx(args.model, model_dir(args.model, args.root), args.opset)
+    sizes = {name: os.path.getsize(os.path.join(directory, name)) / 1e6 for name in (MODEL_FILE, QUANTIZED_FILE)}
+    print(f"{args.model} exporté dans {directory} en {time.perf_counter() - t0:.0f}s : "
+          f"{sizes[MODEL_FILE]:.0f} Mo (float32) -> {sizes[QUANTIZED_FILE]:.0f} Mo (int8).")
+
+
+if __name__ == "__main__":
+    main()
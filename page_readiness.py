@@ -0,0 +1,149 @@
+import threading
+import time
+
+from selenium.common.exceptions import TimeoutException
+
+# Sélecteurs dont les extracteurs ont besoin, par type de page.
+# "required" : la page n'est pas exploitable sans eux (TimeoutException à l'expiration du budget).
+# "optional" : attendus seulement pendant un court délai de grâce après les sélecteurs requis,
+# car certains cours n'ont pas de réduction, de rating, d'exigences...
+PAGE_SELECTORS = {
+    'listing': {
+        'required': ["div[data-purpose='container']"],
+        'optional': ["h3[data-purpose='course-title-url'] a"],
+    },
+    'detail': {
+        'required': ["div[data-purpose='enrollment']"],
+        'optional': [
+            "div[data-purpose='price-text-container']",
+            "div[data-purpose='course-description']",
+            "span[data-purpose='rating-number']",
+            "div[data-purpose='lead-course-locale']",
+            "h2[data-purpose='requirements-title']",
+            "div.what-you-will-learn--what-will-you-learn--jsm83",
+        ],
+    },
+}
+
+# Budget maximal (secondes) par type de page avant d'abandonner
+PAGE_BUDGETS = {
+    'listing': 30.0,
+    'detail': 20.0,
+}
+
+OPTIONAL_GRACE_SECONDS = 2.0
+POLL_INTERVAL_SECONDS = 0.1
+
+# Un seul aller-retour vers le navigateur par itération : on teste tous les sélecteurs d'un coup
+_PRESENCE_SCRIPT = """
+return arguments[0].map(function (sel) {
+    try { return document.querySelector(sel) !== null; } catch (e) { return false; }
+});
+"""
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    k = (len(sorted_values) - 1) * pct / 100.0
+    low = int(k)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (k - low)
+
+
+class ReadinessStats:
+    """
+    Temps de disponibilité (time-to-ready) mesurés par type de page.
+    Thread-safe, pour être partagé entre les workers du pool.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples = {}
+
+    def record(self, page_type, seconds, outcome):
+        with self._lock:
+            self._samples.setdefault(page_type, []).append((seconds, outcome))
+
+    def summary(self):
+        """Renvoie, par type de page, le nombre de pages, les percentiles et la répartition des issues."""
+        with self._lock:
+            samples = {k: list(v) for k, v in self._samples.items()}
+        result = {}
+        for page_type, values in samples.items():
+            durations = sorted(s for s, _ in values)
+            outcomes = {}
+            for _, outcome in values:
+                outcomes[outcome] = outcomes.get(outcome, 0) + 1
+            result[page_type] = {
+                'count': len(values),
+                'p50': _percentile(durations, 50),
+                'p90': _percentile(durations, 90),
+                'p95': _percentile(durations, 95),
+                'max': durations[-1],
+                'outcomes': outcomes,
+            }
+        return result
+
+    def report(self):
+        print("\n--- Temps de disponibilité des pages (time-to-ready) ---")
+        for page_type, s in self.summary().items():
+            print(
+                f"  {page_type}: {s['count']} pages, p50 {s['p50']:.2f}s, p90 {s['p90']:.2f}s, "
+                f"p95 {s['p95']:.2f}s, max {s['max']:.2f}s, issues {s['outcomes']}"
+            )
+
+
+class PageReadinessWaiter:
+    """
+    Remplace les time.sleep fixes : rend la main dès que les sélecteurs nécessaires
+    aux extracteurs sont présents dans le DOM, dans la limite d'un budget par type de page.
+    """
+
+    def __init__(self, selectors=None, budgets=None, optional_grace=OPTIONAL_GRACE_SECONDS,
+                 poll_interval=POLL_INTERVAL_SECONDS, stats=None):
+        self.selectors = selectors or PAGE_SELECTORS
+        self.budgets = dict(PAGE_BUDGETS, **(budgets or {}))
+        self.optional_grace = optional_grace
+        self.poll_interval = poll_interval
+        self.stats = stats or ReadinessStats()
+
+    def wait(self, driver, page_type):
+        """
+        Attend que la page soit prête et renvoie le temps écoulé en secondes.
+        Lève TimeoutException si les sélecteurs requis n'apparaissent pas dans le budget.
+        """
+        spec = self.selectors[page_type]
+        required = list(spec.get('required', []))
+        optional = list(spec.get('optional', []))
+        all_selectors = required + optional
+        budget = self.budgets[page_type]
+
+        start = time.perf_counter()
+        deadline = start + budget
+        required_ready_at = None
+        while True:
+            present = driver.execute_script(_PRESENCE_SCRIPT, all_selectors) or []
+            if len(present) != len(all_selectors):
+                present = [False] * len(all_selectors)
+            now = time.perf_counter()
+            if all(present[:len(required)]):
+                if required_ready_at is None:
+                    required_ready_at = now
+                if all(present[len(required):]):
+                    self.stats.record(page_type, now - start, 'ready')
+                    return now - start
+                if now - required_ready_at >= self.optional_grace:
+                    # Les sélecteurs optionnels manquants sont probablement absents de cette page
+                    self.stats.record(page_type, now - start, 'partial')
+                    return now - start
+            if now >= deadline:
+                if required_ready_at is not None:
+                    self.stats.record(page_type, now - start, 'partial')
+                    return now - start
+                self.stats.record(page_type, now - start, 'timeout')
+                missing = [sel for sel, ok in zip(required, present) if not ok] or required
+                raise TimeoutException(
+                    f"Page '{page_type}' non prête après {budget:.0f}s (sélecteurs manquants : {missing})"
+                )
+            time.sleep(self.poll_interval)
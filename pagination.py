@@ -0,0 +1,72 @@
+import math
+import re
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# "1,234 results", "1 234 résultats", "12 results for ..."
+_RESULT_TOTAL_RE = re.compile(r'(\d[\d,.\s  ]*)\s*(?:results|résultats)\b', re.IGNORECASE)
+# Liens de pagination : href="...?p=7" ou data-page="7"
+_PAGE_HREF_RE = re.compile(r'href="[^"]*[?&](?:amp;)?p=(\d+)')
+_DATA_PAGE_RE = re.compile(r'data-page=["\'](\d+)["\']')
+# Texte du type "Page 1 of 12" / "1 sur 12" dans le bloc de pagination
+_PAGE_OF_RE = re.compile(r'data-purpose=["\']pagination[^>]*>.*?(?:of|sur)\s*(\d+)', re.IGNORECASE | re.DOTALL)
+
+
+def page_url(base_url, page_num):
+    """URL de la page `page_num` d'une recherche (la page 1 est l'URL de base, sans ?p=)."""
+    parts = urlsplit(base_url)
+    query = [(k, v) for k, v in parse_qsl(parts.query) if k != 'p']
+    if page_num > 1:
+        query.append(('p', str(page_num)))
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), parts.fragment))
+
+
+def parse_result_total(html):
+    """Nombre total de résultats annoncé par la page, ou None s'il n'est pas affiché."""
+    match = _RESULT_TOTAL_RE.search(html)
+    if not match:
+        return None
+    digits = re.sub(r'\D', '', match.group(1))
+    return int(digits) if digits else None
+
+
+def parse_max_page(html):
+    """Numéro de page le plus élevé présent dans le balisage de pagination, ou None."""
+    candidates = [int(n) for n in _PAGE_HREF_RE.findall(html)]
+    candidates += [int(n) for n in _DATA_PAGE_RE.findall(html)]
+    match = _PAGE_OF_RE.search(html)
+    if match:
+        candidates.append(int(match.group(1)))
+    return max(candidates) if candidates else None
+
+
+class PaginationPlan:
+    """Pages de résultats à visiter, et origine du nombre de pages (pour les logs)."""
+
+    def __init__(self, base_url, page_count, source):
+        self.base_url = base_url
+        self.page_count = page_count
+        self.source = source
+
+    @property
+    def urls(self):
+        if self.page_count is None:
+            return []
+        return [page_url(self.base_url, n) for n in range(1, self.page_count + 1)]
+
+
+def plan_listing_pages(base_url, first_page_html, max_pages, page_size=None):
+    """
+    Déduit le nombre de pages de résultats à partir de la première page : total annoncé
+    divisé par le nombre de cartes par page, sinon numéro de page maximal de la pagination.
+    Le résultat est plafonné à `max_pages`. page_count vaut None si rien n'a pu être déduit :
+    l'appelant doit alors se rabattre sur la détection du bouton "page suivante".
+    """
+    total = parse_result_total(first_page_html)
+    if total is not None and page_size:
+        return PaginationPlan(base_url, max(1, min(max_pages, math.ceil(total / page_size))), f"{total} résultats annoncés")
+
+    max_page = parse_max_page(first_page_html)
+    if max_page is not None:
+        return PaginationPlan(base_url, max(1, min(max_pages, max_page)), "balisage de pagination")
+
+    return PaginationPlan(base_url, None, "inconnu")
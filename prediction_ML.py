@@ -1,55 +1,51 @@
 # fichier : app_pricing_evaluation.py
 
 import streamlit as st
-import json
-import pandas as pd
 import numpy as np
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import r2_score, mean_absolute_error, mean_squared_error, max_error
-from sentence_transformers import SentenceTransformer
 import matplotlib.pyplot as plt
 import seaborn as sns
 import joblib
 import os
+from dataset_store import ensure_dataset, load_dataframe
+from embedding_cache import EmbeddingCache
+from onnx_embedder import DEFAULT_BACKEND, embedder_id, load_encoder
 
 # === PARAMÈTRES ===
 DATA_PATH = "/home/mohamed/Bureau/all.json"
 MODEL_PATH = "./price_predictor.joblib"
-EMBEDDINGS_PATH = "./embeddings.npy"
+EMBEDDER_NAME = "all-MiniLM-L6-v2"
+EMBEDDING_BACKEND = DEFAULT_BACKEND   # "onnx" : modèle int8 sur CPU (variable EMBEDDING_BACKEND)
 BATCH_SIZE = 8
 
-# Nettoyage robuste des prix
-def clean_price(price):
-    if price in ['free', 'null', '', None]:
-        return 0.0
-    try:
-        return float(price)
-    except:
-        return 0.0
-
 # Chargement des données
 @st.cache_data
 def load_data():
-    with open(DATA_PATH, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    df = pd.DataFrame(data)
-    df['price'] = df['current_price'].apply(clean_price)
-    df['fulltext'] = df['title'].fillna('') + " " + df['description'].fillna('')
+    # Jeu de données colonnaire (dataset_store.py) construit depuis le JSON / JSONL du scraper ;
+    # le prix y est déjà normalisé (gratuit ou absent -> 0.0)
+    df = load_dataframe(ensure_dataset(DATA_PATH), columns=['url', 'title', 'description', 'price'])
+    df['fulltext'] = df['title'] + " " + df['description']
     return df
 
-# Chargement du modèle de embeddings
+# Chargement du modèle de embeddings (PyTorch ou ONNX int8, même méthode encode())
 @st.cache_resource
 def load_embedder():
-    return SentenceTransformer("all-MiniLM-L6-v2")
+    return load_encoder(EMBEDDER_NAME, EMBEDDING_BACKEND)
+
+# Cache disque des embeddings, partagé avec le chatbot et le notebook
+@st.cache_resource
+def load_embedding_cache():
+    return EmbeddingCache(embedder_id(EMBEDDER_NAME, EMBEDDING_BACKEND))
 
-# Préparation et sauvegarde des embeddings
+# Préparation des embeddings : seuls les textes absents du cache sont encodés
 @st.cache_resource
 def prepare_embeddings(df):
-    embedder = load_embedder()
-    embeddings = embedder.encode(df['fulltext'].tolist(), batch_size=BATCH_SIZE, show_progress_bar=True)
-    np.save(EMBEDDINGS_PATH, embeddings)
-    return embeddings
+    return load_embedding_cache().encode(
+        df['fulltext'].tolist(),
+        lambda texts: load_embedder().encode(texts, batch_size=BATCH_SIZE, show_progress_bar=True),
+    )
 
 # Entrainement et sauvegarde du modèle
 @st.cache_resource
@@ -65,11 +61,10 @@ st.title("💰 Prédiction et Évaluation avancée de Prix IA (Cours & Certifica
 data = load_data()
 
 # Préparer embeddings et modèle
-if not os.path.exists(EMBEDDINGS_PATH):
-    st.info("💾 Calcul des embeddings...")
-    embeddings = prepare_embeddings(data)
-else:
-    embeddings = np.load(EMBEDDINGS_PATH)
+embeddings = prepare_embeddings(data)
+cache_stats = load_embedding_cache().stats()
+st.caption(f"💾 Cache d'embeddings : {cache_stats['entries']} textes, {cache_stats['hits']} trouvés / "
+           f"{cache_stats['misses']} encodés, {cache_stats['evictions']} évincés.")
 
 if not os.path.exists(MODEL_PATH):
     st.info("🔧 Entrainement du modèle...")
@@ -0,0 +1,147 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+import numpy as np
+
+DEFAULT_MAX_EMBEDDINGS = 1024
+DEFAULT_MAX_RESULTS = 1024
+DEFAULT_RESULT_TTL = 600.0
+
+
+def normalize_question(question):
+    """Forme canonique d'une question : Unicode NFKC, minuscules, espaces et ponctuation finale réduits."""
+    text = unicodedata.normalize('NFKC', question).lower()
+    text = re.sub(r'\s+', ' ', text).strip()
+    return text.strip(' ?!.;,')
+
+
+class _LayerStats:
+    """Succès / échecs d'un niveau du cache et temps moyen d'un calcul évité."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.miss_seconds = 0.0
+
+    def saved_seconds(self):
+        return self.hits * self.miss_seconds / self.misses if self.misses else 0.0
+
+    def as_dict(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / lookups if lookups else None,
+            'saved_seconds': self.saved_seconds(),
+        }
+
+
+class QueryCache:
+    """
+    Cache côté requête du chatbot, à deux niveaux :
+      - embeddings des questions (LRU de `max_embeddings`), clé : question normalisée ;
+      - résultats de recherche (LRU de `max_results`, expirés après `ttl` secondes),
+        clé : (embedding, filtres, nombre de résultats).
+    Les résultats sont invalidés dès que le manifeste de l'index Chroma change (synchronisation),
+    les embeddings aussi si le modèle du manifeste change. Thread-safe (partagé entre sessions).
+    """
+
+    def __init__(self, manifest_path=None, max_embeddings=DEFAULT_MAX_EMBEDDINGS, max_results=DEFAULT_MAX_RESULTS,
+                 ttl=DEFAULT_RESULT_TTL):
+        self.manifest_path = manifest_path
+        self.max_embeddings = max_embeddings
+        self.max_results = max_results
+        self.ttl = ttl
+        self._embeddings = OrderedDict()
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+        self._manifest_version = None
+        self._model = None
+        self.embedding_stats = _LayerStats()
+        self.result_stats = _LayerStats()
+        self.invalidations = 0
+
+    def _check_manifest(self):
+        """Vide les résultats (et les embeddings si le modèle a changé) quand le manifeste a été réécrit."""
+        if self.manifest_path is None:
+            return
+        try:
+            stat = os.stat(self.manifest_path)
+            version = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            version = None
+        if version == self._manifest_version:
+            return
+        model = None
+        if version is not None:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                model = json.load(f).get('model')
+        with self._lock:
+            if self._manifest_version is not None:
+                self.invalidations += 1
+            self._results.clear()
+            if model != self._model:
+                self._embeddings.clear()
+            self._manifest_version, self._model = version, model
+
+    def embedding(self, question, encode):
+        """Embedding de la question, calculé par `encode(question)` seulement s'il n'est pas en cache."""
+        self._check_manifest()
+        key = normalize_question(question)
+        with self._lock:
+            vector = self._embeddings.get(key)
+            if vector is not None:
+                self._embeddings.move_to_end(key)
+                self.embedding_stats.hits += 1
+                return vector
+        t0 = time.perf_counter()
+        vector = np.asarray(encode(question), dtype=np.float32)
+        elapsed = time.perf_counter() - t0
+        with self._lock:
+            self.embedding_stats.misses += 1
+            self.embedding_stats.miss_seconds += elapsed
+            self._embeddings[key] = vector
+            self._embeddings.move_to_end(key)
+            while len(self._embeddings) > self.max_embeddings:
+                self._embeddings.popitem(last=False)
+        return vector
+
+    def results(self, embedding, where, n_results, search):
+        """Résultats de `search()` pour (embedding, filtres, n), réutilisés pendant `ttl` secondes."""
+        self._check_manifest()
+        key = (hashlib.sha1(np.asarray(embedding, dtype=np.float32).tobytes()).hexdigest(),
+               json.dumps(where, sort_keys=True), n_results)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._results.get(key)
+            if entry is not None and now - entry[0] < self.ttl:
+                self._results.move_to_end(key)
+                self.result_stats.hits += 1
+                return entry[1]
+        t0 = time.perf_counter()
+        found = search()
+        elapsed = time.perf_counter() - t0
+        with self._lock:
+            self.result_stats.misses += 1
+            self.result_stats.miss_seconds += elapsed
+            self._results[key] = (now, found)
+            self._results.move_to_end(key)
+            while len(self._results) > self.max_results:
+                self._results.popitem(last=False)
+        return found
+
+    def stats(self):
+        with self._lock:
+            embeddings, results = self.embedding_stats.as_dict(), self.result_stats.as_dict()
+            return {
+                'embeddings': dict(embeddings, size=len(self._embeddings)),
+                'results': dict(results, size=len(self._results)),
+                'saved_seconds': embeddings['saved_seconds'] + results['saved_seconds'],
+                'invalidations': self.invalidations,
+            }
@@ -0,0 +1,70 @@
+import asyncio
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+class TokenBucket:
+    """
+    Seau à jetons : `rate` requêtes par seconde en régime établi, avec des rafales
+    jusqu'à `burst`. reserve() réserve un jeton et renvoie le délai à attendre avant
+    de l'utiliser, ce qui sert aussi bien aux threads qu'aux coroutines.
+    """
+
+    def __init__(self, rate, burst=1):
+        if rate <= 0:
+            raise ValueError("rate doit être > 0")
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            # Jetons négatifs = file d'attente : chaque réservation attend son tour
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+
+class HostRateLimiter:
+    """
+    Limite de débit globale par hôte, partagée par le navigateur et le client HTTP :
+    toutes les requêtes vers un même hôte passent par le même seau à jetons.
+    """
+
+    def __init__(self, rate_per_host=1.0, burst=2):
+        self.rate_per_host = rate_per_host
+        self.burst = burst
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self.waited_seconds = 0.0
+
+    def _bucket(self, url):
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = self._buckets[host] = TokenBucket(self.rate_per_host, self.burst)
+            return bucket
+
+    def _reserve(self, url):
+        delay = self._bucket(url).reserve()
+        if delay:
+            with self._lock:
+                self.waited_seconds += delay
+        return delay
+
+    def wait(self, url):
+        """Bloque le thread courant jusqu'à ce qu'une requête vers l'hôte de `url` soit autorisée."""
+        delay = self._reserve(url)
+        if delay:
+            time.sleep(delay)
+
+    async def wait_async(self, url):
+        delay = self._reserve(url)
+        if delay:
+            await asyncio.sleep(delay)
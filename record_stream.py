@@ -0,0 +1,139 @@
+import json
+import os
+import threading
+import time
+
+
+class JsonlSink:
+    """
+    Écrit les cours au fil de l'eau, un enregistrement JSON par ligne.
+    Chaque ligne est envoyée au système dès son écriture ; un fsync est fait tous les
+    `fsync_every` enregistrements ou toutes les `fsync_interval` secondes, et à la fermeture.
+    """
+
+    def __init__(self, path, fsync_every=20, fsync_interval=5.0, mode='w'):
+        self.path = path
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.count = 0
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._lock = threading.Lock()
+        self._file = open(path, mode, encoding='utf-8')
+
+    def write(self, record):
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            self.count += 1
+            self._unsynced += 1
+            if self._unsynced >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+                self._sync()
+
+    def _sync(self):
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.flush()
+            self._sync()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def _iter_jsonl(path):
+    """
+    (position en octets, enregistrement) pour chaque ligne d'un fichier JSONL. Une dernière
+    ligne tronquée (crawl interrompu) est ignorée, même suivie de lignes vides.
+    """
+    with open(path, 'rb') as f:
+        offset = 0
+        for line_num, line in enumerate(f, start=1):
+            start, offset = offset, offset + len(line)
+            if not line.strip():
+                continue
+            try:
+                yield start, json.loads(line)
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                # Seule la dernière ligne non vide peut être incomplète ; ailleurs, c'est une vraie erreur
+                if any(rest.strip() for rest in f):
+                    raise
+                print(f"⚠️ Dernière ligne incomplète ignorée dans '{path}' (ligne {line_num}).")
+
+
+def iter_records(path):
+    """
+    Itère sur les enregistrements d'un fichier de cours, au format JSONL (une ligne par cours)
+    ou JSON classique (liste). Une dernière ligne JSONL tronquée (crawl interrompu) est ignorée.
+    """
+    if path.endswith('.jsonl'):
+        for _, record in _iter_jsonl(path):
+            yield record
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            yield from json.load(f)
+
+
+def load_records(path):
+    """Charge tous les enregistrements d'un fichier .json ou .jsonl dans une liste."""
+    return list(iter_records(path))
+
+
+def iter_latest_records(path, key='url'):
+    """
+    Itère sur les enregistrements en ne gardant, pour chaque `key`, que la dernière version
+    écrite (un cours peut être réécrit dans le flux, ex : topic ajouté en cours de crawl),
+    à la position de sa première apparition. Pour un JSONL, seules les clés et la position
+    (en octets) de leur dernière version sont gardées en mémoire : chaque version retenue est
+    relue à sa position. Un fichier JSON classique est, lui, chargé en entier.
+    """
+    if not path.endswith('.jsonl'):
+        latest = {}
+        for record in iter_records(path):
+            # Une clé déjà vue garde sa place dans le dict : ordre de première apparition
+            latest[record.get(key)] = record
+        yield from latest.values()
+        return
+    latest_offset = {}
+    for offset, record in _iter_jsonl(path):
+        latest_offset[record.get(key)] = offset
+    with open(path, 'rb') as f:
+        for offset in latest_offset.values():
+            f.seek(offset)
+            yield json.loads(f.readline())
+
+
+def compact(jsonl_path, output_path):
+    """
+    Convertit un flux JSONL en fichier final : JSON indenté (.json) ou Parquet (.parquet,
+    nécessite pyarrow), avec une seule version par URL. Renvoie le nombre d'enregistrements écrits.
+    """
+    if output_path.endswith('.parquet'):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        records = list(iter_latest_records(jsonl_path))
+        pq.write_table(pa.Table.from_pylist(records), output_path)
+        return len(records)
+
+    count = 0
+    tmp_path = output_path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write("[")
+        for record in iter_latest_records(jsonl_path):
+            f.write(",\n" if count else "\n")
+            f.write(json.dumps(record, ensure_ascii=False, indent=4))
+            count += 1
+        f.write("\n]\n" if count else "]\n")
+    os.replace(tmp_path, output_path)
+    return count
@@ -0,0 +1,162 @@
+import argparse
+import os
+import posixpath
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote, unquote, urlsplit
+
+from html_archive import HtmlArchive
+
+UDEMY_ORIGIN = "https://www.udemy.com"
+# Caractères de la chaîne de requête gardés tels quels dans le nom du fichier sauvegardé
+_QUERY_SAFE = "=&-_.,"
+
+
+def page_path(root, url):
+    """
+    Chemin du fichier HTML sauvegardé pour une URL : le chemin de l'URL est reproduit
+    sous `root`, avec un index.html final (ex : /course/python/ -> root/course/python/index.html).
+    La chaîne de requête fait partie de la clé : /courses/search/?q=ai&p=2 est sauvegardée dans
+    root/courses/search/index-q=ai&p=2.html, chaque page de résultats a donc son propre fichier.
+    """
+    parts = urlsplit(url)
+    # Chemin normalisé comme une racine : "/../../x/" reste sous `root`
+    path = posixpath.normpath('/' + parts.path).strip('/')
+    # Requête décodée puis réencodée : "?q=ai 102" et "?q=ai%20102" donnent le même fichier
+    name = f"index-{quote(unquote(parts.query), safe=_QUERY_SAFE)}.html" if parts.query else 'index.html'
+    full_path = os.path.join(root, path, name) if path else os.path.join(root, name)
+    # Dernier garde-fou (liens symboliques compris) : jamais de fichier hors du dossier des pages
+    real_root = os.path.realpath(root)
+    if os.path.commonpath([real_root, os.path.realpath(full_path)]) != real_root:
+        raise ValueError(f"Chemin hors du dossier des pages sauvegardées : {url!r}")
+    return full_path
+
+
+def saved_pages(root):
+    """Parcourt les pages sauvegardées sous `root` : (URL Udemy, chemin du fichier), inverse de page_path()."""
+    for dirpath, _, filenames in os.walk(root):
+        path = os.path.relpath(dirpath, root).replace(os.sep, '/')
+        base = UDEMY_ORIGIN + ('/' if path == '.' else f"/{path}/")
+        for filename in filenames:
+            if filename == 'index.html':
+                yield base, os.path.join(dirpath, filename)
+            elif filename.startswith('index-') and filename.endswith('.html'):
+                yield f"{base}?{unquote(filename[len('index-'):-len('.html')])}", os.path.join(dirpath, filename)
+
+
+def save_page(root, url, html):
+    """Sauvegarde le HTML d'une page pour pouvoir la rejouer plus tard."""
+    path = page_path(root, url)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(html)
+    return path
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    """
+    Sert les pages sauvegardées sous `server.root`, ou celles de `server.archive` (HtmlArchive)
+    si elle est définie ; 404 si la page n'existe pas. Chaque réponse est retardée de
+    `server.latency` ± `server.jitter` secondes, et une fraction `server.error_rate` des
+    requêtes reçoit `server.error_status` à la place de la page.
+    """
+
+    protocol_version = 'HTTP/1.1'
+    # En-têtes et corps partent en deux écritures : sans TCP_NODELAY, l'ACK retardé ajoute ~40 ms par page
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            delay = max(0.0, server.latency + server.rng.uniform(-server.jitter, server.jitter))
+            inject_error = server.rng.random() < server.error_rate
+        if delay:
+            time.sleep(delay)
+        if inject_error:
+            with server.lock:
+                server.injected_errors += 1
+            self._send(server.error_status, b'injected error')
+            return
+        body = self._load_page()
+        with server.lock:
+            server.served += 1
+        if body is None:
+            self._send(404, b'not found')
+            return
+        self._send(200, body)
+
+    def _load_page(self):
+        if self.server.archive is not None:
+            html = self.server.archive.get(UDEMY_ORIGIN + self.path)
+            return html.encode('utf-8') if html is not None else None
+        try:
+            path = page_path(self.server.root, self.path)
+        except ValueError:
+            return None
+        if not os.path.isfile(path):
+            return None
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def _send(self, status, body):
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def create_replay_server(root=None, host='127.0.0.1', port=0, latency=0.0, jitter=0.0, error_rate=0.0,
+                         error_status=503, archive=None, seed=None):
+    """Crée le serveur (sans le démarrer) ; `archive` : HtmlArchive à servir à la place de `root`."""
+    server = ThreadingHTTPServer((host, port), ReplayHandler)
+    server.root = root
+    server.archive = archive
+    server.latency = latency
+    server.jitter = jitter
+    server.error_rate = error_rate
+    server.error_status = error_status
+    server.rng = random.Random(seed)
+    server.lock = threading.Lock()
+    server.served = 0
+    server.injected_errors = 0
+    server.daemon_threads = True
+    return server
+
+
+def start_replay_server(root=None, host='127.0.0.1', port=0, **options):
+    """
+    Démarre le serveur dans un thread et le renvoie ; son origine est
+    f"http://{host}:{server.server_address[1]}". Arrêt avec server.shutdown().
+    Les options (latency, jitter, error_rate, error_status, archive, seed) sont celles de create_replay_server.
+    """
+    server = create_replay_server(root, host, port, **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serveur local qui rejoue des pages Udemy sauvegardées.")
+    parser.add_argument("root", help="Dossier des pages sauvegardées, ou dossier d'une archive HTML avec --archive.")
+    parser.add_argument("--archive", action="store_true", help="Servir les pages d'une archive html_archive.py.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Latence ajoutée à chaque réponse (ms).")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Variation aléatoire de la latence, ± (ms).")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction des requêtes en erreur (0 à 1).")
+    parser.add_argument("--error-status", type=int, default=503, help="Statut HTTP des erreurs injectées (défaut : 503).")
+    parser.add_argument("--seed", type=int, default=None, help="Graine du tirage latence/erreurs, pour des runs reproductibles.")
+    args = parser.parse_args()
+    archive = HtmlArchive(args.root) if args.archive else None
+    server = create_replay_server(
+        None if args.archive else args.root, args.host, args.port,
+        latency=args.latency_ms / 1000, jitter=args.jitter_ms / 1000,
+        error_rate=args.error_rate, error_status=args.error_status, archive=archive, seed=args.seed,
+    )
+    print(f"Pages de '{args.root}' servies sur http://{args.host}:{args.port}")
+    server.serve_forever()
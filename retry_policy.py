@@ -0,0 +1,180 @@
+import os
+import random
+import threading
+import time
+from collections import deque
+
+from selenium.common.exceptions import InvalidArgumentException
+
+from record_stream import JsonlSink, iter_records
+
+# Erreurs qui ne se corrigeront pas en réessayant : URL invalide, bug d'extraction...
+FATAL_ERRORS = (InvalidArgumentException, KeyError, TypeError, AttributeError, ValueError)
+# Statuts HTTP définitifs (page supprimée) ; les autres échecs HTTP (403, 429, 5xx) sont retentés
+FATAL_HTTP_STATUSES = (404, 410)
+
+
+class HttpStatusError(Exception):
+    """Réponse HTTP inexploitable, avec son statut pour la classification."""
+
+    def __init__(self, status, message=None):
+        super().__init__(message or f"HTTP {status}")
+        self.status = status
+
+
+def is_retryable(error):
+    """Vrai si l'erreur est transitoire (délai dépassé, navigateur ou réseau instable, blocage temporaire)."""
+    if isinstance(error, HttpStatusError):
+        return error.status not in FATAL_HTTP_STATUSES
+    return not isinstance(error, FATAL_ERRORS)
+
+
+class CircuitBreaker:
+    """
+    Coupe-circuit global : quand le taux d'erreur des `window` dernières pages dépasse
+    `error_rate` (souvent une page de blocage anti-bot), le crawl est mis en pause pendant
+    `cooldown` secondes, puis une seule page d'essai est autorisée. Un nouvel échec
+    rouvre le circuit avec une pause doublée (jusqu'à `max_cooldown`). Thread-safe.
+    """
+
+    def __init__(self, window=20, error_rate=0.5, min_samples=10, cooldown=120.0, max_cooldown=900.0):
+        if window < 1:
+            raise ValueError(f"Fenêtre du coupe-circuit invalide : {window} (au moins 1 page).")
+        self.window = window
+        self.error_rate = error_rate
+        # Une fenêtre plus courte que min_samples ne contiendrait jamais assez de pages pour ouvrir le circuit
+        self.min_samples = min(min_samples, window)
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self._outcomes = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._open_until = None
+        self._cooldown = cooldown
+        self._trial_in_flight = False
+        self.trips = 0
+        self.paused_seconds = 0.0
+
+    def before_call(self):
+        """Bloque tant que le circuit est ouvert ; à sa réouverture, une seule page d'essai passe à la fois."""
+        while True:
+            with self._lock:
+                if self._open_until is None:
+                    return
+                remaining = self._open_until - time.monotonic()
+                if remaining <= 0 and not self._trial_in_flight:
+                    self._trial_in_flight = True
+                    return
+            # Circuit encore ouvert : on attend la fin de la pause ; essai en cours : on repasse dans 1 s
+            delay = remaining if remaining > 0 else 1.0
+            with self._lock:
+                self.paused_seconds += delay
+            time.sleep(delay)
+
+    def record(self, success):
+        with self._lock:
+            if self._trial_in_flight:
+                self._trial_in_flight = False
+                if success:
+                    print("✅ Coupe-circuit refermé : la page d'essai a réussi.")
+                    self._open_until = None
+                    self._cooldown = self.base_cooldown
+                    self._outcomes.clear()
+                else:
+                    self._cooldown = min(self._cooldown * 2, self.max_cooldown)
+                    self._trip()
+                return
+            self._outcomes.append(success)
+            failures = self._outcomes.count(False)
+            if (self._open_until is None and len(self._outcomes) >= self.min_samples
+                    and failures / len(self._outcomes) >= self.error_rate):
+                self._trip()
+
+    def _trip(self):
+        self.trips += 1
+        self._open_until = time.monotonic() + self._cooldown
+        print(f"⛔ Coupe-circuit ouvert : trop d'erreurs récentes (blocage probable), pause de {self._cooldown:.0f}s.")
+
+
+class RetryPolicy:
+    """
+    Réessaie une opération sur les erreurs transitoires, avec un délai exponentiel à gigue
+    complète (tirage uniforme entre 0 et base * 2^(tentative-1), plafonné à `max_delay`).
+    Chaque tentative passe par le coupe-circuit éventuel et lui rapporte son issue.
+    """
+
+    def __init__(self, max_attempts=3, base_delay=2.0, max_delay=60.0, breaker=None, rng=None):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.breaker = breaker
+        self.rng = rng or random.Random()
+        self.retries = 0
+
+    def backoff(self, attempt):
+        return self.rng.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    def call(self, fn, label=''):
+        """
+        Appelle fn() jusqu'à `max_attempts` fois. En cas d'échec définitif, l'exception est
+        relancée avec un attribut `attempts` (nombre de tentatives effectuées).
+        """
+        for attempt in range(1, self.max_attempts + 1):
+            if self.breaker is not None:
+                self.breaker.before_call()
+            try:
+                result = fn()
+            except Exception as e:
+                if self.breaker is not None:
+                    self.breaker.record(False)
+                e.attempts = attempt
+                if attempt == self.max_attempts or not is_retryable(e):
+                    raise
+                delay = self.backoff(attempt)
+                self.retries += 1
+                print(f"  -> Tentative {attempt}/{self.max_attempts} échouée pour {label or 'la page'} "
+                      f"({type(e).__name__}), nouvel essai dans {delay:.1f}s.")
+                time.sleep(delay)
+            else:
+                if self.breaker is not None:
+                    self.breaker.record(True)
+                return result
+
+
+class DeadLetterQueue:
+    """
+    Cours en échec définitif, un par ligne JSON (URL, titre, topics, erreur, tentatives),
+    pour les relancer plus tard avec load_dead_letters() au lieu d'écrire des enregistrements vides.
+    """
+
+    def __init__(self, path, mode='w'):
+        self.path = path
+        self._sink = JsonlSink(path, mode=mode)
+
+    @property
+    def count(self):
+        return self._sink.count
+
+    def add(self, course_info, error):
+        self._sink.write({
+            'url': course_info['url'],
+            'title': course_info.get('title'),
+            'topics': course_info.get('topics', []),
+            'error': str(error),
+            'error_type': type(error).__name__,
+            'retryable': is_retryable(error) if isinstance(error, Exception) else True,
+            'attempts': getattr(error, 'attempts', 1),
+            'failed_at': time.time(),
+        })
+
+    def close(self):
+        self._sink.close()
+
+
+def load_dead_letters(path):
+    """Renvoie les cartes de cours (url, title, topics) de la liste d'échecs, une fois par URL ([] si elle n'existe pas)."""
+    if not os.path.exists(path):
+        return []
+    courses = {}
+    for entry in iter_records(path):
+        courses[entry['url']] = {'title': entry.get('title'), 'url': entry['url'], 'topics': entry.get('topics', [])}
+    return list(courses.values())
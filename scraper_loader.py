@@ -0,0 +1,11 @@
+import importlib.util
+import os
+
+
+def load_scraper():
+    """Charge code-scraping.py comme module (son nom contient un tiret) pour réutiliser ses fonctions."""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'code-scraping.py')
+    spec = importlib.util.spec_from_file_location('code_scraping', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
@@ -0,0 +1,203 @@
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager, nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from page_readiness import _percentile
+from record_stream import JsonlSink
+from udemy_extractors import DETAIL_FIELDS, missing_fields
+
+METRIC_PREFIX = "udemy_scraper"
+# En dessous de ce taux de succès, un champ est signalé dans le rapport (sélecteur probablement cassé)
+MIN_FIELD_HIT_RATE = 0.8
+
+
+def _labels(**labels):
+    items = [f'{k}="{v}"' for k, v in labels.items() if v]
+    return "{" + ",".join(items) + "}" if items else ""
+
+
+def timed(telemetry, stage, page_type=None, **fields):
+    """telemetry.stage(...) si une télémétrie est fournie, sinon un bloc sans mesure."""
+    return telemetry.stage(stage, page_type, **fields) if telemetry is not None else nullcontext()
+
+
+class Telemetry:
+    """
+    Instrumentation structurée d'un crawl : durée de chaque étape (démarrage du navigateur,
+    navigation, disponibilité, analyse, écriture...), champs trouvés / manquants par page
+    de détails et compteurs. Chaque mesure est émise comme événement JSON (une ligne par
+    événement dans `events_path`) et agrégée pour le rapport de fin de run et l'export
+    Prometheus. Thread-safe, partagé entre les workers du pool.
+    """
+
+    def __init__(self, events_path=None, run_id=None, min_hit_rate=MIN_FIELD_HIT_RATE):
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        self.min_hit_rate = min_hit_rate
+        self.started_at = time.time()
+        self._sink = JsonlSink(events_path, mode='a') if events_path else None
+        self._lock = threading.Lock()
+        self._stages = {}
+        self._stage_errors = {}
+        self._field_hits = {field: 0 for field in DETAIL_FIELDS}
+        self._field_misses = {field: 0 for field in DETAIL_FIELDS}
+        self._counters = {}
+
+    def event(self, name, **fields):
+        """Émet un événement JSON horodaté (ignoré si aucun fichier d'événements n'est configuré)."""
+        if self._sink is not None:
+            self._sink.write(dict(ts=time.time(), run_id=self.run_id, event=name, **fields))
+
+    def record_stage(self, stage, seconds, page_type=None, error=None, **fields):
+        """Enregistre la durée d'une étape déjà mesurée (ex : temps de disponibilité du waiter)."""
+        key = (stage, page_type or '')
+        with self._lock:
+            self._stages.setdefault(key, []).append(seconds)
+            if error is not None:
+                self._stage_errors[key] = self._stage_errors.get(key, 0) + 1
+        self.event('stage', stage=stage, page_type=page_type, seconds=round(seconds, 6),
+                   error=str(error) if error is not None else None, **fields)
+
+    @contextmanager
+    def stage(self, stage, page_type=None, **fields):
+        """Mesure la durée du bloc ; une exception est comptée en erreur de l'étape puis relancée."""
+        t0 = time.perf_counter()
+        try:
+            yield
+        except BaseException as e:
+            self.record_stage(stage, time.perf_counter() - t0, page_type, error=type(e).__name__, **fields)
+            raise
+        self.record_stage(stage, time.perf_counter() - t0, page_type, **fields)
+
+    def record_fields(self, url, details):
+        """Compte les champs trouvés / manquants d'une page de détails."""
+        missing = set(missing_fields(details))
+        with self._lock:
+            for field in DETAIL_FIELDS:
+                if field in missing:
+                    self._field_misses[field] += 1
+                else:
+                    self._field_hits[field] += 1
+        self.event('fields', url=url, missing=sorted(missing))
+
+    def count(self, name, n=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def summary(self):
+        """Agrégats : par (étape, type de page) nombre, total, p50/p95 ; par champ taux de succès ; compteurs."""
+        with self._lock:
+            stages = {k: sorted(v) for k, v in self._stages.items()}
+            errors = dict(self._stage_errors)
+            hits, misses = dict(self._field_hits), dict(self._field_misses)
+            counters = dict(self._counters)
+        result = {'stages': {}, 'fields': {}, 'counters': counters}
+        for key, values in stages.items():
+            result['stages'][key] = {
+                'count': len(values),
+                'errors': errors.get(key, 0),
+                'total': sum(values),
+                'p50': _percentile(values, 50),
+                'p95': _percentile(values, 95),
+            }
+        for field in DETAIL_FIELDS:
+            seen = hits[field] + misses[field]
+            result['fields'][field] = {
+                'hits': hits[field],
+                'misses': misses[field],
+                'hit_rate': hits[field] / seen if seen else None,
+            }
+        return result
+
+    def low_hit_rate_fields(self, summary=None):
+        """Champs dont le taux de succès est passé sous `min_hit_rate`."""
+        summary = summary or self.summary()
+        return [field for field, s in summary['fields'].items()
+                if s['hit_rate'] is not None and s['hit_rate'] < self.min_hit_rate]
+
+    def report(self):
+        summary = self.summary()
+        print(f"\n--- Télémétrie du run {self.run_id} ---")
+        grand_total = sum(s['total'] for s in summary['stages'].values()) or 1.0
+        for (stage, page_type), s in sorted(summary['stages'].items(), key=lambda item: -item[1]['total']):
+            label = f"{stage} ({page_type})" if page_type else stage
+            print(f"  {label:28s} {s['count']:5d} fois, total {s['total']:7.1f}s ({100 * s['total'] / grand_total:4.1f}%), "
+                  f"p50={s['p50']:.3f}s p95={s['p95']:.3f}s" + (f", {s['errors']} erreurs" if s['errors'] else ""))
+        if any(s['hit_rate'] is not None for s in summary['fields'].values()):
+            print("  Taux de succès des champs :")
+            for field, s in summary['fields'].items():
+                if s['hit_rate'] is not None:
+                    print(f"    {field:20s} {100 * s['hit_rate']:5.1f}% ({s['hits']}/{s['hits'] + s['misses']})")
+        low = self.low_hit_rate_fields(summary)
+        if low:
+            print(f"  ⚠️ Taux de succès sous {self.min_hit_rate:.0%} pour : {', '.join(low)}. Sélecteur à vérifier ?")
+        for name, value in sorted(summary['counters'].items()):
+            print(f"  {name} : {value}")
+        return summary
+
+    def prometheus_text(self):
+        """Métriques au format texte Prometheus (textfile collector de node_exporter ou endpoint /metrics)."""
+        summary = self.summary()
+        p = METRIC_PREFIX
+        lines = [
+            f"# HELP {p}_stage_seconds Durée des étapes du crawl.",
+            f"# TYPE {p}_stage_seconds summary",
+        ]
+        for (stage, page_type), s in sorted(summary['stages'].items()):
+            for quantile in ('0.5', '0.95'):
+                value = s['p50'] if quantile == '0.5' else s['p95']
+                lines.append(f"{p}_stage_seconds{_labels(stage=stage, page_type=page_type, quantile=quantile)} {value}")
+            lines.append(f"{p}_stage_seconds_sum{_labels(stage=stage, page_type=page_type)} {s['total']}")
+            lines.append(f"{p}_stage_seconds_count{_labels(stage=stage, page_type=page_type)} {s['count']}")
+        lines += [f"# HELP {p}_stage_errors_total Étapes terminées en erreur.", f"# TYPE {p}_stage_errors_total counter"]
+        for (stage, page_type), s in sorted(summary['stages'].items()):
+            lines.append(f"{p}_stage_errors_total{_labels(stage=stage, page_type=page_type)} {s['errors']}")
+        lines += [f"# HELP {p}_field_hits_total Pages de détails où le champ a été trouvé.",
+                  f"# TYPE {p}_field_hits_total counter"]
+        lines += [f"{p}_field_hits_total{_labels(field=f)} {s['hits']}" for f, s in summary['fields'].items()]
+        lines += [f"# HELP {p}_field_misses_total Pages de détails où le champ est manquant.",
+                  f"# TYPE {p}_field_misses_total counter"]
+        lines += [f"{p}_field_misses_total{_labels(field=f)} {s['misses']}" for f, s in summary['fields'].items()]
+        lines += [f"# HELP {p}_field_hit_ratio Taux de succès de l'extraction du champ.",
+                  f"# TYPE {p}_field_hit_ratio gauge"]
+        lines += [f"{p}_field_hit_ratio{_labels(field=f)} {s['hit_rate']}"
+                  for f, s in summary['fields'].items() if s['hit_rate'] is not None]
+        for name, value in sorted(summary['counters'].items()):
+            lines += [f"# TYPE {p}_{name}_total counter", f"{p}_{name}_total {value}"]
+        lines += [f"# TYPE {p}_run_start_timestamp_seconds gauge", f"{p}_run_start_timestamp_seconds {self.started_at}",
+                  f"# TYPE {p}_last_update_timestamp_seconds gauge", f"{p}_last_update_timestamp_seconds {time.time()}"]
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        """Écrit les métriques de façon atomique (le collecteur ne lit jamais un fichier à moitié écrit)."""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp_path, path)
+
+    def serve_prometheus(self, port, host='127.0.0.1'):
+        """Expose les métriques sur http://host:port/metrics pendant le run ; renvoie le serveur."""
+        telemetry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = telemetry.prometheus_text().encode('utf-8')
+                self.send_response(200 if self.path.startswith('/metrics') else 404)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+    def close(self):
+        if self._sink is not None:
+            self._sink.close()
@@ -0,0 +1,284 @@
+import re
+
+import lxml.html
+from bs4 import BeautifulSoup
+
+UDEMY_ORIGIN = "https://www.udemy.com"
+
+LEARN_SECTION_CLASS = 'what-you-will-learn--what-will-you-learn--jsm83'
+OBJECTIVES_LIST_CLASSES = ('ud-unstyled-list', 'what-you-will-learn--objectives-list--qsvE2')
+LIST_ITEM_CONTENT_CLASS = 'ud-block-list-item-content'
+DESCRIPTION_TAGS = ('p', 'li', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'span', 'div')
+
+DETAIL_FIELDS = (
+    'students_enrolled', 'what_you_will_learn', 'description', 'current_price', 'original_price',
+    'discount_percentage', 'requirements', 'course_language', 'rating'
+)
+
+# Un seul parcours du document (XPath évalué en C par libxml2) : on ne récupère que les
+# éléments porteurs d'un data-purpose ou la section "What you'll learn", puis on dispatche.
+_DETAIL_XPATH = (
+    "//*[@data-purpose or contains(concat(' ', normalize-space(@class), ' '), ' "
+    + LEARN_SECTION_CLASS + " ')]"
+)
+_LISTING_XPATH = "//div[@data-purpose='container']"
+
+
+def empty_course_details():
+    """Champs de détails vides, pour garder des enregistrements cohérents en cas d'erreur."""
+    return {
+        'students_enrolled': None,
+        'what_you_will_learn': [],
+        'description': None,
+        'current_price': None,
+        'original_price': None,
+        'discount_percentage': None,
+        'requirements': [],
+        'course_language': None,
+        'rating': None
+    }
+
+
+def _parse(html):
+    if isinstance(html, str):
+        # lxml refuse les chaînes unicode avec déclaration d'encodage : on passe des octets
+        html = html.encode('utf-8')
+    return lxml.html.fromstring(html, parser=lxml.html.HTMLParser(encoding='utf-8'))
+
+
+def _has_class(el, name):
+    return name in (el.get('class') or '').split()
+
+
+def _text(el):
+    """Équivalent de BeautifulSoup.get_text(strip=True) : fragments de texte nettoyés et concaténés."""
+    return ''.join(s.strip() for s in el.itertext())
+
+
+def _clean_price(text):
+    return re.sub(r'[^\d.,]+', '', text).replace(',', '.')
+
+
+def _absolute_url(href):
+    return UDEMY_ORIGIN + href if href.startswith('/') else href
+
+
+def _first_descendant(el, tag, data_purpose):
+    for child in el.iter(tag):
+        if child is not el and child.get('data-purpose') == data_purpose:
+            return child
+    return None
+
+
+def _title_text(link):
+    """Texte du lien de titre, sans le div SEO caché 'ud-sr-only'."""
+    parts = []
+
+    def walk(node):
+        if node.tag == 'div' and _has_class(node, 'ud-sr-only'):
+            return
+        if node.text:
+            parts.append(node.text.strip())
+        for child in node:
+            if isinstance(child.tag, str):
+                walk(child)
+            if child.tail:
+                parts.append(child.tail.strip())
+
+    walk(link)
+    return ''.join(parts)
+
+
+def parse_listing(html):
+    """
+    Extrait les cartes d'une page de résultats : liste de dicts {'title', 'url'}
+    (url vaut None si la carte n'a pas de lien de titre).
+    """
+    root = _parse(html)
+    cards = []
+    for card in root.xpath(_LISTING_XPATH):
+        link = None
+        for h3 in card.iter('h3'):
+            if h3.get('data-purpose') == 'course-title-url':
+                link = next(h3.iter('a'), None)
+                if link is not None:
+                    break
+        if link is None:
+            cards.append({'title': None, 'url': None})
+            continue
+        href = link.get('href')
+        cards.append({
+            'title': _title_text(link),
+            'url': _absolute_url(href) if href else None,
+        })
+    return cards
+
+
+def parse_course_details(html):
+    """
+    Extrait d'une page de détails le nombre d'étudiants, les objectifs, la description,
+    le prix, les exigences, la langue et le rating, en un seul parcours du document.
+    Seule la première occurrence de chaque section est prise en compte.
+    """
+    details = empty_course_details()
+    root = _parse(html)
+    seen = set()
+
+    for el in root.xpath(_DETAIL_XPATH):
+        purpose = el.get('data-purpose')
+        tag = el.tag
+
+        if purpose == 'enrollment' and tag == 'div' and 'enrollment' not in seen:
+            seen.add('enrollment')
+            digits = re.sub(r'[^\d]', '', _text(el))
+            details['students_enrolled'] = int(digits) if digits else None
+
+        elif purpose == 'lead-course-locale' and tag == 'div' and 'locale' not in seen:
+            seen.add('locale')
+            details['course_language'] = _text(el).replace('Course Language', '').strip()
+
+        elif purpose == 'rating-number' and tag == 'span' and 'rating' not in seen:
+            seen.add('rating')
+            details['rating'] = _text(el)
+
+        elif purpose == 'course-description' and tag == 'div' and 'description' not in seen:
+            seen.add('description')
+            content = _first_descendant(el, 'div', 'safely-set-inner-html:description:description')
+            if content is not None:
+                parts = []
+                for elem in content.iter(*DESCRIPTION_TAGS):
+                    if elem is content:
+                        continue
+                    text = _text(elem)
+                    if text:
+                        parts.append(text)
+                description = "\n\n".join(parts)
+                if "Who this course is for:" in description:
+                    description = description.split("Who this course is for:")[0].strip()
+                details['description'] = description
+
+        elif purpose == 'requirements-title' and tag == 'h2' and 'requirements' not in seen:
+            seen.add('requirements')
+            for sibling in el.itersiblings('ul'):
+                if _has_class(sibling, 'ud-unstyled-list'):
+                    for item in sibling.iter('div'):
+                        if _has_class(item, LIST_ITEM_CONTENT_CLASS):
+                            text = _text(item)
+                            if text:
+                                details['requirements'].append(text)
+                    break
+
+        elif purpose == 'price-text-container' and tag == 'div' and 'price' not in seen:
+            seen.add('price')
+            current = _first_descendant(el, 'div', 'course-price-text')
+            if current is not None:
+                details['current_price'] = _clean_price(_text(current))
+            original = _first_descendant(el, 'div', 'course-old-price-text')
+            if original is not None:
+                details['original_price'] = _clean_price(_text(original))
+            discount = _first_descendant(el, 'div', 'discount-percentage')
+            if discount is not None:
+                details['discount_percentage'] = _text(discount)
+
+        if tag == 'div' and 'learn' not in seen and _has_class(el, LEARN_SECTION_CLASS):
+            seen.add('learn')
+            objectives = next(
+                (ul for ul in el.iter('ul') if any(_has_class(ul, c) for c in OBJECTIVES_LIST_CLASSES)),
+                None
+            )
+            if objectives is not None:
+                for item in objectives.iter('li'):
+                    content = next((d for d in item.iter('div') if _has_class(d, LIST_ITEM_CONTENT_CLASS)), None)
+                    if content is not None:
+                        details['what_you_will_learn'].append(_text(content))
+
+    return details
+
+
+# --- Implémentation de référence (BeautifulSoup + html.parser) ---
+# Chemin historique du scraper, conservé pour le benchmark et pour vérifier
+# que l'extracteur rapide produit les mêmes champs.
+
+def parse_listing_reference(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    cards = []
+    for card_soup in soup.find_all('div', {'data-purpose': 'container'}):
+        title_link_element = card_soup.select_one('h3[data-purpose="course-title-url"] a')
+        if title_link_element:
+            title_soup_copy = BeautifulSoup(str(title_link_element), 'html.parser')
+            hidden_seo_div = title_soup_copy.find('div', class_='ud-sr-only')
+            if hidden_seo_div:
+                hidden_seo_div.decompose()
+            href = title_link_element.get('href')
+            cards.append({
+                'title': title_soup_copy.get_text(strip=True),
+                'url': _absolute_url(href) if href else None,
+            })
+        else:
+            cards.append({'title': None, 'url': None})
+    return cards
+
+
+def parse_course_details_reference(html):
+    details = empty_course_details()
+    detail_soup = BeautifulSoup(html, 'html.parser')
+
+    enrollment_div = detail_soup.find('div', {'data-purpose': 'enrollment'})
+    if enrollment_div:
+        cleaned = re.sub(r'[^\d]', '', enrollment_div.get_text(strip=True))
+        details['students_enrolled'] = int(cleaned) if cleaned else None
+
+    language_div = detail_soup.find('div', {'data-purpose': 'lead-course-locale'})
+    if language_div:
+        details['course_language'] = language_div.get_text(strip=True).replace('Course Language', '').strip()
+
+    rating_span = detail_soup.find('span', {'data-purpose': 'rating-number'})
+    if rating_span:
+        details['rating'] = rating_span.get_text(strip=True)
+
+    learn_section = detail_soup.find('div', class_=LEARN_SECTION_CLASS)
+    if learn_section:
+        objectives_list_ul = learn_section.find('ul', class_=list(OBJECTIVES_LIST_CLASSES))
+        if objectives_list_ul:
+            for item in objectives_list_ul.find_all('li'):
+                content_div = item.find('div', class_=LIST_ITEM_CONTENT_CLASS)
+                if content_div:
+                    details['what_you_will_learn'].append(content_div.get_text(strip=True))
+
+    description_div = detail_soup.find('div', {'data-purpose': 'course-description'})
+    if description_div:
+        content = description_div.find('div', {'data-purpose': 'safely-set-inner-html:description:description'})
+        if content:
+            parts = [e.get_text(strip=True) for e in content.find_all(list(DESCRIPTION_TAGS))]
+            description = "\n\n".join(p for p in parts if p)
+            if "Who this course is for:" in description:
+                description = description.split("Who this course is for:")[0].strip()
+            details['description'] = description
+
+    requirements_title = detail_soup.find('h2', {'data-purpose': 'requirements-title'})
+    if requirements_title:
+        requirements_ul = requirements_title.find_next_sibling('ul', class_='ud-unstyled-list')
+        if requirements_ul:
+            for item in requirements_ul.find_all('div', class_=LIST_ITEM_CONTENT_CLASS):
+                text = item.get_text(strip=True)
+                if text:
+                    details['requirements'].append(text)
+
+    price_container = detail_soup.find('div', {'data-purpose': 'price-text-container'})
+    if price_container:
+        current = price_container.find('div', {'data-purpose': 'course-price-text'})
+        if current:
+            details['current_price'] = _clean_price(current.get_text(strip=True))
+        original = price_container.find('div', {'data-purpose': 'course-old-price-text'})
+        if original:
+            details['original_price'] = _clean_price(original.get_text(strip=True))
+        discount = price_container.find('div', {'data-purpose': 'discount-percentage'})
+        if discount:
+            details['discount_percentage'] = discount.get_text(strip=True)
+
+    return details
+
+
+def missing_fields(details):
+    """Champs de détails non trouvés (None ou liste vide)."""
+    return [field for field in DETAIL_FIELDS if details.get(field) in (None, [])]
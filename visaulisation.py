@@ -2,10 +2,9 @@
 
 import streamlit as st
 import pandas as pd
-import json
 import plotly.express as px
 import os
-import re
+from dataset_store import ensure_dataset, load_dataframe
 
 st.set_page_config(
     page_title="📊 Visualisation Udemy IA",
@@ -18,10 +17,14 @@ DATA_PATH = "/home/mohamed/Bureau/global_dataset.json" # Attention: ce chemin es
 @st.cache_data(show_spinner="Chargement des données Udemy (cours + certificats)...")
 def load_data(json_path):
     """
-    Charge le JSON, crée un DataFrame, ajoute/normalise les colonnes importantes :
+    Charge le jeu de données colonnaire (dataset_store.py) construit à partir du JSON / JSONL
+    du scraper ; il est (re)construit automatiquement s'il est absent ou plus ancien que la source.
+    Les colonnes sont déjà typées et normalisées :
       - price_numeric  (float)
       - description    (str)
       - type (“Cours” / “Certificat”)
+      - category / level / language ("Inconnu" si absent)
+      - students_enrolled / rating / duration_hours (numériques, NaN si absent)
     """
     # Note: Le chemin DATA_PATH est codé en dur. Pour une meilleure portabilité,
     # il pourrait être préférable de le rendre configurable ou relatif.
@@ -30,51 +33,12 @@ def load_data(json_path):
         st.stop()
 
     try:
-        with open(json_path, 'r', encoding='utf-8') as f:
-            raw = json.load(f)
+        df = load_dataframe(ensure_dataset(json_path))
     except Exception as e:
         st.error(f"🚨 Erreur lors de la lecture du fichier JSON : {e}")
         st.stop()
 
-    df = pd.DataFrame(raw)
-
-    def parse_price(x):
-        if isinstance(x, (int, float)):
-            return float(x)
-        s = str(x).lower().strip()
-        if s in ["free", "gratuit", "0", "0.0", "null", "none", ""]:
-            return 0.0
-        num = re.sub(r"[^\d\.]", "", s)
-        try:
-            return float(num)
-        except:
-            return 0.0
-
-    df["price_numeric"] = df.get("current_price", 0).apply(parse_price)
-    df["description"] = df.get("description", "").fillna("").astype(str)
-
-    def infer_type(row):
-        cat = str(row.get("category", "")).lower()
-        title = str(row.get("title", "")).lower()
-        if "certif" in cat or "certificate" in cat or "certificat" in cat:
-            return "Certificat"
-        if any(keyword in title for keyword in ["certificate", "certificat", "aws certified"]):
-            return "Certificat"
-        return "Cours"
-
-    df["type"] = df.apply(infer_type, axis=1)
-
-    for col in ["category", "level", "language"]:
-        df[col] = df.get(col, "Inconnu").fillna("Inconnu").astype(str)
-
-    # Ajout de colonnes si elles existent dans le JSON original, sinon NaN
-    for col in ["students_enrolled", "rating", "duration_hours"]:
-        if col not in df.columns:
-             df[col] = pd.NA # Ou une autre valeur par défaut comme 0 ou np.nan si numpy est importé
-        else:
-             # Tentative de conversion en numérique, gestion des erreurs
-             df[col] = pd.to_numeric(df[col], errors='coerce')
-
+    df["price_numeric"] = df["price"]
     return df
 
 df = load_data(DATA_PATH)